@@ -0,0 +1,161 @@
+#!/usr/bin/python3
+############################################################
+# Class CanvasGrid
+# Renderer for large planning grids. All cells are drawn as
+# rectangles on a single flet canvas instead of one control
+# per cell. Changed cells are only marked as dirty, flush()
+# redraws the dirty cells and sends one update for all of them.
+# The view calls flush() once per frame (see ui_batcher.py).
+# In heatmap mode the searched cells are colored by their g- or
+# rsh-value instead of showing the values as text.
+#
+# File: canvas_grid.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+import flet as ft
+import flet.canvas as cv
+
+HEATMAP_MODES = ['Off', 'g', 'rsh']
+SEARCH_COLORS = ('green', 'orange')  # Colors replaced by the heatmap
+HEAT_LOW = (255, 235, 59)  # Color of value 0 (yellow)
+HEAT_HIGH = (26, 35, 126)  # Color of the largest value (dark blue)
+HEAT_INF = '#9e9e9e'  # Color of the value inf (grey)
+MIN_TEXT_WIDTH = 40  # Minimum cell width in pixels for g- and rsh-text
+
+
+class CanvasGrid(ft.UserControl):
+
+    # planner: DStarLitePlanner with the vertex grid
+    # cell_width, cell_height: size of a cell in pixels
+    # on_tap: function(x, y) called when a cell has been clicked
+    # heatmap: one of HEATMAP_MODES
+    def __init__(self, planner, cell_width, cell_height, on_tap=None, heatmap='Off'):
+        super().__init__()
+        self.planner = planner
+        self.gridWidth = planner.width
+        self.gridHeight = planner.height
+        self.cellWidth = cell_width
+        self.cellHeight = cell_height
+        self.onTap = on_tap
+        self.heatmap = heatmap
+        # Largest g- or rsh-value of the heatmap scale (a path without obstacles)
+        self.heatScale = max(self.gridWidth, self.gridHeight) * 1.5
+        size = self.gridWidth * self.gridHeight
+        self.colors = [ft.colors.GREEN] * size  # Planning color of every cell
+        self.dirty = set()  # Ids of the cells to redraw
+        self.rects = [cv.Rect(0, 0, 0, 0, paint=ft.Paint(color=ft.colors.GREEN)) for _ in range(size)]
+        self.labels = []  # g- and rsh-texts, only created for large cells
+        self.canvas = cv.Canvas(shapes=list(self.rects))
+        self.layout()
+
+    def build(self):
+        return ft.GestureDetector(content=self.canvas, on_tap_down=self.tapped)
+
+    # Return the id of the cell at x, y (same order as vertex_grid.py)
+    def cell_id(self, x, y):
+        return x * self.gridHeight + y
+
+    # Return the cell x, y at the pixel position px, py or None
+    def cell_at(self, px, py):
+        x = int(px // self.cellWidth)
+        y = int(py // self.cellHeight)
+        if 0 <= x < self.gridWidth and 0 <= y < self.gridHeight:
+            return x, y
+        return None
+
+    def tapped(self, e):
+        cell = self.cell_at(e.local_x, e.local_y)
+        if cell is not None and self.onTap is not None:
+            self.onTap(*cell)
+
+    # Position all rectangles for the actual cell size. Texts are
+    # shown if the cells are large enough and the heatmap is off.
+    def layout(self):
+        for x in range(self.gridWidth):
+            for y in range(self.gridHeight):
+                rect = self.rects[self.cell_id(x, y)]
+                rect.x = x * self.cellWidth
+                rect.y = y * self.cellHeight
+                rect.width = self.cellWidth - 1  # 1 pixel gap as cell border
+                rect.height = self.cellHeight - 1
+        show_text = self.cellWidth >= MIN_TEXT_WIDTH and self.heatmap == 'Off'
+        if show_text and not self.labels:
+            self.labels = [cv.Text(0, 0, '', style=ft.TextStyle(size=8)) for _ in self.rects]
+            self.canvas.shapes = self.rects + self.labels
+        elif not show_text and self.labels:
+            self.labels = []
+            self.canvas.shapes = list(self.rects)
+        for x in range(self.gridWidth):
+            for y in range(self.gridHeight):
+                if self.labels:
+                    label = self.labels[self.cell_id(x, y)]
+                    label.x = x * self.cellWidth + 2
+                    label.y = y * self.cellHeight + 2
+        self.canvas.width = self.cellWidth * self.gridWidth
+        self.canvas.height = self.cellHeight * self.gridHeight
+        self.dirty.update(range(len(self.rects)))
+
+    # Return the color shown for the cell
+    def display_color(self, cell_id):
+        color = self.colors[cell_id]
+        if self.heatmap == 'Off' or color not in SEARCH_COLORS:
+            return color
+        g, rsh = self.planner.cell_values(cell_id // self.gridHeight, cell_id % self.gridHeight)
+        value = g if self.heatmap == 'g' else rsh
+        if value == float('inf'):
+            return HEAT_INF
+        t = min(value / self.heatScale, 1.0)
+        r, g, b = (round(low + (high - low) * t) for low, high in zip(HEAT_LOW, HEAT_HIGH))
+        return f'#{r:02x}{g:02x}{b:02x}'
+
+    # Redraw the dirty cells and send them in one update. With send=False
+    # the caller sends them, e.g. with page.update().
+    def flush(self, send=True):
+        if not self.dirty:
+            return
+        for cell_id in self.dirty:
+            self.rects[cell_id].paint = ft.Paint(color=self.display_color(cell_id))
+            if self.labels:
+                x, y = cell_id // self.gridHeight, cell_id % self.gridHeight
+                if self.planner.vertexGrid[x][y].isObstacle:
+                    self.labels[cell_id].text = ''
+                else:
+                    g, rsh = self.planner.cell_values(x, y)
+                    self.labels[cell_id].text = f'g:{round(g, 2)}\nrsh:{round(rsh, 2)}'
+        self.dirty = set()
+        if send and self.page is not None:
+            self.canvas.update()
+
+    # Mark a cell as changed. The cell is drawn with the next flush().
+    def mark_dirty(self, x, y):
+        self.dirty.add(self.cell_id(x, y))
+
+    # Set the planning color of a cell
+    def update_color(self, x, y, color):
+        self.colors[self.cell_id(x, y)] = color
+        self.mark_dirty(x, y)
+
+    # The g-value of a cell has changed
+    def update_g(self, x, y):
+        if self.labels or self.heatmap == 'g':
+            self.mark_dirty(x, y)
+
+    # The rsh-value of a cell has changed
+    def update_rsh(self, x, y):
+        if self.labels or self.heatmap == 'rsh':
+            self.mark_dirty(x, y)
+
+    # Select the heatmap mode (see HEATMAP_MODES) and redraw all cells
+    def set_heatmap(self, heatmap):
+        self.heatmap = heatmap
+        self.layout()
+        self.flush()
+
+    # New cell size after a resize of the page
+    def update_size(self, cell_width, cell_height):
+        self.cellWidth = cell_width
+        self.cellHeight = cell_height
+        self.layout()
+        self.flush()
@@ -6,6 +6,9 @@
 # and drives from vertex to vertex of the path.
 # The robot can move forward and change direction to
 # north, east, south and west.
+# The distance readings of the robot are ray-cast into the
+# grid (RayOccupancy): obstacles further ahead are found and
+# re-planned in batches before the robot reaches them.
 #
 # This class inherits from ScreenExecutor.
 #
@@ -16,7 +19,8 @@
 
 import time
 from screen_executor import ScreenExecutor
-from mqtt_service import MQTTService
+from mqtt_service import get_service, one_step_distance
+from ray_occupancy import DIRECTIONS, RayOccupancy
 
 
 class CloudExecutor(ScreenExecutor):
@@ -32,7 +36,9 @@ class CloudExecutor(ScreenExecutor):
         self.lastCommand = ''  # last command send to the robot
         self.init_command_dict()
 
-        self.robot = MQTTService()
+        self.robot = get_service()  # Connection shared by all executions
+        self.robot.reset_run()
+        self.rays = RayOccupancy(my_planner, cell_size=one_step_distance)
 
 
     # Initialize the dictionaries for the robot commands depending
@@ -63,11 +69,10 @@ class CloudExecutor(ScreenExecutor):
     # cannot be  established
     def connect_real_robot(self):
         print('Connecting cloud robot')
-        return True, 'Heartbeat acknowledged'
-        # if self.robot.heartbeat is not None:
-        #    return True, 'Heartbeat acknowledged'
-        # else:
-        #    return False, 'Opus! Robot is not ready! Please check the status.'
+        if self.robot.wait_ready():
+            return True, 'Heartbeat acknowledged'
+        else:
+            return False, 'Opus! Robot is not ready! Please check the status.'
 
     # Overwritten method of superclass.
     # Ask user if robot is put at initial vertex
@@ -96,8 +101,14 @@ class CloudExecutor(ScreenExecutor):
     def command_robot(self, orientation):
         command = self.direction_dict[self.actualOrientation][orientation]
         print('Commanding robot:', command)
+        self.robot.take_distances()  # Readings of earlier positions
         reply = self.robot.send(command)
         self.lastCommand = command
+        x, y = self.planner.startNode.x, self.planner.startNode.y
+        if command == 'Drive' and reply == b'ok':
+            x += DIRECTIONS[orientation][0]
+            y += DIRECTIONS[orientation][1]
+        self.update_rays(x, y, orientation)
         # If telemetry contains a ! at end then an obstacle is ahead.
         ack = reply == b'ok'
         return ack, reply
@@ -109,12 +120,21 @@ class CloudExecutor(ScreenExecutor):
     # Return additionally the telemetry from the robot
     def obstacle_start_check(self):
         print('Commanding robot: CheckDistance')
+        self.robot.take_distances()
         reply = self.robot.send('CheckDistance')
         self.lastCommand = 'CheckDistance'
+        self.update_rays(self.planner.startNode.x, self.planner.startNode.y, self.actualOrientation)
         # If telemetry contains a ! at end then an obstacle is ahead.
         ack = reply == b'ok'
         return ack, reply
 
+    # Ray-cast the distance readings received since the last command,
+    # taken by the robot at cell (x, y) looking in direction orientation.
+    # The map changes are re-planned by execute_plan when they are due.
+    def update_rays(self, x, y, orientation):
+        for _, distance in self.robot.take_distances():
+            self.rays.update(x, y, orientation, distance)
+
     # Robot drives to the goal and must be stopped when
     # it is totally on the goal vertex or a new obstacle appeared.
     # Return True, if command was executed without error
@@ -13,37 +13,89 @@
 
 import platform as pf  # Used for check if program runs on
 import time
+from collections import deque
 
-from priority_queue import PriorityQueue
+from priority_queue import IndexedPriorityQueue
 from screen_executor import ScreenExecutor
-from vertex import Vertex
+from vertex_grid import ArrayVertexGrid, create_vertex_grid, create_vertex_map, obstacle_vertices
+from planner_events import NullEventSink, PlanStep, StepAction, ViewEventSink
+from map_changes import ChangeType, MapChangeBuffer
+from heuristics import DIAGONAL_COST, default_heuristic
+from planner_metrics import metrics
 from cloud_executor import CloudExecutor
+from segment_executor import SegmentExecutor
 
 
 class DStarLitePlanner(object):
 
-    # Create a new initialized DStarLitePlanner with a vertex-grid
-    def __init__(self, my_view, grid_width=5, grid_height=4, h_is_zero=True, direct_neighbors=False):
+    # Create a new initialized DStarLitePlanner with a vertex-grid.
+    # grid_backend 'objects' uses Vertex objects, 'arrays' an array-backed
+    # grid for large maps (see vertex_grid.py).
+    # Planning events go to event_sink. Without a sink the events are sent
+    # to my_view, or dropped if my_view is None (headless planner).
+    # optimized selects the optimized D* Lite variant (Koenig, Likhachev,
+    # Fig. 4) which updates rsh-values from the changed successor only.
+    # heuristic is a function h(vertex, start_node) (see heuristics.py) which
+    # replaces the built-in heuristic selected by h_is_zero and direct_neighbors.
+    # inflation > 1 selects Anytime D* (Likhachev et al. 2005): the first plan
+    # costs at most inflation times the optimum and improve_plan lowers the
+    # inflation by inflation_step until the plan is optimal.
+    # vertex_grid is an already created grid (e.g. loaded from a map file),
+    # grid_width, grid_height and grid_backend are ignored then.
+    # diagonal_cost is the cost of a diagonal move (straight: 1). Without
+    # corner_cutting a diagonal move needs both cells beside it to be free.
+    # The MovingAI benchmarks use diagonal_cost=math.sqrt(2), corner_cutting=False.
+    def __init__(self, my_view, grid_width=5, grid_height=4, h_is_zero=True, direct_neighbors=False,
+                 grid_backend='objects', event_sink=None, optimized=False, heuristic=None,
+                 inflation=1.0, inflation_step=0.5, vertex_grid=None, diagonal_cost=DIAGONAL_COST,
+                 corner_cutting=True):
         self.stepDelay = None
         self.plan_steps = None
         self.k = None
         self.view = my_view
+        if event_sink is None:
+            event_sink = NullEventSink() if my_view is None else ViewEventSink(my_view)
+        self.events = event_sink  # Receiver of planning events
+        if vertex_grid is not None:
+            grid_width = len(vertex_grid)
+            grid_height = len(vertex_grid[0])
+            obstacles = obstacle_vertices(vertex_grid)
+        else:
+            vertex_grid = create_vertex_grid(grid_width, grid_height, grid_backend)
+            obstacles = set()
         self.width = grid_width
         self.height = grid_height
         self.directNeighbors = direct_neighbors  # false=8, true=4
-        self.vertexGrid = [[Vertex(x, y) for y in range(grid_height)] for x in range(grid_width)]
+        self.diagonalCost = diagonal_cost
+        self.cornerCutting = corner_cutting
+        self.vertexGrid = vertex_grid
         print(f'Creating vertex grid with height: {grid_height} and width:{grid_width} \n')
         self.startCoordinates = [float('inf'), float('inf')]
         self.goalCoordinates = [float('inf'), float('inf')]
-        self.obstacles = set()
+        self.obstacles = obstacles
         self.startNode = None
         self.goalNode = None
         self.lastNode = None
         self.hIsZero = h_is_zero
-        self.priorityQueue = PriorityQueue()  # The priority queue U
+        self.customHeuristic = heuristic  # None: use the built-in heuristic
+        self.heuristic = None  # Heuristic used for planning
+        self.inflation = inflation  # Initial inflation factor of the heuristic
+        self.inflationStep = inflation_step
+        self.epsilon = 1.0  # Actual inflation factor, 1 = optimal plan
+        self.closed = set()  # Anytime D*: vertices expanded as overconsistent
+        self.incons = set()  # Anytime D*: inconsistent vertices in closed
+        self.optimized = optimized  # False=basic, True=optimized D* Lite
+        self.priorityQueue = IndexedPriorityQueue(self.vertex_map('positions'))  # The priority queue U
         self.planReady = False  # True if a plan (= a path) is present
+        self.converged = False  # False if compute_shortest_path ran out of budget
         self.actualPath = []  # Sequence of vertices from start to goal
+        self.successors = self.vertex_map('successors')  # vertex -> neighbor giving its rsh-value
+        self.repainted = set()  # Vertices colored by the search since the path was shown
         self.executor = None  # Plan executor
+        self.mapChanges = MapChangeBuffer()  # Map changes waiting for re-planning
+        self.pendingGoal = None  # New goal (x, y) waiting for change_pending_goal
+        self.goalSet = {}  # Goal cells (x, y) -> offset cost, empty: single goal
+        self.goals = {}  # Goal vertices of the search -> offset cost
 
     # ### Functions for interactive view ########################################################
 
@@ -66,9 +118,24 @@ class DStarLitePlanner(object):
     def get_goal_coordinates(self):
         return self.goalCoordinates
 
+    # Plan to the cheapest of several goal cells in one search. goals is a
+    # list of (x, y) or (x, y, offset). The offset (>= 0) is added to the
+    # path cost of its goal, e.g. the time to dock there. An empty list
+    # selects the single goal of set_goal_coordinates again.
+    # Raise a ValueError for a negative offset.
+    def set_goals(self, goals):
+        goal_set = {}
+        for goal in goals:
+            x, y, offset = goal if len(goal) == 3 else (goal[0], goal[1], 0.0)
+            if not offset >= 0:
+                raise ValueError(f'Goal offset must be >= 0: {offset}')
+            goal_set[(int(x), int(y))] = float(offset)
+        self.goalSet = goal_set
+        print('  New goal set:', self.goalSet)
+
     def are_start_and_goal_set(self):
         return (self.get_start_coordinates() != [float('inf'), float('inf')]) and \
-            self.get_goal_coordinates() != [float('inf'), float('inf')]
+            (self.get_goal_coordinates() != [float('inf'), float('inf')] or bool(self.goalSet))
 
     # Execute the created plan.
     def execute_plan(self, exec_mode_str):
@@ -81,61 +148,133 @@ class DStarLitePlanner(object):
             self.executor = CloudExecutor(self.view, self)
             result = self.executor.execute_plan()
             return result
+        # upload the plan as motion segments, the robot runs them from a queue
+        elif exec_mode_str == 'Cloud Segments':
+            self.executor = SegmentExecutor(self.view, self)
+            result = self.executor.execute_plan()
+            return result
 
     # #### D* Lite Algorithm #############################################################
 
     # Initialize the planning process. Function implements the 'Initialize' procedure
     # of the D*Lite algorithm.
+    # With a goal set all goals are sources of the backward search with
+    # rsh = offset; goalNode is the goal the actual path leads to.
     def initialize_planning(self):
         print('Initialize planning:')
-        self.goalNode = self.vertexGrid[int(self.goalCoordinates[0])][int(self.goalCoordinates[1])]
+        if self.goalSet:
+            self.goals = {vertex: offset for (x, y), offset in self.goalSet.items()
+                          for vertex in self.state_vertices(x, y)}
+            if self.goalCoordinates[0] != float('inf'):
+                # The single goal of the view is no source of this search
+                goal = self.vertexGrid[int(self.goalCoordinates[0])][int(self.goalCoordinates[1])]
+                if goal not in self.goals:
+                    goal.rsh = float('inf')
+        else:
+            goal_vertices = self.state_vertices(int(self.goalCoordinates[0]), int(self.goalCoordinates[1]))
+            self.goals = {goal: 0.0 for goal in goal_vertices}
+        self.goalNode = min(self.goals, key=self.goals.get)
         self.k = 0.0
+        self.heuristic = self.select_heuristic()
+        self.epsilon = max(1.0, self.inflation)
+        self.closed = set()
+        self.incons = set()
+        self.successors.clear()
+        self.repainted = set()
         # All vertices have been already initialized with inf-value in vertex.py.
         # Also, the goal node's rsh value is already initialized with 0 in the interactive view
-        # Add now the inconsistent goal node into the priority queue.
-        key = self.goalNode.calculate_key(self.startNode, self.k, self.hIsZero, self.directNeighbors)
-        self.priorityQueue.insert(self.goalNode, key)
+        # Add now the inconsistent goal nodes into the priority queue.
+        for goal, offset in self.goals.items():
+            if not goal.isObstacle:
+                goal.rsh = offset
+                key = self.calculate_key(goal)
+                self.priorityQueue.insert(goal, key)
         print('Start- and goal-node:')
         self.startNode.print()
         self.goalNode.print()
 
     # Function implements the ComputeShortestPath function of the D*Lite algorithm
-    def compute_shortest_path(self):
+    # (basic or optimized variant) as a generator. It yields a PlanStep record
+    # (see planner_events.py) after every step, so callers decide when the
+    # next step is done: at once, after a timer or after a button click.
+    # The search stops early at the deadline (a time.monotonic() value) or after
+    # max_expansions steps. The priority queue stays intact and the next call
+    # resumes the search. converged is True when the search has converged.
+    def iter_shortest_path(self, deadline=None, max_expansions=None):
         print('\nComputing shortest path')
         self.plan_steps = 0  # counts loops of while-statement
-        while (self.priorityQueue.top_key() < self.startNode.calculate_key(self.startNode, self.k, self.hIsZero,
-                                                                           self.directNeighbors)) or \
-                (self.startNode.rsh != self.startNode.g):
+        self.converged = False
+        events = self.events
+        optimized = self.optimized
+        while not self.priorityQueue.empty() and \
+                ((self.priorityQueue.top_key() < self.calculate_key(self.startNode)) or
+                 (self.startNode.rsh != self.startNode.g)):
+            if max_expansions is not None and self.plan_steps >= max_expansions:
+                return
+            if deadline is not None and time.monotonic() >= deadline:
+                return
             k_old = self.priorityQueue.top_key()
             u = self.priorityQueue.pop()
-            if u not in self.obstacles:
+            if events.active and u not in self.obstacles:
                 self.update_vertex_color(u, 'green')
-            k = u.calculate_key(self.startNode, self.k, self.hIsZero, self.directNeighbors)
+            k = self.calculate_key(u)
             if k_old < k:
                 self.priorityQueue.insert(u, k)
-                self.update_vertex_color(u, 'orange')
+                if events.active:
+                    self.update_vertex_color(u, 'orange')
+                action = StepAction.Requeued
             elif u.g > u.rsh:
                 u.g = u.rsh
-                self.view.update_g(u.x, u.y)
-                for pred in self.neighbors(u):
-                    self.update_vertex(pred)
+                if events.active:
+                    events.g_changed(u)
+                if self.epsilon > 1:
+                    self.closed.add(u)
+                if optimized:
+                    for pred in self.predecessors(u):
+                        self.lower_rsh(pred, u)
+                else:
+                    for pred in self.predecessors(u):
+                        self.update_vertex(pred)
+                action = StepAction.Overconsistent
+            elif optimized:
+                u.g = float('inf')
+                if events.active:
+                    events.g_changed(u)
+                for pred in self.predecessors(u):
+                    self.raise_rsh(pred, u)
+                self.update_queue(u)
+                action = StepAction.Underconsistent
             else:
                 u.g = float('inf')
-                self.view.update_g(u.x, u.y)
-                pred_plus_u = self.neighbors(u)
+                if events.active:
+                    events.g_changed(u)
+                pred_plus_u = self.predecessors(u)
                 pred_plus_u.append(u)
                 for i in pred_plus_u:
                     self.update_vertex(i)
+                action = StepAction.Underconsistent
             self.plan_steps += 1
-            # Interactive behavior:
-            if self.stepDelay > 0:
-                time.sleep(self.stepDelay)
-                self.view.page.update()
-            elif self.stepDelay < 0:
-                self.view.show('Press ok for next step')
+            if metrics.enabled:
+                metrics.count('expansions')
+            yield PlanStep(self.plan_steps, u.x, u.y, action)
+        self.converged = True
+
+    # Run iter_shortest_path without interruption (or until the budget is
+    # exhausted). Return True if the search has converged.
+    def compute_shortest_path(self, deadline=None, max_expansions=None):
+        if metrics.enabled:
+            metrics.count('searches')
+        with metrics.timer('compute_shortest_path'):
+            deque(self.iter_shortest_path(deadline, max_expansions), maxlen=0)
+        return self.converged
 
     # Main planning function of the D* Lite algorithm
-    def main_planning(self, planning_mode='Run to result'):
+    # 'Slow step' and 'Manual step' wait between the steps of the algorithm.
+    # This blocks the caller; an interactive view should rather use
+    # start_planning, step through iter_shortest_path and call finish_planning.
+    # With a time_budget (seconds) or max_expansions the planning may stop
+    # before a plan exists (converged is False). Call continue_planning then.
+    def main_planning(self, planning_mode='Run to result', time_budget=None, max_expansions=None):
         print('\nStart planning using mode:', planning_mode)
         if planning_mode == 'Slow step':
             self.stepDelay = 2  # 2s delay
@@ -143,36 +282,162 @@ class DStarLitePlanner(object):
             self.stepDelay = -1  # User presses button to go forward
         else:
             self.stepDelay = 0  # 0 ms delay
-        self.planReady = False
         start_time = time.time()
-        # Start the planning algorithm
-        self.startNode = self.vertexGrid[int(self.startCoordinates[0])][int(self.startCoordinates[1])]
+        self.start_planning()
+        if self.stepDelay == 0:
+            self.continue_planning(time_budget, max_expansions)
+        else:
+            for _ in self.iter_shortest_path():
+                # Interactive behavior:
+                if self.stepDelay > 0:
+                    time.sleep(self.stepDelay)
+                    self.events.refresh()
+                else:
+                    self.events.confirm_step('Press ok for next step')
+            self.finish_planning()
+        print('Time to plan:', time.time() - start_time, 's\n')
+
+    # Start the planning algorithm: initialize the search from start to goal
+    def start_planning(self):
+        self.planReady = False
+        self.startNode = self.start_vertex()
         self.lastNode = self.startNode
         self.initialize_planning()
-        self.compute_shortest_path()
-        print('End ComputeShortestPath')
-        print('Time to plan:', time.time() - start_time, 's\n')
+        if self.epsilon > 1:
+            print('Anytime D*: first plan with inflation', self.epsilon)
+        self.actualPath = []
+
+    # Forget the last search, so that the planner can plan again for another
+    # start and goal on the same grid. Only the vertices touched by the search
+    # are reset (those with a successor pointer, queued vertices and the goal).
+    def reset_search(self):
+        touched = list(self.successors)
+        touched.extend(self.priorityQueue)
+        touched.extend(self.goals)
+        if self.goalNode is not None:
+            touched.append(self.goalNode)
+        for vertex in touched:
+            vertex.g = float('inf')
+            vertex.rsh = 0 if vertex.isGoal else float('inf')
+        self.priorityQueue.clear()
+        self.successors.clear()
+        self.closed = set()
+        self.incons = set()
+        self.actualPath = []
+        self.repainted = set()
+        self.planReady = False
+
+    # Continue a planning (or re-planning) which has run out of budget.
+    # Return True if the search has converged. Then planReady tells if a
+    # plan exists and the path is shown.
+    def continue_planning(self, time_budget=None, max_expansions=None):
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+        if not self.compute_shortest_path(deadline, max_expansions):
+            print('Planning budget exhausted after', self.plan_steps, 'steps')
+            return False
+        self.finish_planning()
+        return True
 
+    # The search has converged. Remember and show the path, if any.
+    def finish_planning(self):
+        print('End ComputeShortestPath')
         # A path exists if g(startNode) != float('inf')
         # Mark the path on screen in light blue
         self.planReady = self.startNode.g != float('inf')
-        self.actualPath = []
         self.show_and_remember_path()
 
     # Utilities for planning #########################################################
 
-    # Calculate the cost of moving to a neighbor vertex
+    # The heuristic used for planning: the custom one or the built-in one
+    def select_heuristic(self):
+        return self.customHeuristic or default_heuristic(self.hIsZero, self.directNeighbors, self.diagonalCost)
+
+    # The search works on one vertex per cell. Subclasses searching over
+    # more states per cell (see heading_lattice.py) override the
+    # following functions.
+
+    # Return an empty map of the search (see create_vertex_map)
+    def vertex_map(self, values):
+        return create_vertex_map(self.vertexGrid, values)
+
+    # Return the vertices of the search at cell (x, y)
+    def state_vertices(self, x, y):
+        return [self.vertexGrid[x][y]]
+
+    # Return the vertex of the search at the start coordinates
+    def start_vertex(self):
+        return self.vertexGrid[int(self.startCoordinates[0])][int(self.startCoordinates[1])]
+
+    # Return the vertex of the search for the robot at the cell of
+    # vertex with the given orientation
+    def robot_vertex(self, vertex, orientation):
+        return vertex
+
+    # Return the g- and rsh-value shown for cell (x, y)
+    def cell_values(self, x, y):
+        vertex = self.vertexGrid[x][y]
+        return vertex.g, vertex.rsh
+
+    # Return the vertices with a move to vertex. On the grid
+    # every move can be reversed, so these are its neighbors.
+    def predecessors(self, vertex):
+        return self.neighbors(vertex)
+
+    # CalculateKey function of the D*Lite algorithm with the heuristic of
+    # the planner. Same result as Vertex.calculate_key, but without selecting
+    # the heuristic on every call. The key is kept by the priority queue only.
+    # Anytime D* inflates the heuristic of overconsistent vertices by epsilon.
+    def calculate_key(self, vertex):
+        g = vertex.g
+        rsh = vertex.rsh
+        if g > rsh and self.epsilon > 1:
+            key = (round(rsh + self.epsilon * self.heuristic(vertex, self.startNode) + self.k, 9), round(rsh, 9))
+        else:
+            min1 = g if g < rsh else rsh
+            key = (round(min1 + self.heuristic(vertex, self.startNode) + self.k, 9), round(min1, 9))
+        return key
+
+    # Anytime D*: Return True if the plan can still be improved
+    def can_improve_plan(self):
+        return self.planReady and self.epsilon > 1
+
+    # Anytime D*: Lower the inflation factor and improve the plan. Only
+    # vertices which became inconsistent after their expansion are searched
+    # again. Return if a plan exists.
+    def improve_plan(self):
+        self.epsilon = max(1.0, self.epsilon - self.inflationStep)
+        print('Anytime D*: improving plan with inflation', self.epsilon)
+        self.k = self.k + self.heuristic(self.lastNode, self.startNode)
+        self.lastNode = self.startNode
+        self.reorder_open_list()
+        self.compute_shortest_path()
+        self.planReady = self.startNode.g != float('inf')
+        return self.planReady
+
+    # Anytime D*: Move the inconsistent vertices of the closed list back into
+    # the priority queue, recalculate all keys and clear the closed list.
+    def reorder_open_list(self):
+        for vertex in self.incons:
+            if vertex.g != vertex.rsh and not vertex.isObstacle:
+                self.priorityQueue.insert(vertex, self.calculate_key(vertex))
+        self.incons = set()
+        self.closed = set()
+        self.priorityQueue.rebuild(self.calculate_key)
+
+    # Calculate the cost of moving to a neighbor vertex.
+    # The move length is weighted with the mean cost factor of both vertices.
     def neighbor_cost(self, from_vertex, to_vertex):
         if to_vertex.isObstacle or from_vertex.isObstacle:
             return float('inf')  # Do not move in or from an obstacle
-        elif ((abs(from_vertex.x - to_vertex.x) == 0) and
-              (abs(from_vertex.y - to_vertex.y) == 1)) or\
-                ((abs(from_vertex.x - to_vertex.x) == 1) and
-                 (abs(from_vertex.y - to_vertex.y) == 0)):
-            return 1  # straight move
-        elif (abs(from_vertex.x - to_vertex.x) == 1 and
-              abs(from_vertex.y - to_vertex.y) == 1):
-            return 1.4  # diagonal move
+        dx = abs(from_vertex.x - to_vertex.x)
+        dy = abs(from_vertex.y - to_vertex.y)
+        if dx + dy == 1:
+            return (from_vertex.cost + to_vertex.cost) / 2  # straight move
+        elif dx == 1 and dy == 1:
+            if not self.cornerCutting and (self.vertexGrid[from_vertex.x][to_vertex.y].isObstacle or
+                                           self.vertexGrid[to_vertex.x][from_vertex.y].isObstacle):
+                return float('inf')  # Do not cut the corner of an obstacle
+            return self.diagonalCost * (from_vertex.cost + to_vertex.cost) / 2  # diagonal move
         else:
             raise Exception('NeighborCost: Vertex is not a neighbor')
 
@@ -180,96 +445,350 @@ class DStarLitePlanner(object):
     # maximum count (4 or 8). Return neighbor vertices.
     def neighbors(self, vertex):
         result = []
+        vx = vertex.x
+        vy = vertex.y
         if not self.directNeighbors:  # 8 neighbors
-            for x in range(vertex.x - 1, vertex.x + 2):
-                for y in range(vertex.y - 1, vertex.y + 2):
-                    if x in range(self.width) and \
-                            y in range(self.height) and \
-                            not (x == vertex.x and y == vertex.y):
-                        result.append(self.vertexGrid[x][y])
+            for x in range(max(vx - 1, 0), min(vx + 2, self.width)):
+                column = self.vertexGrid[x]
+                for y in range(max(vy - 1, 0), min(vy + 2, self.height)):
+                    if not (x == vx and y == vy):
+                        result.append(column[y])
         else:  # 4 neighbors
-            if vertex.x - 1 >= 0:
-                result.append(self.vertexGrid[vertex.x - 1][vertex.y])
-            if vertex.x + 1 < self.width:
-                result.append(self.vertexGrid[vertex.x + 1][vertex.y])
-            if vertex.y - 1 >= 0:
-                result.append(self.vertexGrid[vertex.x][vertex.y - 1])
-            if vertex.y + 1 < self.height:
-                result.append(self.vertexGrid[vertex.x][vertex.y + 1])
+            if vx - 1 >= 0:
+                result.append(self.vertexGrid[vx - 1][vy])
+            if vx + 1 < self.width:
+                result.append(self.vertexGrid[vx + 1][vy])
+            column = self.vertexGrid[vx]
+            if vy - 1 >= 0:
+                result.append(column[vy - 1])
+            if vy + 1 < self.height:
+                result.append(column[vy + 1])
         return result
 
-    # Calculate the neighbor with the smallest sum of g and rsh-value.
-    # Used after planning for finding the cheapest path.
-    def calc_cheapest_neighbor(self, vertex):
-        neighbors = self.neighbors(vertex)
-        cheapest = neighbors[0]
-        for i in range(1, len(neighbors)):
-            if (cheapest.g + cheapest.rsh) > (neighbors[i].g + neighbors[i].rsh):
-                cheapest = neighbors[i]
-        return cheapest
-
     # Function implements the UpdateVertex procedure of the D*Lite algorithm
     # Only calls for update on screen are added
     def update_vertex(self, vertex):
-        print('Update vertex', vertex.x, vertex.y)
-        if vertex != self.goalNode:
-            # Calculate new rsh(aVertex)
-            all_neighbors = self.neighbors(vertex)
-            values = []
-            for s in all_neighbors:
-                value = self.neighbor_cost(vertex, s) + s.g
-                values.append(value)
-            sorted_values = sorted(values)
-            vertex.rsh = sorted_values[0]
-            # Update rsh-value on screen
-            self.view.update_rsh(vertex.x, vertex.y)
-        if vertex in self.priorityQueue:
+        if metrics.enabled:
+            metrics.count('update_vertex_calls')
+        events = self.events
+        if events.active:
+            events.trace('Update vertex', vertex.x, vertex.y)
+        # Calculate new rsh(aVertex) and remember the best successor
+        self.calc_rsh(vertex)
+        # Update rsh-value on screen
+        if events.active:
+            events.rsh_changed(vertex)
+        self.update_queue(vertex)
+
+    # Set rsh(vertex) to the minimum of cost + g over all neighbors and
+    # remember the neighbor with this minimum as successor of vertex.
+    # A goal has the minimum of its offset and the neighbors; the path
+    # ends there (no successor) unless it is cheaper to go on to another goal.
+    def calc_rsh(self, vertex):
+        best = None
+        best_value = float('inf')
+        for s in self.neighbors(vertex):
+            value = self.neighbor_cost(vertex, s) + s.g
+            if best is None or value < best_value:
+                best = s
+                best_value = value
+        offset = self.goals.get(vertex)
+        if offset is not None and offset <= best_value and not vertex.isObstacle:
+            best = None
+            best_value = offset
+        vertex.rsh = best_value
+        self.successors[vertex] = best
+
+    # Insert, update or remove the vertex in the priority queue
+    # depending on its consistency.
+    def update_queue(self, vertex):
+        events = self.events
+        if vertex.g != vertex.rsh and not vertex.isObstacle and self.closed and vertex in self.closed:
+            # Anytime D*: expanded vertices are not searched again with this
+            # inflation. They wait in the incons list for the next improvement.
             self.priorityQueue.remove(vertex)
-            print('Removed', vertex.x, vertex.y)
-        if vertex.g != vertex.rsh and not vertex.isObstacle:  # obstacle could not pass
-            key = vertex.calculate_key(self.startNode, self.k, self.hIsZero, self.directNeighbors)
+            self.incons.add(vertex)
+        elif vertex.g != vertex.rsh and not vertex.isObstacle:  # obstacle could not pass
+            # Insert or update the key of an already queued vertex
+            key = self.calculate_key(vertex)
             self.priorityQueue.insert(vertex, key)
-            print(vertex.x, vertex.y, 'added to priorityQueue')
-            self.update_vertex_color(vertex, 'orange')
+            if events.active:
+                events.trace(vertex.x, vertex.y, 'added to priorityQueue')
+                self.update_vertex_color(vertex, 'orange')
+        elif vertex in self.priorityQueue:
+            self.priorityQueue.remove(vertex)
+            if events.active:
+                events.trace('Removed', vertex.x, vertex.y)
+
+    # Optimized D* Lite: g(successor) has been lowered. Only this successor
+    # can lower rsh(vertex), so no scan of all neighbors is needed.
+    def lower_rsh(self, vertex, successor):
+        value = self.neighbor_cost(vertex, successor) + successor.g
+        if value < vertex.rsh:
+            vertex.rsh = value
+            self.successors[vertex] = successor
+            if self.events.active:
+                self.events.rsh_changed(vertex)
+            self.update_queue(vertex)
+
+    # Optimized D* Lite: g(successor) has been raised. rsh(vertex) has to be
+    # recalculated only if successor was its best successor. The successor
+    # pointer tells this also when the sums of costs carry rounding errors.
+    def raise_rsh(self, vertex, successor):
+        if self.successors.get(vertex) != successor:
+            return
+        self.calc_rsh(vertex)
+        if self.events.active:
+            self.events.rsh_changed(vertex)
+        self.update_queue(vertex)
+
+    # Follow the successor pointers from node to a goal without successor.
+    # Return the list of vertices or None if no path exists.
+    def extract_path(self, node):
+        path = [node]
+        goals = self.goals
+        while node not in goals or self.successors.get(node) is not None:
+            node = self.successors.get(node)
+            if node is None or node.g == float('inf') or len(path) > len(self.successors) + 1:
+                return None  # No successor, dead end or cycle
+            path.append(node)
+        return path
 
     # Show the planned path on the view and remember the path
-    # for execution.
+    # for execution. After a re-planning the path from the robot
+    # position (lastNode) keeps its unchanged prefix. Only the changed
+    # suffix and path vertices colored by the search are repainted.
     def show_and_remember_path(self):
-        node = self.lastNode  # from here to goal
-        self.actualPath = []
-        while (node != self.goalNode) and self.planReady:
-            self.actualPath.append(node)
-            node = self.calc_cheapest_neighbor(node)
-            if node != self.goalNode and not node.isObstacle:
-                self.view.update_color(node, 'lightblue')
-            self.planReady = node.g != float('inf')
-        if self.planReady:
-            self.actualPath.append(self.goalNode)
-
-    def clear_old_path(self, start_step):
-        # Re-planning occurred. Remove old path#
-        i = start_step
-        node = self.actualPath[i]
-        while node != self.goalNode:
-            if node not in self.obstacles:
-                self.view.update_color(node, 'green')
-            i += 1
-            node = self.actualPath[i]
+        with metrics.timer('path_extraction'):
+            old_path = self.actualPath
+            if self.lastNode in old_path:
+                old_path = old_path[old_path.index(self.lastNode):]
+            else:
+                old_path = []
+            path = self.extract_path(self.lastNode) if self.planReady else None
+            self.planReady = path is not None
+            if path is None:
+                path = []
+            else:
+                self.goalNode = path[-1]  # The cheapest goal of a goal set
+            same = 0  # Length of the unchanged prefix
+            while same < len(old_path) and same < len(path) and old_path[same] == path[same]:
+                same += 1
+            old_suffix = old_path[same:]
+            new_suffix = path[same:]
+            new_vertices = set(new_suffix)
+            for node in old_suffix:
+                if node not in new_vertices and node != self.lastNode and node not in self.goals \
+                        and not node.isObstacle:
+                    self.events.color_changed(node, 'green')
+            old_vertices = set(old_suffix)
+            for node in path[1:-1]:
+                if node in self.repainted or (node in new_vertices and node not in old_vertices):
+                    self.events.color_changed(node, 'lightblue')
+            self.repainted = set()
+            self.actualPath = path
 
     def update_vertex_color(self, vertex, color):
-        if not vertex == self.startNode and not vertex == self.goalNode:
-            self.view.update_color(vertex, color)
+        if not vertex == self.startNode and vertex not in self.goals:
+            self.events.color_changed(vertex, color)
+            self.repainted.add(vertex)
 
     # New obstacle on planned path during plan execution has been found. 
     # Re-plan the path to goal
     # Return if a plan exists.
     def replanning(self, a_vertex):
-        self.k = self.k + self.lastNode.h(self.startNode, self.hIsZero, self.directNeighbors)
+        return self.replan_changed_vertices([a_vertex])
+
+    # Re-plan after the given vertices have changed. Every changed vertex
+    # and its neighbors are updated once, then the shortest path is
+    # computed a single time for all changes.
+    # Return if a plan exists.
+    def replan_changed_vertices(self, changed_vertices):
+        if metrics.enabled:
+            metrics.count('replans')
+        with metrics.timer('replan'):
+            self.k = self.k + self.heuristic(self.lastNode, self.startNode)
+            self.lastNode = self.startNode
+            affected = {}  # dict keeps the order and drops duplicates
+            for changed in changed_vertices:
+                for vertex in self.state_vertices(changed.x, changed.y):
+                    affected[vertex] = None
+                    for n in self.predecessors(vertex):
+                        affected[n] = None
+            for vertex in affected:
+                self.update_vertex(vertex)
+            if self.closed or self.incons:
+                # Anytime D*: search the changes with the actual inflation
+                self.reorder_open_list()
+            self.compute_shortest_path()
+            self.planReady = self.startNode.g != float('inf')
+        return self.planReady
+
+    # Apply a batch of map changes (see map_changes.py) to the grid.
+    # Return the list of changed vertices. A change is also returned if
+    # the view has already set the new state of the vertex, because the
+    # planner has not repaired its g- and rsh-values yet.
+    # Raise a ValueError before any change is applied if one of them is invalid.
+    def apply_map_changes(self, changes):
+        changes = list(changes)
+        for change in changes:
+            self.check_change(change)
+        changed = []
+        for change in changes:
+            vertex = self.vertexGrid[change.x][change.y]
+            if change.change_type == ChangeType.ObstacleAdded:
+                vertex.isObstacle = True
+                for state in self.state_vertices(change.x, change.y):
+                    state.g = float('inf')  # No path leads through an obstacle
+                self.obstacles.add(vertex)
+                self.update_vertex_color(vertex, 'red')
+            elif change.change_type == ChangeType.ObstacleRemoved:
+                vertex.isObstacle = False
+                self.obstacles.discard(vertex)
+                self.update_vertex_color(vertex, 'green')
+            elif change.change_type == ChangeType.CostChanged:
+                vertex.cost = change.cost
+            changed.append(vertex)
+        return changed
+
+    # Raise a ValueError if a map change is outside the grid or has an invalid cost
+    def check_change(self, change):
+        if not (0 <= change.x < self.width and 0 <= change.y < self.height):
+            raise ValueError(f'Map change outside the grid: {change.x}, {change.y}')
+        if change.change_type == ChangeType.CostChanged:
+            self.check_cost(change.cost)
+
+    # Raise a ValueError if cost is not a valid cost factor. Factors
+    # below 1 would make the heuristic overestimate the distance.
+    # The cost array of an array grid may take whole numbers only.
+    def check_cost(self, cost):
+        if not cost >= 1:
+            raise ValueError(f'Cost factor must be >= 1: {cost}')
+        if isinstance(self.vertexGrid, ArrayVertexGrid):
+            self.vertexGrid.check_cost(cost)
+
+    # Set the cost factor of a vertex before planning. Use
+    # replan_map_changes with ChangeType.CostChanged after planning.
+    def set_cell_cost(self, x, y, cost):
+        self.check_cost(cost)
+        self.vertexGrid[x][y].cost = cost
+
+    # Apply a batch of map changes and re-plan once for all of them.
+    # Return if a plan exists.
+    def replan_map_changes(self, changes):
+        changed = self.apply_map_changes(changes)
+        if changed:
+            self.replan_changed_vertices(changed)
+        return self.planReady
+
+    # Moving target: change the goal after planning and reuse the search like
+    # Moving Target D* Lite (Sun, Yeoh, Koenig 2010). The search tree of this
+    # planner is rooted at the goal. Vertices whose path to the old goal runs
+    # through the new goal keep their values, lowered by g(new goal). All other
+    # vertices are reset and the border of the kept subtree is searched again.
+    # A goal set is replaced by the single new goal.
+    # Return if a plan exists. Raise a ValueError if the goal cannot be reached.
+    def change_goal(self, x, y):
+        self.check_goal(x, y)
+        new_goals = self.state_vertices(x, y)
+        if set(self.goals) == set(new_goals):
+            return self.planReady
+        if metrics.enabled:
+            metrics.count('goal_changes')
+        events = self.events
+        shifts = {goal: goal.g for goal in new_goals if goal.g != float('inf')}
+        subtree = self.search_subtree(list(shifts))  # vertex -> its new goal
+        shifts.update((goal, 0) for goal in new_goals if goal not in shifts)
+        subtree.update((goal, goal) for goal in new_goals)
+        touched = set(self.successors)
+        touched.update(self.priorityQueue)
+        touched.update(self.goals)
+        touched.add(self.goalNode)
+        self.priorityQueue.clear()
+        for vertex in touched:
+            if vertex not in subtree:
+                vertex.g = float('inf')
+                vertex.rsh = float('inf')
+                self.successors.pop(vertex, None)
+                if events.active:
+                    events.g_changed(vertex)
+                    events.rsh_changed(vertex)
+        for vertex, goal in subtree.items():
+            vertex.g -= shifts[goal]  # inf stays inf
+            vertex.rsh -= shifts[goal]
+        self.set_goal_coordinates(x, y)
+        self.goalSet = {}
+        self.goals = {goal: 0.0 for goal in new_goals}
+        self.goalNode = new_goals[0]
+        for goal in new_goals:
+            goal.rsh = 0.0
+            self.successors.pop(goal, None)
+        # All keys are calculated again, so k starts again with 0
+        self.k = 0.0
         self.lastNode = self.startNode
-        self.update_vertex(a_vertex)
-        neighbors = self.neighbors(a_vertex)
-        for n in neighbors:
-            self.update_vertex(n)
+        self.closed = set()
+        self.incons = set()
+        for vertex in subtree:
+            self.update_queue(vertex)
+        border = {n for vertex in subtree for n in self.predecessors(vertex) if n not in subtree}
+        for vertex in border:
+            self.update_vertex(vertex)
         self.compute_shortest_path()
+        print('Goal changed to', x, y, 'with', self.plan_steps, 'steps,', len(subtree), 'vertices reused')
         self.planReady = self.startNode.g != float('inf')
         return self.planReady
+
+    # Return the vertices whose successor pointers lead to one of the roots
+    # as dict vertex -> first root on the way (roots included)
+    def search_subtree(self, roots):
+        root_of = {root: root for root in roots}
+        for vertex in self.successors:
+            chain = []
+            node = vertex
+            while node is not None and node not in root_of:
+                root_of[node] = None  # Visited, stops at a cycle
+                chain.append(node)
+                node = self.successors.get(node)
+            root = None if node is None else root_of[node]
+            for node in chain:
+                root_of[node] = root
+        return {vertex: root for vertex, root in root_of.items() if root is not None}
+
+    # Raise a ValueError if the cell (x, y) is outside the grid or an obstacle
+    def check_goal(self, x, y):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise ValueError(f'Goal outside the grid: {x}, {y}')
+        if self.vertexGrid[x][y].isObstacle:
+            raise ValueError(f'Goal is an obstacle: {x}, {y}')
+
+    # Request a goal change during plan execution. The executor
+    # calls change_pending_goal before its next step.
+    # Raise a ValueError if the goal cannot be reached.
+    def request_goal_change(self, x, y):
+        self.check_goal(x, y)
+        self.pendingGoal = (x, y)
+
+    # Change the goal to the requested one. Return if a plan exists.
+    # A goal that has become an obstacle meanwhile cannot be reached,
+    # so the execution ends without a plan.
+    def change_pending_goal(self):
+        x, y = self.pendingGoal
+        self.pendingGoal = None
+        try:
+            return self.change_goal(x, y)
+        except ValueError as error:
+            print('  Goal not reachable:', error)
+            return False
+
+    # Queue a map change. Changes arriving quickly one after another are
+    # coalesced and applied together by replan_pending_changes.
+    def queue_map_change(self, change):
+        self.mapChanges.add(change)
+
+    # Return True if queued map changes are ready for re-planning
+    def map_changes_due(self):
+        return self.mapChanges.due()
+
+    # Re-plan with all queued map changes. Return if a plan exists.
+    def replan_pending_changes(self):
+        return self.replan_map_changes(self.mapChanges.take())
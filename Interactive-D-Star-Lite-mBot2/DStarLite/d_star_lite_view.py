@@ -12,10 +12,16 @@
 ###########################################################
 
 import enum
+import threading
 from math import pi
 from queue import Queue
 import flet as ft
+from canvas_grid import CanvasGrid, HEATMAP_MODES
 from d_star_lite_planner import *
+from heading_lattice import HeadingLatticePlanner
+from map_changes import ChangeType, MapChange
+from planner_metrics import metrics
+from ui_batcher import UpdateBatcher
 
 
 # Possible states of the application
@@ -59,6 +65,10 @@ class DStarLiteView:
         # Default planning grid size
         self.gridHeight = 4
         self.gridWidth = 5
+        self.canvasThreshold = 144  # Grids with more cells are drawn on a canvas
+        self.canvasGrid = None  # CanvasGrid of large grids, else None
+        self.canvasSelected = None  # Start or goal cell (x, y) to be moved on the canvas
+        self.heatmap = 'Off'
 
         self.grid_width = ft.Ref[ft.Dropdown]()
         self.grid_height = ft.Ref[ft.Dropdown]()
@@ -72,6 +82,11 @@ class DStarLiteView:
         self.grid_cell_height = self.canvas_height / self.gridHeight
 
         self.confirm = Queue(1)
+        # The planner and the cells are changed by event handlers, the step timer
+        # and the frame timer of uiBatcher. They hold the lock one at a time.
+        self.lock = threading.RLock()
+        # Cell changes of the planner are sent in frames of max. 30 per second
+        self.uiBatcher = UpdateBatcher(self.send_updates, max_rate=30, lock=self.lock)
 
         def update_grid_width(e):
             self.gridWidth = int(e.control.value)
@@ -84,11 +99,24 @@ class DStarLiteView:
         def update_robot_start_orientation(e):
             self.robotStartOrientation = e.control.value
 
+        def update_heatmap(e):
+            self.heatmap = e.control.value
+            if self.canvasGrid is not None:
+                self.canvasGrid.set_heatmap(self.heatmap)
+
         self.planningMode = 'Fast'
         self.directNeighbors = True
         self.h0Check = False
+        self.optimizedCheck = False
+        self.headingCheck = False
+        self.inflationFactor = '1.0'
+        self.planSteps = None  # Generator of the planning steps in step modes
+        self.slowStepDelay = 2  # seconds between two steps in 'Slow step' mode
         self.planning_mode = ft.Ref[ft.Dropdown]()
         self.h0_check = ft.Ref[ft.Checkbox]()
+        self.optimized_check = ft.Ref[ft.Checkbox]()
+        self.heading_check = ft.Ref[ft.Checkbox]()
+        self.inflation_factor = ft.Ref[ft.Dropdown]()
         self.direct_neighbors = ft.Ref[ft.Checkbox]()
         self.planning_hint = ft.Ref[ft.Text]()
         self.planning_tab = ft.Ref[ft.Tab]()
@@ -98,6 +126,9 @@ class DStarLiteView:
         self.execution_mode = ft.Ref[ft.Dropdown]()
         self.execution_tab = ft.Ref[ft.Tab]()
 
+        self.metricsInterval = 1  # seconds between two refreshes of the metrics panel
+        self.metrics_text = ft.Ref[ft.Text]()
+
         tabs = ft.Tabs(
             selected_index=0,
             animation_duration=100,
@@ -113,7 +144,7 @@ class DStarLiteView:
                                     ref=self.grid_width,
                                     label='Grid width',
                                     hint_text='length from east to west',
-                                    options=[ft.dropdown.Option(x) for x in range(4, 12)],
+                                    options=[ft.dropdown.Option(x) for x in self.grid_sizes()],
                                     value=str(self.gridWidth),
                                     alignment=ft.alignment.center,
                                     autofocus=True,
@@ -124,13 +155,21 @@ class DStarLiteView:
                                     ref=self.grid_height,
                                     label='Grid height',
                                     hint_text='length from north to south',
-                                    options=[ft.dropdown.Option(x) for x in range(4, 12)],
+                                    options=[ft.dropdown.Option(x) for x in self.grid_sizes()],
                                     value=str(self.gridHeight),
                                     alignment=ft.alignment.center,
                                     autofocus=True,
                                     col={'xs': 3, 'sm': 2},
                                     on_change=update_grad_height,
                                 ),
+                                ft.Dropdown(
+                                    label='Heatmap',
+                                    hint_text='color large grids by g or rsh',
+                                    options=[ft.dropdown.Option(x) for x in HEATMAP_MODES],
+                                    value=self.heatmap,
+                                    col={'xs': 3, 'sm': 2},
+                                    on_change=update_heatmap,
+                                ),
                                 ft.FilledButton(
                                     'Recreate grid',
                                     col={'xs': 6, 'sm': 4},
@@ -144,7 +183,8 @@ class DStarLiteView:
                             ft.Text('Design hint:'),
                             ft.Text(
                                 'Click empty(Green) cell to set/clear obstacle(Red). '
-                                'Drag Start(Purple)/Goal(Black)/Obstacle(red).',
+                                'Drag Start(Purple)/Goal(Black)/Obstacle(red). '
+                                'Large grids: click Start/Goal, then the new cell.',
                             ),
                         ]),
                     ]),
@@ -179,11 +219,37 @@ class DStarLiteView:
                                 value=self.directNeighbors,
                                 col={'xs': 7, 'sm': 3.7, 'md': 3.5},
                             ),
+                            ft.Checkbox(
+                                ref=self.optimized_check,
+                                label='Optimized D*Lite',
+                                value=self.optimizedCheck,
+                                col={'xs': 5, 'sm': 3, 'md': 2},
+                            ),
+                            ft.Checkbox(
+                                ref=self.heading_check,
+                                label='Min. driving time (headings)',
+                                tooltip='Plan over cells and robot headings, turns cost time. '
+                                        'Uses the robot start orientation of the Execution tab.',
+                                value=self.headingCheck,
+                                col={'xs': 7, 'sm': 4, 'md': 3},
+                            ),
+                            ft.Dropdown(
+                                ref=self.inflation_factor,
+                                label='Inflation (Anytime D*)',
+                                options=[ft.dropdown.Option(x) for x in ['1.0', '1.5', '2.0', '3.0']],
+                                value=self.inflationFactor,
+                                col={'xs': 4, 'sm': 2.5, 'md': 2},
+                            ),
                             ft.FilledButton(
                                 'Start planning',
                                 col={'xs': 5, 'sm': 3, 'md': 2.5},
                                 on_click=self.btn_plan_clicked,
-                            )
+                            ),
+                            ft.OutlinedButton(
+                                'Next step',
+                                col={'xs': 4, 'sm': 2.5, 'md': 2},
+                                on_click=self.btn_next_step_clicked,
+                            ),
                         ]),
                         ft.Row([
                             ft.Text('Planning hint:'),
@@ -207,7 +273,7 @@ class DStarLiteView:
                             ft.Dropdown(
                                 ref=self.execution_mode,
                                 hint_text='Simulation or real control',
-                                options=[ft.dropdown.Option(x) for x in ['Screen Simulation', 'Cloud Control']],
+                                options=[ft.dropdown.Option(x) for x in ['Screen Simulation', 'Cloud Control', 'Cloud Segments']],
                                 value=self.executionMode,
                                 autofocus=True,
                                 col={'xs': 5.5, 'sm': 5, 'md': 3},
@@ -239,6 +305,26 @@ class DStarLiteView:
                     ]),
                     ref=self.execution_tab,
                 ),
+                # tab control: Metrics Tab
+                ft.Tab(
+                    'Metrics',
+                    ft.Column([
+                        ft.ResponsiveRow([
+                            ft.Checkbox(
+                                label='Enable metrics',
+                                value=metrics.enabled,
+                                col={'xs': 6, 'sm': 3, 'md': 2},
+                                on_change=self.metrics_enabled_changed,
+                            ),
+                            ft.FilledButton(
+                                'Reset',
+                                col={'xs': 4, 'sm': 2, 'md': 1.5},
+                                on_click=self.btn_metrics_reset_clicked,
+                            ),
+                        ]),
+                        ft.Text('-', ref=self.metrics_text, size=10, selectable=True),
+                    ], scroll=ft.ScrollMode.AUTO),
+                ),
             ],
             height=170,
         )
@@ -329,17 +415,16 @@ class DStarLiteView:
         def build(self):
             return self.content
 
+        # The following changes are sent with the next page update
+
         def update_rsh(self, value):
             self.rsh.value = f'rsh:{value}'
-            self.update()
 
         def update_g(self, value):
             self.g.value = f'g:{value}'
-            self.update()
 
         def update_color(self, color):
             self.content.bgcolor = color
-            self.update()
 
         def update_size(self, width, height):
             self.content.width = width
@@ -387,11 +472,11 @@ class DStarLiteView:
             return self.container
 
         def update_rsh(self):
-            value = round(self.view.planner.vertexGrid[self.x][self.y].rsh, 2)
+            value = round(self.view.planner.cell_values(self.x, self.y)[1], 2)
             self.content.update_rsh(value)
 
         def update_g(self):
-            value = round(self.view.planner.vertexGrid[self.x][self.y].g, 2)
+            value = round(self.view.planner.cell_values(self.x, self.y)[0], 2)
             self.content.update_g(value)
 
         def update_color(self, color):
@@ -438,8 +523,13 @@ class DStarLiteView:
                     self.change_type(CellType.Obstacle)
                 case CellType.Obstacle:
                     if self.view.appState == AppState.inDesign:
-                        # Obstacles can only be removed in Design
                         self.change_type(CellType.Empty)
+                    elif self.view.appState == AppState.inExecution:
+                        # Blockage cleared: the executor re-plans with the
+                        # queued change before its next step
+                        self.change_type(CellType.Empty)
+                        self.view.planner.queue_map_change(
+                            MapChange(self.x, self.y, ChangeType.ObstacleRemoved))
 
         def drag_accept(self, e):
             if self.view.appState != AppState.inDesign:
@@ -486,6 +576,9 @@ class DStarLiteView:
         self.set_default_start_goal()
         self.h0_check.current.disabled = False
         self.direct_neighbors.current.disabled = False
+        self.optimized_check.current.disabled = False
+        self.heading_check.current.disabled = False
+        self.inflation_factor.current.disabled = False
         self.appState = AppState.inDesign
         self.page.update()
 
@@ -501,22 +594,32 @@ class DStarLiteView:
         if self.planner.are_start_and_goal_set():
             self.planner.hIsZero = self.h0_check.current.value
             self.planner.directNeighbors = self.direct_neighbors.current.value
+            self.planner.optimized = self.optimized_check.current.value
+            self.planner.inflation = float(self.inflation_factor.current.value)
+            if self.heading_check.current.value and not isinstance(self.planner, HeadingLatticePlanner):
+                # Plan over (x, y, heading) on the same grid until the grid is reset
+                self.planner = HeadingLatticePlanner.from_planner(self.planner,
+                                                                  start_heading=self.robotStartOrientation)
+                if self.canvasGrid is not None:
+                    self.canvasGrid.planner = self.planner
+                self.heading_check.current.disabled = True
             self.show_planning_hint('Planning in progress.......')
             self.appState = AppState.inPlanning
-            print('planning mode:', self.planning_mode.current.value)
-            self.planner.main_planning(self.planning_mode.current.value)
-            if self.planner.planReady:
-                self.appState = AppState.planPresent
-                self.h0_check.current.disabled = True
-                self.direct_neighbors.current.disabled = True
-                self.show_planning_hint(f'Planning successful within {self.planner.plan_steps} steps')
-                self.show('Hint', 'Plan is ready')
+            planning_mode = self.planning_mode.current.value
+            print('planning mode:', planning_mode)
+            if planning_mode == 'Fast':
+                self.planner.main_planning(planning_mode)
+                self.planning_done()
+                return
+            # Step modes: the steps are driven by a timer or the 'Next step'
+            # button, so this event handler returns at once.
+            self.planner.start_planning()
+            self.planSteps = self.planner.iter_shortest_path()
+            if planning_mode == 'Slow step':
+                self.schedule_plan_step()
             else:
-                self.appState = AppState.inDesign
-                self.show_planning_hint('Planning unsuccessful !!!')
-                self.show('Hint', 'No plan exists')
-                self.show('Hint', 'Recreating grid')
-
+                self.show_planning_hint('Press "Next step" for the next planning step')
+            return
         else:
             self.show('Hint', 'Start- and/or Goal vertex is not defined')
             self.appState = AppState.inDesign
@@ -524,6 +627,14 @@ class DStarLiteView:
         self.execution_tab.current.content.disabled = False
         self.update()
 
+    # Button 'Next step' has been clicked. Do one step in 'Manual step' mode
+    def btn_next_step_clicked(self, _):
+        if self.planSteps is None or self.planning_mode.current.value != 'Manual step':
+            return
+        step = self.next_plan_step()
+        if step is not None:
+            self.show_planning_hint(f'Step {step.step}: vertex ({step.x}, {step.y}) {step.action.name}')
+
     # Button 'Execute' has been clicked
     def btn_exec_clicked(self, _):
         # Check business rules
@@ -546,6 +657,88 @@ class DStarLiteView:
             self.planning_tab.current.content.disabled = False
             self.update()
 
+    # Functions for planning in step modes ###############################
+
+    # Do the next planning step and show its changes. Finish the planning
+    # after the last step. Return the PlanStep or None if planning is done.
+    def next_plan_step(self):
+        with self.lock:
+            if self.planSteps is None:
+                return None  # Finished by the other step mode
+            step = next(self.planSteps, None)
+            if step is None:
+                self.planSteps = None
+                self.planner.finish_planning()
+                self.planning_done()
+            else:
+                self.update()
+            return step
+
+    # 'Slow step' mode: do the next planning step after a delay
+    def schedule_plan_step(self):
+        timer = threading.Timer(self.slowStepDelay, self.slow_plan_step)
+        timer.daemon = True
+        timer.start()
+
+    def slow_plan_step(self):
+        if self.next_plan_step() is not None:
+            self.schedule_plan_step()
+
+    # Show the result of the planning and unlock the tabs
+    def planning_done(self):
+        if self.planner.planReady:
+            self.appState = AppState.planPresent
+            self.h0_check.current.disabled = True
+            self.direct_neighbors.current.disabled = True
+            self.optimized_check.current.disabled = True
+            self.heading_check.current.disabled = True
+            self.inflation_factor.current.disabled = True
+            self.show_planning_hint(f'Planning successful within {self.planner.plan_steps} steps')
+            self.show('Hint', 'Plan is ready')
+        else:
+            self.appState = AppState.inDesign
+            self.show_planning_hint('Planning unsuccessful !!!')
+            self.show('Hint', 'No plan exists')
+            self.show('Hint', 'Recreating grid')
+        self.design_tab.current.content.disabled = False
+        self.execution_tab.current.content.disabled = False
+        self.update()
+
+    # Functions for the metrics panel ####################################
+
+    # Checkbox 'Enable metrics' has been changed
+    def metrics_enabled_changed(self, e):
+        metrics.enable(e.control.value)
+        if metrics.enabled:
+            self.schedule_metrics_refresh()
+        self.show_metrics()
+
+    # Button 'Reset' of the metrics panel has been clicked
+    def btn_metrics_reset_clicked(self, _):
+        metrics.reset()
+        self.show_metrics()
+
+    # Refresh the live values while metrics are enabled
+    def schedule_metrics_refresh(self):
+        timer = threading.Timer(self.metricsInterval, self.refresh_metrics)
+        timer.daemon = True
+        timer.start()
+
+    def refresh_metrics(self):
+        if metrics.enabled:
+            with self.lock:
+                self.show_metrics()
+            self.schedule_metrics_refresh()
+
+    # Show counters and timers of the metrics snapshot
+    def show_metrics(self):
+        snapshot = metrics.snapshot()
+        counters = '   '.join(f'{name}: {value}' for name, value in snapshot['counters'].items())
+        timers = '   '.join(f'{name}: {t["count"]}x avg {1000 * t["sum"] / t["count"]:.1f} ms '
+                           f'max {1000 * t["max"]:.1f} ms' for name, t in snapshot['timers'].items())
+        self.metrics_text.current.value = '\n'.join(text for text in (counters, timers) if text) or '-'
+        self.metrics_text.current.update()
+
     def show(self, title, message, warning=False):
         self.dialog_title = title
         self.dialog_icon.current.color = ft.colors.YELLOW if warning else ft.colors.WHITE
@@ -558,8 +751,78 @@ class DStarLiteView:
         self.planning_hint.current.value = message
         self.planning_hint.current.update()
 
+    # Functions for large grids drawn on a canvas #########################
+
+    # A cell of the CanvasGrid has been clicked. Same rules as Cell.on_click,
+    # start and goal are moved by clicking them and then the new cell.
+    def canvas_cell_tapped(self, x, y):
+        if self.appState == AppState.inPlanning:
+            self.show('Hint', 'Action not possible in this state of planning. Recreate grid.')
+            return
+        cell_type = self.canvas_cell_type(x, y)
+        if self.canvasSelected is not None:
+            if self.appState == AppState.inDesign and cell_type == CellType.Empty:
+                src_x, src_y = self.canvasSelected
+                moved_type = self.canvas_cell_type(src_x, src_y)
+                self.set_canvas_cell(src_x, src_y, CellType.Empty)
+                self.set_canvas_cell(x, y, moved_type)
+            self.canvasSelected = None
+            return
+        match cell_type:
+            case CellType.Start | CellType.Goal:
+                if self.appState == AppState.inDesign:
+                    self.canvasSelected = (x, y)
+            case CellType.Empty:
+                self.set_canvas_cell(x, y, CellType.Obstacle)
+            case CellType.Obstacle:
+                if self.appState == AppState.inDesign:
+                    self.set_canvas_cell(x, y, CellType.Empty)
+                elif self.appState == AppState.inExecution:
+                    # Blockage cleared: the executor re-plans with the
+                    # queued change before its next step
+                    self.set_canvas_cell(x, y, CellType.Empty)
+                    self.planner.queue_map_change(MapChange(x, y, ChangeType.ObstacleRemoved))
+
+    # Return the CellType of a canvas cell from the planner state
+    def canvas_cell_type(self, x, y):
+        if self.planner.get_start_coordinates() == [x, y]:
+            return CellType.Start
+        elif self.planner.get_goal_coordinates() == [x, y]:
+            return CellType.Goal
+        elif self.planner.vertexGrid[x][y].isObstacle:
+            return CellType.Obstacle
+        return CellType.Empty
+
+    # Change the type of a canvas cell like Cell.change_type
+    def set_canvas_cell(self, x, y, cell_type):
+        node = self.planner.vertexGrid[x][y]
+        match cell_type:
+            case CellType.Empty:
+                if node.isObstacle:
+                    node.isObstacle = False
+                    self.planner.obstacles.remove(node)
+                color = ft.colors.GREEN
+            case CellType.Start:
+                self.planner.set_start_coordinates(x, y)
+                color = ft.colors.PURPLE
+            case CellType.Goal:
+                self.planner.set_goal_coordinates(x, y)
+                color = ft.colors.BLACK
+            case CellType.Obstacle:
+                if not node.isObstacle:
+                    node.isObstacle = True
+                    self.planner.obstacles.add(node)
+                color = ft.colors.RED
+        self.canvasGrid.update_color(x, y, color)
+        self.canvasGrid.flush()
+
     # Functions ############################################################
 
+    # Sizes offered for the grid width and height
+    @staticmethod
+    def grid_sizes():
+        return list(range(4, 12)) + [16, 25, 50, 100, 200, 300]
+
     # Create a new planner and draw the grid
     def create_grid(self):
         # Create a planner and initialize it
@@ -568,7 +831,14 @@ class DStarLiteView:
                                         grid_width=self.gridWidth,
                                         grid_height=self.gridHeight,
                                         h_is_zero=self.h0_check.current.value,
-                                        direct_neighbors=self.direct_neighbors.current.value)
+                                        direct_neighbors=self.direct_neighbors.current.value,
+                                        optimized=self.optimized_check.current.value)
+        self.canvasSelected = None
+        if self.gridWidth * self.gridHeight > self.canvasThreshold:
+            self.canvasGrid = CanvasGrid(self.planner, self.grid_cell_width, self.grid_cell_height,
+                                         on_tap=self.canvas_cell_tapped, heatmap=self.heatmap)
+            return self.canvasGrid
+        self.canvasGrid = None
         grid = ft.Row([
             ft.Column([
                 DStarLiteView.Cell(i, j, self.grid_cell_width, self.grid_cell_height, self)
@@ -597,23 +867,49 @@ class DStarLiteView:
         return robot
 
     def set_default_start_goal(self):
+        if self.canvasGrid is not None:
+            self.set_canvas_cell(0, 0, CellType.Start)
+            self.set_canvas_cell(self.gridWidth - 1, self.gridHeight - 1, CellType.Goal)
+            return
         self.grid.controls[0].controls[0].change_type(CellType.Start)
         self.grid.controls[-1].controls[-1].change_type(CellType.Goal)
 
     # Update rsh-value on screen
     def update_rsh(self, x, y):
-        self.grid.controls[x].controls[y].update_rsh()
+        with self.lock:
+            if self.canvasGrid is not None:
+                self.canvasGrid.update_rsh(x, y)
+            else:
+                self.grid.controls[x].controls[y].update_rsh()
+        self.uiBatcher.request()
 
     # Update g-value on screen
     def update_g(self, x, y):
-        self.grid.controls[x].controls[y].update_g()
+        with self.lock:
+            if self.canvasGrid is not None:
+                self.canvasGrid.update_g(x, y)
+            else:
+                self.grid.controls[x].controls[y].update_g()
+        self.uiBatcher.request()
 
         # Update-color of vertex on screen if it is not the start- or goal-node
 
     def update_color(self, vertex, color):
-        self.grid.controls[vertex.x].controls[vertex.y].update_color(color)
+        with self.lock:
+            if self.canvasGrid is not None:
+                self.canvasGrid.update_color(vertex.x, vertex.y, color)
+            else:
+                self.grid.controls[vertex.x].controls[vertex.y].update_color(color)
+        self.uiBatcher.request()
 
+    # Send all changes at once, including the changed cells of the next frame
     def update(self):
+        self.uiBatcher.flush(force=True)
+
+    # Flush function of the UpdateBatcher: send the changed cells in one message
+    def send_updates(self):
+        if self.canvasGrid is not None:
+            self.canvasGrid.flush(send=False)
         self.page.update()
 
     def move(self, x, y, orientation):
@@ -634,9 +930,12 @@ class DStarLiteView:
         self.grid_cell_width = self.canvas_width / self.gridWidth
         self.grid_cell_height = self.canvas_height / self.gridHeight
 
-        for rows in self.grid.controls:
-            for cell in rows.controls:
-                cell.update_size(self.grid_cell_width, self.grid_cell_height)
+        if self.canvasGrid is not None:
+            self.canvasGrid.update_size(self.grid_cell_width, self.grid_cell_height)
+        else:
+            for rows in self.grid.controls:
+                for cell in rows.controls:
+                    cell.update_size(self.grid_cell_width, self.grid_cell_height)
 
         self.canvas.height = self.canvas_height
         self.canvas.update()
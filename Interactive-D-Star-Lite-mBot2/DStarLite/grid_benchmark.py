@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+############################################################
+# Grid backend benchmark
+# Compares memory and planning time of the vertex grid
+# backends ('objects' and 'arrays') for growing grid sizes.
+# With --optimized the optimized D* Lite variant is used.
+# Runs with a headless planner (no flet page).
+#
+# Usage: python grid_benchmark.py --sizes 50 100 200 --plan
+#
+# File: grid_benchmark.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+import argparse
+import contextlib
+import os
+import random
+import time
+import tracemalloc
+
+from d_star_lite_planner import DStarLitePlanner
+
+
+# Create a planner with random obstacles, start top left and goal bottom right
+def create_planner(size, backend, obstacle_density, seed, optimized=False):
+    planner = DStarLitePlanner(None, grid_width=size, grid_height=size,
+                               h_is_zero=False, direct_neighbors=False, grid_backend=backend,
+                               optimized=optimized)
+    rng = random.Random(seed)
+    for x in range(size):
+        for y in range(size):
+            if rng.random() < obstacle_density and (x, y) not in ((0, 0), (size - 1, size - 1)):
+                vertex = planner.vertexGrid[x][y]
+                vertex.isObstacle = True
+                planner.obstacles.add(vertex)
+    planner.set_start_coordinates(0, 0)
+    planner.set_goal_coordinates(size - 1, size - 1)
+    return planner
+
+
+# Measure one backend and grid size. Return a dict with the results.
+# The times are taken without tracemalloc, which slows down allocations.
+# Memory is measured in a second, traced run of the same case.
+def run_case(size, backend, obstacle_density, plan, seed, optimized=False):
+    result = {'backend': backend, 'size': size}
+    start_time = time.perf_counter()
+    planner = create_planner(size, backend, obstacle_density, seed, optimized)
+    result['build_s'] = time.perf_counter() - start_time
+    if plan:
+        start_time = time.perf_counter()
+        planner.main_planning('Fast')
+        result['plan_s'] = time.perf_counter() - start_time
+        result['plan_steps'] = planner.plan_steps
+        result['path_cost'] = planner.startNode.g
+    del planner
+    tracemalloc.start()
+    planner = create_planner(size, backend, obstacle_density, seed, optimized)
+    result['grid_mb'] = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    if plan:
+        planner.main_planning('Fast')
+    result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the vertex grid backends')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 100, 200, 400])
+    parser.add_argument('--backends', nargs='+', default=['objects', 'arrays'])
+    parser.add_argument('--obstacles', type=float, default=0.2, help='obstacle density 0..1')
+    parser.add_argument('--plan', action='store_true', help='also run main_planning')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--optimized', action='store_true', help='use the optimized D* Lite variant')
+    args = parser.parse_args()
+
+    print(f'{"backend":>8} {"size":>6} {"build s":>9} {"grid MB":>9} {"plan s":>9} {"steps":>9} {"peak MB":>9}')
+    for size in args.sizes:
+        for backend in args.backends:
+            # Keep the console output of the planner out of the table
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                r = run_case(size, backend, args.obstacles, args.plan, args.seed, args.optimized)
+            print(f'{r["backend"]:>8} {r["size"]:>6} {r["build_s"]:>9.3f} {r["grid_mb"]:>9.1f} '
+                  f'{r.get("plan_s", float("nan")):>9.3f} {r.get("plan_steps", 0):>9} {r["peak_mb"]:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+############################################################
+# Class HeadingLatticePlanner
+# D* Lite over the states (x, y, heading) of a robot which
+# drives to its 4 direct neighbors and turns in place like
+# the robot of CloudExecutor. Driving one cell and turning
+# cost their execution time, so the planned path minimises
+# the time of the execution, not only the driven distance:
+# a path with fewer turns is preferred to a zig-zag path
+# of the same length.
+#
+# Every cell of the vertex grid has 4 state vertices
+# (HeadingVertex) sharing its obstacle flag and cost factor.
+# The goal is reached with any heading. The planned path
+# (actualPath) holds the start state and one state per cell
+# (the heading the robot arrives with), so the executors
+# can run it like a path of the grid planner.
+#
+# File: heading_lattice.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+from d_star_lite_planner import DStarLitePlanner
+from vertex import Vertex
+
+# Headings clockwise and their move directions (y grows to the south)
+HEADINGS = ['North', 'East', 'South', 'West']
+DIRECTIONS = [(0, -1), (1, 0), (0, 1), (-1, 0)]
+
+
+class HeadingVertex(Vertex):
+
+    # State of the robot at a cell of the vertex grid with a heading
+    # (index of HEADINGS). Obstacle flag and cost factor are those of the cell.
+    def __init__(self, cell, heading):
+        self.cell = cell
+        self.x = cell.x
+        self.y = cell.y
+        self.heading = heading
+        self.g = float('inf')
+        self.rsh = float('inf')
+        self.isGoal = False
+        self.key = 0
+
+    @property
+    def isObstacle(self):
+        return self.cell.isObstacle
+
+    @isObstacle.setter
+    def isObstacle(self, value):
+        self.cell.isObstacle = value
+
+    @property
+    def cost(self):
+        return self.cell.cost
+
+    @cost.setter
+    def cost(self, value):
+        self.cell.cost = value
+
+    def print(self):
+        print('x:', self.x, 'y:', self.y, 'heading:', HEADINGS[self.heading], 'g:', self.g,
+              'rsh:', self.rsh, 'IsObstacle:', self.isObstacle, 'Cost:', self.cost)
+
+
+class HeadingLatticePlanner(DStarLitePlanner):
+
+    # start_heading: heading of the robot at the start (North, East, South, West)
+    # drive_time: seconds to drive one cell with cost factor 1. A move costs
+    # drive_time times the mean cost factor of both cells.
+    # turn_time: seconds of a 90 degree turn, turn180_time of a 180 degree turn.
+    # The other arguments are those of DStarLitePlanner; the robot moves to
+    # its direct neighbors only.
+    # Raise a ValueError if a time is not positive.
+    def __init__(self, my_view, grid_width=5, grid_height=4, start_heading='North',
+                 drive_time=1.0, turn_time=0.5, turn180_time=0.8, **kwargs):
+        DStarLitePlanner.__init__(self, my_view, grid_width, grid_height, direct_neighbors=True, **kwargs)
+        for name, value in (('drive_time', drive_time), ('turn_time', turn_time), ('turn180_time', turn180_time)):
+            if not value > 0:
+                raise ValueError(f'{name} must be > 0: {value}')
+        self.startHeading = start_heading
+        self.driveTime = drive_time
+        # Turn time by the number of clockwise quarter turns
+        self.turnTimes = [0.0, turn_time, turn180_time, turn_time]
+        self.states = [[[HeadingVertex(cell, heading) for heading in range(len(HEADINGS))]
+                        for cell in column] for column in self.vertexGrid]
+
+    # Create a lattice planner on the grid of a planner, with its start,
+    # goal, obstacles and settings
+    @classmethod
+    def from_planner(cls, planner, **kwargs):
+        lattice = cls(planner.view, vertex_grid=planner.vertexGrid, h_is_zero=planner.hIsZero,
+                      event_sink=planner.events, optimized=planner.optimized,
+                      inflation=planner.inflation, inflation_step=planner.inflationStep, **kwargs)
+        lattice.startCoordinates = planner.startCoordinates
+        lattice.goalCoordinates = planner.goalCoordinates
+        lattice.goalSet = planner.goalSet
+        lattice.obstacles = planner.obstacles
+        return lattice
+
+    # Lower bound of the execution time: drive the manhattan distance
+    def time_heuristic(self, vertex, start_node):
+        return self.driveTime * (abs(vertex.x - start_node.x) + abs(vertex.y - start_node.y))
+
+    def select_heuristic(self):
+        if self.customHeuristic is None and not self.hIsZero:
+            return self.time_heuristic
+        return DStarLitePlanner.select_heuristic(self)
+
+    # The heading states are objects, their maps are dicts
+    def vertex_map(self, values):
+        return {}
+
+    def state_vertices(self, x, y):
+        return self.states[x][y]
+
+    def start_vertex(self):
+        x, y = int(self.startCoordinates[0]), int(self.startCoordinates[1])
+        return self.states[x][y][HEADINGS.index(self.startHeading)]
+
+    def robot_vertex(self, vertex, orientation):
+        return self.states[vertex.x][vertex.y][HEADINGS.index(orientation)]
+
+    # Show the values of the best heading at the cell
+    def cell_values(self, x, y):
+        states = self.states[x][y]
+        return min(state.g for state in states), min(state.rsh for state in states)
+
+    # Successors: the turns in place and the drive to the next cell ahead
+    def neighbors(self, vertex):
+        result = [state for state in self.states[vertex.x][vertex.y] if state is not vertex]
+        dx, dy = DIRECTIONS[vertex.heading]
+        x = vertex.x + dx
+        y = vertex.y + dy
+        if 0 <= x < self.width and 0 <= y < self.height:
+            result.append(self.states[x][y][vertex.heading])
+        return result
+
+    # Predecessors: the turns in place and the drive from the cell behind
+    def predecessors(self, vertex):
+        result = [state for state in self.states[vertex.x][vertex.y] if state is not vertex]
+        dx, dy = DIRECTIONS[vertex.heading]
+        x = vertex.x - dx
+        y = vertex.y - dy
+        if 0 <= x < self.width and 0 <= y < self.height:
+            result.append(self.states[x][y][vertex.heading])
+        return result
+
+    # Time of the move between two states
+    def neighbor_cost(self, from_vertex, to_vertex):
+        if to_vertex.isObstacle or from_vertex.isObstacle:
+            return float('inf')  # Do not move in or from an obstacle
+        elif from_vertex.x == to_vertex.x and from_vertex.y == to_vertex.y:
+            return self.turnTimes[(to_vertex.heading - from_vertex.heading) % 4]
+        elif from_vertex.heading == to_vertex.heading and \
+                (to_vertex.x - from_vertex.x, to_vertex.y - from_vertex.y) == DIRECTIONS[from_vertex.heading]:
+            return self.driveTime * (from_vertex.cost + to_vertex.cost) / 2
+        else:
+            raise Exception('NeighborCost: State is not a neighbor')
+
+    # Return the path of states without the turns in place: the start state
+    # and the state the robot arrives with at every following cell
+    def extract_path(self, node):
+        path = DStarLitePlanner.extract_path(self, node)
+        if path is None:
+            return None
+        result = [path[0]]
+        for state in path[1:]:
+            if state.x != result[-1].x or state.y != result[-1].y:
+                result.append(state)
+        return result
+
+
+if __name__ == '__main__':
+    # Both paths have length 6; the one with one turn is faster
+    lattice_planner = HeadingLatticePlanner(None, grid_width=4, grid_height=4, start_heading='East')
+    lattice_planner.hIsZero = False
+    lattice_planner.set_start_coordinates(0, 0)
+    lattice_planner.set_goal_coordinates(3, 3)
+    lattice_planner.main_planning('Fast')
+    print([(v.x, v.y, HEADINGS[v.heading]) for v in lattice_planner.actualPath],
+          'time', lattice_planner.startNode.g)
@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+############################################################
+# Heuristics for the planning algorithm D*Lite
+# A heuristic is a function h(vertex, start_node) returning
+# an estimate of the path cost between both vertices. It must
+# never overestimate the cost (admissible) and has to satisfy
+# the triangle inequality (consistent), otherwise re-planning
+# may return wrong paths.
+#
+# Function default_heuristic returns the built-in heuristic
+# for the planner settings (h=0, 4 or 8 neighbors).
+# Class LandmarkHeuristic implements the ALT heuristic with
+# precomputed landmark distance tables.
+#
+# File: heuristics.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+import heapq
+import math
+
+DIAGONAL_COST = 1.4  # Cost of a diagonal move, a straight move costs 1
+
+
+# Do not use a heuristic. Then more planning steps are needed
+def zero(vertex, start_node):
+    return 0
+
+
+# Max. 4 neighbors: exact distance without considering obstacles
+def manhattan(vertex, start_node):
+    return abs(vertex.x - start_node.x) + abs(vertex.y - start_node.y)
+
+
+# Max. 8 neighbors: exact distance without obstacles for moves costing
+# 1 (straight) and DIAGONAL_COST (diagonal)
+def octile(vertex, start_node):
+    dx = abs(vertex.x - start_node.x)
+    dy = abs(vertex.y - start_node.y)
+    if dx > dy:
+        return dx + (DIAGONAL_COST - 1) * dy
+    return dy + (DIAGONAL_COST - 1) * dx
+
+
+# Return an octile heuristic for diagonal moves costing diagonal_cost,
+# e.g. sqrt(2) for the MovingAI benchmarks
+def octile_for(diagonal_cost):
+    if diagonal_cost == DIAGONAL_COST:
+        return octile
+
+    def octile_cost(vertex, start_node):
+        dx = abs(vertex.x - start_node.x)
+        dy = abs(vertex.y - start_node.y)
+        if dx > dy:
+            return dx + (diagonal_cost - 1) * dy
+        return dy + (diagonal_cost - 1) * dx
+    return octile_cost
+
+
+# Straight-line distance. Slightly overestimates diagonal moves
+# (sqrt(2) > DIAGONAL_COST), octile is the better choice for 8 neighbors.
+def euclidean(vertex, start_node):
+    dx = vertex.x - start_node.x
+    dy = vertex.y - start_node.y
+    return math.sqrt(dx * dx + dy * dy)
+
+
+# Return the built-in heuristic for the planner settings
+def default_heuristic(is_zero, direct_neighbors, diagonal_cost=DIAGONAL_COST):
+    if is_zero:
+        return zero
+    elif direct_neighbors:
+        return manhattan
+    else:
+        return octile_for(diagonal_cost)
+
+
+class LandmarkHeuristic(object):
+
+    # Precompute the path costs from every landmark (x, y) to all
+    # vertices of the planner grid. The tables are only admissible as
+    # long as no cost of the grid has decreased since their computation.
+    # Call update() after obstacles have been removed or costs lowered.
+    def __init__(self, planner, landmarks):
+        self.planner = planner
+        self.landmarks = list(landmarks)
+        self.tables = []
+        self.update()
+
+    # Recompute all landmark tables with the current grid costs
+    def update(self):
+        self.tables = [self.distances(self.planner.vertexGrid[x][y]) for x, y in self.landmarks]
+
+    # Dijkstra search from source. Return a dict (x, y) -> path cost
+    def distances(self, source):
+        planner = self.planner
+        result = {(source.x, source.y): 0}
+        queue = [(0, source.x, source.y)]
+        while queue:
+            cost, x, y = heapq.heappop(queue)
+            if cost > result[(x, y)]:
+                continue
+            vertex = planner.vertexGrid[x][y]
+            for n in planner.neighbors(vertex):
+                new_cost = cost + planner.neighbor_cost(vertex, n)
+                if new_cost < result.get((n.x, n.y), float('inf')):
+                    result[(n.x, n.y)] = new_cost
+                    heapq.heappush(queue, (new_cost, n.x, n.y))
+        return result
+
+    # The triangle inequality gives |d(L, v) - d(L, s)| <= d(v, s) for every
+    # landmark L. Vertices unreachable from a landmark give no estimate.
+    def __call__(self, vertex, start_node):
+        estimate = 0
+        v = (vertex.x, vertex.y)
+        s = (start_node.x, start_node.y)
+        for table in self.tables:
+            if v in table and s in table:
+                diff = abs(table[v] - table[s])
+                if diff > estimate:
+                    estimate = diff
+        return estimate
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+############################################################
+# Map changes for batched re-planning
+# A MapChange describes the change of one cell of the grid.
+# The class MapChangeBuffer collects changes that arrive
+# quickly one after another. Several changes of the same cell
+# are coalesced (the last change wins) and the buffer is due
+# for re-planning after a debounce time without new changes.
+#
+# File: map_changes.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+import enum
+import time
+from collections import namedtuple
+
+
+class ChangeType(enum.Enum):
+    ObstacleAdded = 0
+    ObstacleRemoved = 1
+    CostChanged = 2
+
+
+# Change of the cell at x, y. cost is the new traversal cost
+# factor for ChangeType.CostChanged.
+MapChange = namedtuple('MapChange', ['x', 'y', 'change_type', 'cost'], defaults=[None])
+
+
+class MapChangeBuffer(object):
+
+    # debounce: seconds without new changes before the buffer is due
+    # max_delay: seconds after the first change when the buffer is due
+    # even if changes keep coming in
+    def __init__(self, debounce=0.2, max_delay=1.0, clock=time.monotonic):
+        self.debounce = debounce
+        self.maxDelay = max_delay
+        self.clock = clock
+        self.changes = {}  # (x, y) -> last MapChange of the cell
+        self.firstTime = None
+        self.lastTime = None
+
+    # Add a change. An older change of the same cell is replaced.
+    def add(self, change):
+        now = self.clock()
+        if not self.changes:
+            self.firstTime = now
+        self.lastTime = now
+        self.changes.pop((change.x, change.y), None)
+        self.changes[(change.x, change.y)] = change
+
+    # Add several changes
+    def extend(self, changes):
+        for change in changes:
+            self.add(change)
+
+    # Return True if changes are waiting and the debounce time
+    # (or the maximum delay) is over
+    def due(self):
+        if not self.changes:
+            return False
+        now = self.clock()
+        return now - self.lastTime >= self.debounce or now - self.firstTime >= self.maxDelay
+
+    # Return all waiting changes in order of arrival and clear the buffer
+    def take(self):
+        changes = list(self.changes.values())
+        self.changes = {}
+        self.firstTime = None
+        self.lastTime = None
+        return changes
+
+    def __len__(self):
+        return len(self.changes)
+
+
+if __name__ == "__main__":
+    buffer = MapChangeBuffer(debounce=0.1)
+    buffer.add(MapChange(1, 2, ChangeType.ObstacleAdded))
+    buffer.add(MapChange(3, 1, ChangeType.CostChanged, 2.5))
+    buffer.add(MapChange(1, 2, ChangeType.ObstacleRemoved))
+    print('Due:', buffer.due(), 'Changes:', len(buffer))
+    time.sleep(0.15)
+    print('Due:', buffer.due(), 'Changes:', buffer.take())
@@ -0,0 +1,188 @@
+#!/usr/bin/python3
+############################################################
+# MovingAI grid benchmarks
+# Loader for the .map files and a scenario runner for the .scen
+# files of the MovingAI benchmark sets (movingai.com/benchmarks).
+# Every start/goal pair of a scenario file is planned with a
+# headless DStarLitePlanner. Path length, optimal length,
+# expansions and time are written as one JSON line per scenario,
+# so large scenario files run in bounded memory.
+#
+# The published optimal lengths use diagonal moves of sqrt(2)
+# without cutting corners of obstacles. With 8 neighbors the
+# planner uses the same rules and every path length is checked
+# against the optimal length (max. difference TOLERANCE). The
+# optimal lengths are for 8 neighbors, so with 4 neighbors
+# nothing is compared.
+#
+# Usage: python moving_ai.py arena.map.scen --maps maps --output arena.jsonl
+#
+# File: moving_ai.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import sys
+import time
+from collections import namedtuple
+
+from d_star_lite_planner import DStarLitePlanner
+
+PASSABLE = '.GS'  # Ground, ground and swamp. All other terrain is blocked.
+TOLERANCE = 1e-4  # Max. difference to the optimal length (8 decimals in the files)
+
+# A grid map with its blocked cells (x, y)
+MovingAIMap = namedtuple('MovingAIMap', ['width', 'height', 'obstacles'])
+
+# One line of a .scen file
+Scenario = namedtuple('Scenario', ['bucket', 'map', 'width', 'height',
+                                   'start_x', 'start_y', 'goal_x', 'goal_y', 'optimal'])
+
+
+# Read a .map file. Raise a ValueError if the header is invalid.
+def load_map(path):
+    with open(path) as f:
+        header = {}
+        for line in f:
+            line = line.strip()
+            if line == 'map':
+                break
+            name, _, value = line.partition(' ')
+            header[name] = value
+        try:
+            width = int(header['width'])
+            height = int(header['height'])
+        except (KeyError, ValueError):
+            raise ValueError(f'{path}: invalid map header {header}')
+        obstacles = set()
+        for y in range(height):
+            row = f.readline().rstrip('\r\n')
+            for x in range(width):
+                if x >= len(row) or row[x] not in PASSABLE:
+                    obstacles.add((x, y))
+    return MovingAIMap(width, height, obstacles)
+
+
+# Create a headless planner for a map with the move rules of the benchmarks
+def create_planner(grid_map, direct_neighbors=False, grid_backend='objects', optimized=False):
+    planner = DStarLitePlanner(None, grid_width=grid_map.width, grid_height=grid_map.height,
+                               h_is_zero=False, direct_neighbors=direct_neighbors,
+                               grid_backend=grid_backend, optimized=optimized,
+                               diagonal_cost=math.sqrt(2), corner_cutting=False)
+    for x, y in grid_map.obstacles:
+        vertex = planner.vertexGrid[x][y]
+        vertex.isObstacle = True
+        planner.obstacles.add(vertex)
+    return planner
+
+
+# Return the scenarios of a .scen file one after another
+def read_scenarios(path):
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) != 9:
+                continue  # 'version 1' header or empty line
+            yield Scenario(int(fields[0]), fields[1], int(fields[2]), int(fields[3]),
+                           int(fields[4]), int(fields[5]), int(fields[6]), int(fields[7]),
+                           float(fields[8]))
+
+
+# Length of a path with straight moves of 1 and diagonal moves of
+# sqrt(2) like the optimal lengths of the scenario files
+def octile_length(path):
+    length = 0.0
+    for a, b in zip(path, path[1:]):
+        length += math.sqrt(2) if a.x != b.x and a.y != b.y else 1
+    return length
+
+
+# Return the file of a map named in a scenario file
+def map_file(map_name, map_dir):
+    path = os.path.join(map_dir, map_name)
+    if not os.path.exists(path):
+        path = os.path.join(map_dir, os.path.basename(map_name))
+    return path
+
+
+# Plan one scenario with a planner of its map. Return a dict with the results.
+def run_scenario(planner, index, scenario):
+    planner.reset_search()
+    planner.set_start_coordinates(scenario.start_x, scenario.start_y)
+    planner.set_goal_coordinates(scenario.goal_x, scenario.goal_y)
+    start_time = time.perf_counter()
+    planner.main_planning('Fast')
+    elapsed = time.perf_counter() - start_time
+    result = {'index': index, 'bucket': scenario.bucket, 'map': scenario.map,
+              'start': [scenario.start_x, scenario.start_y], 'goal': [scenario.goal_x, scenario.goal_y],
+              'optimal': scenario.optimal, 'solved': planner.planReady, 'cost': None,
+              'length': None, 'error': None, 'expansions': planner.plan_steps, 'time_s': elapsed}
+    if planner.planReady:
+        result['cost'] = planner.startNode.g
+        result['length'] = octile_length(planner.actualPath)
+        if not planner.directNeighbors:
+            result['error'] = result['length'] - scenario.optimal
+    return result
+
+
+# Run all scenarios of a .scen file and write one JSON line per scenario to
+# output (a file object). The planner is only recreated when the map changes.
+# Return a summary dict.
+def run_scenarios(scen_path, output, map_dir=None, limit=None, direct_neighbors=False,
+                  grid_backend='objects', optimized=False):
+    if map_dir is None:
+        map_dir = os.path.dirname(scen_path)
+    summary = {'scenarios': 0, 'solved': 0, 'expansions': 0, 'time_s': 0.0,
+               'compared': 0, 'optimal': 0, 'max_error': None}
+    planner = None
+    planner_map = None
+    for index, scenario in enumerate(read_scenarios(scen_path)):
+        if limit is not None and index >= limit:
+            break
+        # Keep the console output of the planner out of the results
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            if scenario.map != planner_map:
+                planner = create_planner(load_map(map_file(scenario.map, map_dir)),
+                                         direct_neighbors, grid_backend, optimized)
+                planner_map = scenario.map
+            result = run_scenario(planner, index, scenario)
+        output.write(json.dumps(result) + '\n')
+        summary['scenarios'] += 1
+        summary['expansions'] += result['expansions']
+        summary['time_s'] += result['time_s']
+        if result['solved']:
+            summary['solved'] += 1
+        if result['error'] is not None:
+            error = abs(result['error'])
+            summary['compared'] += 1
+            if error <= TOLERANCE:
+                summary['optimal'] += 1
+            if summary['max_error'] is None or error > summary['max_error']:
+                summary['max_error'] = error
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run MovingAI scenarios with DStarLitePlanner')
+    parser.add_argument('scen', help='.scen file')
+    parser.add_argument('--maps', help='directory of the .map files (default: directory of the .scen file)')
+    parser.add_argument('--output', help='JSON lines file for the results (default: stdout)')
+    parser.add_argument('--limit', type=int, help='run only the first scenarios')
+    parser.add_argument('--neighbors', type=int, default=8, choices=[4, 8])
+    parser.add_argument('--backend', default='objects', choices=['objects', 'arrays'])
+    parser.add_argument('--optimized', action='store_true', help='use the optimized D* Lite variant')
+    args = parser.parse_args()
+
+    with (open(args.output, 'w') if args.output else contextlib.nullcontext(sys.stdout)) as output:
+        summary = run_scenarios(args.scen, output, args.maps, args.limit, args.neighbors == 4,
+                                args.backend, args.optimized)
+    print('Summary:', json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,56 +1,254 @@
-from queue import Queue, Empty
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import Future
+from queue import Queue
 import paho.mqtt.client as paho
+from planner_metrics import metrics
 
 
 topic_command = "rwth-ssrdp/route-planning/command"
 topic_heartbeat = "rwth-ssrdp/route-planning/heartbeat"
 topic_obstacle = "rwth-ssrdp/route-planning/obstacle"
 topic_result = "rwth-ssrdp/route-planning/result"
+topic_progress = "rwth-ssrdp/route-planning/progress"
 one_step_distance = 20
 turn_distance = 4
 
+# Broker address, e.g. set in the [env] section of fly.toml
+broker_host = os.environ.get('MQTT_BROKER_HOST', 'broker.hivemq.com')
+broker_port = int(os.environ.get('MQTT_BROKER_PORT', 1883))
+heartbeat_max_age = 12  # The robot sends a heartbeat every 5 s
 
+# Command protocol (see mbot2_cyberpi_code/route_planning.py)
+# A command is published as b'<session>:<seq>:<code>'. session is a random
+# id of this service, so replies to an earlier run are not mistaken for
+# replies to this one. seq numbers the commands of a session. code is the
+# one-letter code of the command. The robot answers b'<session>:<seq>:<result>'.
+# Replies matching no waiting command (late after a timeout, QoS 1
+# duplicates, other sessions) are dropped. The robot executes the commands
+# in the order of seq and does not execute a duplicate twice.
+# 'Plan' uploads motion segments (argument b'L,D3,...', see segment_executor.py)
+# which the robot runs from a queue, reporting
+# b'<session>:<seq>:<event>:<segment>:<cells>' on the progress topic.
+# 'Cancel' stops the plan after the running move.
+# The robot publishes every distance reading of its ultrasonic sensor on
+# the obstacle topic after a move, before its result or progress report.
+command_codes = {'CheckDistance': b'C', 'Drive': b'D', 'Reverse': b'R', 'Stop': b'S',
+                 'Turn180': b'B', 'TurnL90': b'L', 'TurnR90': b'T', 'Plan': b'P', 'Cancel': b'X'}
+timeout_reply = 'timeout!'
+
+
+def encode_command(session, seq, command, argument=b''):
+    return session + b':' + str(seq).encode() + b':' + command_codes[command] + argument
+
+
+# Return session, seq and result of a reply or None if it is no protocol reply
+def decode_reply(payload):
+    fields = payload.split(b':', 2)
+    if len(fields) != 3 or not fields[1].isdigit():
+        return None
+    return fields[0], int(fields[1]), fields[2]
+
+
+# Return session, seq, event, segment index and cells of a progress
+# report or None if the payload is invalid
+def decode_progress(payload):
+    fields = payload.split(b':')
+    if len(fields) != 5 or not (fields[1] + fields[3] + fields[4]).isdigit():
+        return None
+    return fields[0], int(fields[1]), fields[2].decode(), int(fields[3]), int(fields[4])
+
+
+# The MQTT connection to the robot. It connects in the background and
+# reconnects after a loss of the connection (paho network thread).
+# Use get_service() to share one connection in the process.
 class MQTTService:
-    def __init__(self):
-        self.result = Queue(1)
+    def __init__(self, host=None, port=None):
+        self.host = host or broker_host
+        self.port = port or broker_port
+        self.session = os.urandom(3).hex().encode()
+        self.seq = 0  # Sequence number of the last command
+        self.pending = {}  # seq -> [future, command, start time, timeout timer]
+        self.lock = threading.Lock()
         self.heartbeat = None
+        self.heartbeatTime = None  # time.monotonic() of the last heartbeat
+        self.connected = threading.Event()
         self.detectRealObstacle = False
-        self.client = paho.Client()
-        self.client.connect('broker.hivemq.com', 1883)
-        self.client.subscribe([(topic_heartbeat, 1),
-                               (topic_obstacle, 1),
-                               (topic_result, 1)])
+        self.progress = Queue()  # (seq, event, segment, cells, number) of uploaded plans
+        self.progressCount = 0  # Number of the last progress report
+        self.distances = Queue()  # (progressCount, distance) of the sensor readings
+        self.client = paho.Client(paho.CallbackAPIVersion.VERSION2)
+        self.client.on_connect = self.on_connect
+        self.client.on_disconnect = self.on_disconnect
         self.client.message_callback_add(topic_heartbeat, self.on_message_heartbeat)
         self.client.message_callback_add(topic_result, self.on_message_result)
         self.client.message_callback_add(topic_obstacle, self.on_message_obstacle)
+        self.client.message_callback_add(topic_progress, self.on_message_progress)
+        self.client.reconnect_delay_set(min_delay=1, max_delay=30)
+        self.client.connect_async(self.host, self.port)
         self.client.loop_start()
 
+    # Subscribe on every (re)connect, the broker forgets the subscriptions
+    def on_connect(self, client, userdata, flags, reason_code, properties):
+        if reason_code.is_failure:
+            print('MQTT connection refused:', reason_code)
+            return
+        self.client.subscribe([(topic_heartbeat, 1),
+                               (topic_obstacle, 1),
+                               (topic_result, 1),
+                               (topic_progress, 1)])
+        self.connected.set()
+        print('MQTT connected to', self.host)
+
+    def on_disconnect(self, client, userdata, flags, reason_code, properties):
+        self.connected.clear()
+        if metrics.enabled:
+            metrics.count('mqtt_disconnects')
+        print('MQTT disconnected:', reason_code)
+
     def on_message_heartbeat(self, client, userdata, msg):
         self.heartbeat = msg.payload
+        self.heartbeatTime = time.monotonic()
 
+    # Return True if the connection is up and the robot has sent a heartbeat recently
+    def is_ready(self):
+        return self.connected.is_set() and self.heartbeatTime is not None and \
+            time.monotonic() - self.heartbeatTime < heartbeat_max_age
+
+    # Wait up to timeout seconds until the robot is ready. Return is_ready().
+    def wait_ready(self, timeout=heartbeat_max_age):
+        deadline = time.monotonic() + timeout
+        while not self.is_ready() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        return self.is_ready()
+
+    # Stop the network thread and close the connection
+    def close(self):
+        self.client.disconnect()
+        self.client.loop_stop()
+
+    # Resolve the future of the command the reply belongs to
     def on_message_result(self, client, userdata, msg):
-        self.result.put(msg.payload)
+        reply = decode_reply(msg.payload)
+        with self.lock:
+            entry = None
+            if reply is not None and reply[0] == self.session:
+                entry = self.pending.pop(reply[1], None)
+        if entry is None:
+            if metrics.enabled:
+                metrics.count('dropped_results')
+            return
+        future, command, start_time, timer = entry
+        timer.cancel()
+        if metrics.enabled:
+            metrics.observe('command_round_trip', time.perf_counter() - start_time, (('command', command),))
+        future.set_result(reply[2])
+
+    def on_message_progress(self, client, userdata, msg):
+        progress = decode_progress(msg.payload)
+        if progress is not None and progress[0] == self.session:
+            self.progressCount += 1
+            self.progress.put(progress[1:] + (self.progressCount,))
 
+    # The readings are tagged with the number of the last progress report,
+    # so a reading can be assigned to the position the robot took it at
     def on_message_obstacle(self, client, userdata, msg):
         distance = float(msg.payload)
         if distance < one_step_distance:
             self.detectRealObstacle = True
         else:
             self.detectRealObstacle = False
+        self.distances.put((self.progressCount, distance))
 
-    def send(self, command):
-        (rc, mid) = self.client.publish(topic_command, command, qos=1)
-        try:
-            result = self.result.get(timeout=10)
-        except Empty:
-            result = 'timeout!'
-        return result
+    # Forget the state of an earlier execution: the obstacle flag and the
+    # readings and progress reports nobody has taken. Every executor calls
+    # it when it starts to use the shared service.
+    def reset_run(self):
+        self.detectRealObstacle = False
+        self.take_distances()
+        while not self.progress.empty():
+            self.progress.get()
 
+    # Return the (progressCount, distance) of the readings received since the last call
+    def take_distances(self):
+        readings = []
+        while not self.distances.empty():
+            readings.append(self.distances.get())
+        return readings
 
-if __name__ == '__main__':
-    robot = MQTTService()
-    _result = robot.send('Stop')
-    print(_result[-1:] == b'!')
+    # Send a command without waiting. Return a Future with the result of the
+    # robot, or 'timeout!' if there is no result within timeout seconds.
+    # Several commands may be in flight; the robot executes them in order.
+    def send_async(self, command, timeout=10, argument=b''):
+        return self.publish_command(command, timeout, argument)[1]
+
+    # Send a command without waiting. Return its sequence number and the Future.
+    def publish_command(self, command, timeout=10, argument=b''):
+        future = Future()
+        with self.lock:
+            self.seq += 1
+            seq = self.seq
+            timer = threading.Timer(timeout, self.expire, (seq,))
+            timer.daemon = True
+            self.pending[seq] = [future, command, time.perf_counter(), timer]
+        timer.start()
+        self.client.publish(topic_command, encode_command(self.session, seq, command, argument), qos=1)
+        return seq, future
+
+    # No result within the timeout: resolve the future with 'timeout!'
+    def expire(self, seq):
+        with self.lock:
+            entry = self.pending.pop(seq, None)
+        if entry is None:
+            return
+        if metrics.enabled:
+            metrics.count('command_timeouts', labels=(('command', entry[1]),))
+        entry[0].set_result(timeout_reply)
+
+    # Send a command and wait for the result
+    def send(self, command, timeout=10):
+        return self.send_async(command, timeout).result()
+
+    # Upload a plan of encoded segments. Return its sequence number (which
+    # identifies its progress reports) and the result ('queued').
+    def send_plan(self, segments, timeout=10):
+        seq, future = self.publish_command('Plan', timeout, segments)
+        return seq, future.result()
+
+    # Send several commands at once and wait for all results (in order)
+    def send_all(self, commands, timeout=10):
+        futures = [self.send_async(command, timeout) for command in commands]
+        return [future.result() for future in futures]
 
 
+services = {}  # (host, port) -> MQTTService shared in the process
+services_lock = threading.Lock()
 
+
+# Return the shared service for a broker (default: broker_host, broker_port).
+# It is created on the first call and used by all executors and views.
+def get_service(host=None, port=None):
+    key = (host or broker_host, port or broker_port)
+    with services_lock:
+        service = services.get(key)
+        if service is None:
+            service = MQTTService(*key)
+            services[key] = service
+        return service
+
+
+@atexit.register
+def close_services():
+    with services_lock:
+        for service in services.values():
+            service.close()
+        services.clear()
+
+
+if __name__ == '__main__':
+    robot = get_service()
+    print('Robot ready:', robot.wait_ready())
+    _result = robot.send('Stop')
+    print(_result[-1:] == b'!')
@@ -0,0 +1,208 @@
+#!/usr/bin/python3
+############################################################
+# Occupancy maps for large grids
+# Import of occupancy images (PGM, or PNG and other formats
+# with Pillow) and a compact binary map format which is
+# memory-mapped into the array-backed vertex grid without
+# parsing.
+#
+# Binary map format (little endian):
+#   8 bytes  magic b'DSLMAP1\0'
+#   4 bytes  width (uint32)
+#   4 bytes  height (uint32)
+#   width * height bytes: one uint8 per cell in cell id order
+#   (id = x * height + y, see vertex_grid.py).
+#   0 = obstacle, 1..255 = traversal cost factor
+# The map is mapped copy-on-write and used as the cost array of
+# a MapVertexGrid without a copy. Obstacle flag and cost factor
+# of a cell share its byte: a removed obstacle is free (cost 1)
+# and cost factors are whole numbers 1..255, others are rejected.
+#
+# Class MapVertexGrid
+# Array vertex grid over the cells of a map (class MapVertex
+# for its vertex views).
+#
+# Usage: python occupancy_map.py floor.png floor.dslmap --threshold 128
+#
+# File: occupancy_map.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+import argparse
+import struct
+import time
+
+from vertex_grid import ArrayVertex, ArrayVertexGrid
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+MAGIC = b'DSLMAP1\0'
+HEADER = struct.Struct('<8sII')
+OBSTACLE = 0  # Cell value of an obstacle
+
+
+class MapVertex(ArrayVertex):
+    __slots__ = ()
+
+    # Obstacle flag and cost factor are read from the map byte of the cell
+    @property
+    def isObstacle(self):
+        return bool(self.grid.cost[self.id] == OBSTACLE)
+
+    @isObstacle.setter
+    def isObstacle(self, value):
+        cells = self.grid.cost
+        if value:
+            cells[self.id] = OBSTACLE
+        elif cells[self.id] == OBSTACLE:
+            cells[self.id] = 1  # A removed obstacle is free
+
+    @property
+    def cost(self):
+        value = self.grid.cost[self.id]
+        return 1.0 if value == OBSTACLE else float(value)
+
+    @cost.setter
+    def cost(self, value):
+        # An obstacle keeps no cost factor, it is free when it is removed
+        if self.grid.cost[self.id] != OBSTACLE:
+            self.grid.cost[self.id] = value
+
+
+class MapVertexGrid(ArrayVertexGrid):
+    view = MapVertex
+
+    # Create the grid over cells (uint8 in cell id order, see the
+    # binary map format), e.g. memory-mapped by load_map. The cells
+    # are the cost array and the obstacle flags of the grid.
+    def __init__(self, width, height, cells):
+        if np is None:
+            raise ImportError('Occupancy maps need numpy (pip install numpy)')
+        if len(cells) != width * height:
+            raise ValueError(f'{len(cells)} cells do not fit a {width} x {height} grid')
+        self.width = width
+        self.height = height
+        self.g = np.full(len(cells), np.inf)
+        self.rsh = np.full(len(cells), np.inf)
+        self.cost = cells
+        self.goal = np.zeros(len(cells), dtype=bool)
+        self.obstacle = None  # Flags are the cells with value OBSTACLE
+
+    # Return the ids of the obstacle cells
+    def obstacle_ids(self):
+        return np.flatnonzero(self.cost == OBSTACLE)
+
+    # Return the number of bytes used by the arrays, the cells included
+    def nbytes(self):
+        return self.g.nbytes + self.rsh.nbytes + self.cost.nbytes + self.goal.nbytes
+
+
+# Read a PGM image (P2 or P5). Return a uint8 array of shape (height, width).
+def read_pgm(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    tokens = []
+    pos = 0
+    while len(tokens) < 4:
+        # Header: magic, width, height and maxval, separated by whitespace and comments
+        while data[pos:pos + 1].isspace():
+            pos += 1
+        if data[pos:pos + 1] == b'#':
+            pos = data.index(b'\n', pos)
+            continue
+        end = pos
+        while not data[end:end + 1].isspace():
+            end += 1
+        tokens.append(data[pos:end])
+        pos = end
+    magic, width, height, maxval = tokens[0], int(tokens[1]), int(tokens[2]), int(tokens[3])
+    pos += 1  # Single whitespace before the pixels
+    if magic == b'P5':
+        dtype = np.uint8 if maxval < 256 else np.dtype('>u2')
+        pixels = np.frombuffer(data, dtype=dtype, count=width * height, offset=pos)
+    elif magic == b'P2':
+        pixels = np.array(data[pos:].split()[:width * height], dtype=np.int64)
+    else:
+        raise ValueError(f'{path}: not a PGM image ({magic})')
+    if maxval != 255:
+        pixels = pixels.astype(np.int64) * 255 // maxval
+    return pixels.astype(np.uint8).reshape(height, width)
+
+
+# Read an occupancy image as grey values, shape (height, width)
+def read_image(path):
+    if np is None:
+        raise ImportError('Occupancy maps need numpy (pip install numpy)')
+    if path.lower().endswith('.pgm'):
+        return read_pgm(path)
+    if Image is None:
+        raise ImportError('Images other than PGM need Pillow (pip install pillow)')
+    with Image.open(path) as image:
+        return np.asarray(image.convert('L'))
+
+
+# Convert grey values to cells in cell id order. Pixels darker than
+# threshold are obstacles, all others are free (cost 1).
+def image_to_cells(image, threshold=128):
+    cells = np.where(image < threshold, OBSTACLE, 1).astype(np.uint8)
+    return np.ascontiguousarray(cells.T).reshape(-1)  # image[y, x] -> cells[x * height + y]
+
+
+# Write cells in the binary map format
+def save_map(path, cells, width, height):
+    if len(cells) != width * height:
+        raise ValueError(f'{len(cells)} cells do not fit a {width} x {height} grid')
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, width, height))
+        f.write(np.asarray(cells, dtype=np.uint8).tobytes())
+
+
+# Memory-map a binary map. Return width, height and the cells.
+def load_map(path):
+    if np is None:
+        raise ImportError('Occupancy maps need numpy (pip install numpy)')
+    with open(path, 'rb') as f:
+        magic, width, height = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f'{path}: not a binary map file')
+    cells = np.memmap(path, dtype=np.uint8, mode='c', offset=HEADER.size, shape=(width * height,))
+    return width, height, cells
+
+
+# Create an array vertex grid over the cells without a copy
+def create_grid(width, height, cells):
+    return MapVertexGrid(width, height, cells)
+
+
+# Load a binary map into an array vertex grid
+def load_grid(path):
+    return create_grid(*load_map(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert an occupancy image into a binary map')
+    parser.add_argument('image', help='PGM image, or PNG and other formats with Pillow')
+    parser.add_argument('map', help='binary map file to write')
+    parser.add_argument('--threshold', type=int, default=128, help='grey values below are obstacles')
+    args = parser.parse_args()
+
+    image = read_image(args.image)
+    height, width = image.shape
+    save_map(args.map, image_to_cells(image, args.threshold), width, height)
+    start_time = time.perf_counter()
+    grid = load_grid(args.map)
+    print(f'{width} x {height} map written to {args.map}, '
+          f'{len(grid.obstacle_ids())} obstacles, loaded in {1000 * (time.perf_counter() - start_time):.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
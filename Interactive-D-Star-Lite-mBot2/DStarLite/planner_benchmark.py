@@ -0,0 +1,309 @@
+#!/usr/bin/python3
+############################################################
+# Planner benchmark suite
+# Runs a headless DStarLitePlanner on generated grids (random,
+# maze and rooms) for several sizes, obstacle densities and
+# 4 or 8 neighbors. Every case reports the expansions, queue
+# operations, wall time and peak memory of the first plan and
+# of re-plans after obstacles have been put on the path.
+# Goal changes (moving target) are compared with fresh plans
+# to the new goal.
+# The results are written as JSON, --baseline compares them
+# with the JSON file of an earlier run (e.g. another commit).
+#
+# Usage: python planner_benchmark.py --sizes 32 64 --output results.json
+#        python planner_benchmark.py --baseline results.json
+#
+# File: planner_benchmark.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+from d_star_lite_planner import DStarLitePlanner
+from map_changes import ChangeType, MapChange
+from priority_queue import IndexedPriorityQueue
+
+GENERATORS = ['random', 'maze', 'rooms']
+
+
+class CountingPriorityQueue(IndexedPriorityQueue):
+
+    # IndexedPriorityQueue counting its operations
+    def __init__(self, positions=None):
+        super().__init__(positions)
+        self.inserts = 0  # insert calls including key updates
+        self.pops = 0
+        self.removes = 0
+
+    def insert(self, item, calculated_key):
+        self.inserts += 1
+        super().insert(item, calculated_key)
+
+    def pop(self):
+        self.pops += 1
+        return super().pop()
+
+    def remove(self, node):
+        self.removes += 1
+        super().remove(node)
+
+    def operations(self):
+        return self.inserts + self.pops + self.removes
+
+
+# Grid generators. Each returns a set of obstacle cells (x, y).
+
+# Obstacles placed independently with the given density
+def random_obstacles(size, density, rng):
+    return {(x, y) for x in range(size) for y in range(size) if rng.random() < density}
+
+
+# Perfect maze (depth-first backtracking). Passages are the cells with
+# even coordinates and the opened walls between them.
+def maze_obstacles(size, density, rng):
+    free = set()
+    stack = [(0, 0)]
+    free.add((0, 0))
+    while stack:
+        x, y = stack[-1]
+        choices = [(x + dx, y + dy, dx, dy) for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                   if 0 <= x + dx < size and 0 <= y + dy < size and (x + dx, y + dy) not in free]
+        if not choices:
+            stack.pop()
+            continue
+        nx, ny, dx, dy = rng.choice(choices)
+        free.add((x + dx // 2, y + dy // 2))
+        free.add((nx, ny))
+        stack.append((nx, ny))
+    return {(x, y) for x in range(size) for y in range(size)} - free
+
+
+# Square rooms separated by walls. Every wall between two rooms has a
+# door at a random position. density is ignored.
+def room_obstacles(size, density, rng, room_size=8):
+    obstacles = set()
+    for wall in range(room_size, size, room_size + 1):
+        for i in range(size):
+            obstacles.add((wall, i))
+            obstacles.add((i, wall))
+    starts = [0] + list(range(room_size + 1, size, room_size + 1))
+    for wall in range(room_size, size, room_size + 1):
+        for start in starts:
+            end = min(start + room_size, size)
+            door = rng.randrange(start, end)
+            obstacles.discard((wall, door))
+            obstacles.discard((door, wall))
+    return obstacles
+
+
+# Return the free cell nearest to the corner (x, y)
+def free_corner(size, obstacles, x, y):
+    cells = [(cx, cy) for cx in range(size) for cy in range(size) if (cx, cy) not in obstacles]
+    return min(cells, key=lambda c: abs(c[0] - x) + abs(c[1] - y))
+
+
+# Create a headless planner for a generated grid
+def create_planner(generator, size, density, direct_neighbors, seed, optimized):
+    rng = random.Random(seed)
+    if generator == 'random':
+        obstacles = random_obstacles(size, density, rng)
+    elif generator == 'maze':
+        obstacles = maze_obstacles(size, density, rng)
+    else:
+        obstacles = room_obstacles(size, density, rng)
+    start = free_corner(size, obstacles, 0, 0)
+    goal = free_corner(size, obstacles, size - 1, size - 1)
+    planner = DStarLitePlanner(None, grid_width=size, grid_height=size, h_is_zero=False,
+                               direct_neighbors=direct_neighbors, optimized=optimized)
+    planner.priorityQueue = CountingPriorityQueue(planner.vertex_map('positions'))
+    for x, y in obstacles:
+        vertex = planner.vertexGrid[x][y]
+        vertex.isObstacle = True
+        planner.obstacles.add(vertex)
+    planner.set_start_coordinates(*start)
+    planner.set_goal_coordinates(*goal)
+    return planner
+
+
+# Plan, then block random cells of the path (chosen with rng) one after
+# another and re-plan. Return the planner, a dict with the results and the blocked cells.
+def plan_and_replan(generator, size, density, direct_neighbors, seed, injections, optimized, rng):
+    result = {}
+    planner = create_planner(generator, size, density, direct_neighbors, seed, optimized)
+    queue = planner.priorityQueue
+    start_time = time.perf_counter()
+    planner.main_planning('Fast')
+    result['plan_s'] = time.perf_counter() - start_time
+    result['plan_expansions'] = planner.plan_steps
+    result['plan_queue_ops'] = queue.operations()
+    result['plan_ready'] = planner.planReady
+    result['path_cost'] = planner.startNode.g if planner.planReady else None
+
+    replans = 0
+    replan_s = 0.0
+    replan_expansions = 0
+    ops_before = queue.operations()
+    injected = []
+    for _ in range(injections):
+        path = planner.actualPath[1:-1]
+        if not planner.planReady or not path:
+            break
+        vertex = rng.choice(path)
+        injected.append((vertex.x, vertex.y))
+        start_time = time.perf_counter()
+        planner.replan_map_changes([MapChange(vertex.x, vertex.y, ChangeType.ObstacleAdded)])
+        planner.show_and_remember_path()
+        replan_s += time.perf_counter() - start_time
+        replan_expansions += planner.plan_steps
+        replans += 1
+    result['replans'] = replans
+    result['replan_s'] = replan_s
+    result['replan_expansions'] = replan_expansions
+    result['replan_queue_ops'] = queue.operations() - ops_before
+    return planner, result, injected
+
+
+# Run one case: plan and re-plan, then move the goal. Return a dict with the results.
+# The times are taken without tracemalloc, which slows down allocations.
+# The peak memory is measured in a second, traced run of the same case.
+def run_case(generator, size, density, direct_neighbors, seed, injections, optimized, goal_changes=0,
+             goal_move=3):
+    result = {'generator': generator, 'size': size, 'density': density if generator == 'random' else None,
+              'neighbors': 4 if direct_neighbors else 8, 'optimized': optimized, 'seed': seed}
+    rng = random.Random(seed + 1)
+    planner, timed, injected = plan_and_replan(generator, size, density, direct_neighbors, seed,
+                                               injections, optimized, rng)
+    result.update(timed)
+    tracemalloc.start()
+    plan_and_replan(generator, size, density, direct_neighbors, seed, injections, optimized,
+                    random.Random(seed + 1))
+    result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+
+    # Move the goal to free cells at most goal_move cells away. A second planner with the same
+    # obstacles plans from scratch to the same goals for the comparison.
+    fresh = create_planner(generator, size, density, direct_neighbors, seed, optimized)
+    for x, y in injected:
+        vertex = fresh.vertexGrid[x][y]
+        vertex.isObstacle = True
+        fresh.obstacles.add(vertex)
+    free = [(x, y) for x in range(size) for y in range(size) if not planner.vertexGrid[x][y].isObstacle]
+    goal_s = 0.0
+    goal_expansions = 0
+    fresh_expansions = 0
+    for _ in range(goal_changes):
+        # The target moves a few cells away from the actual goal
+        goal = planner.goalNode
+        near = [(x, y) for x, y in free if 0 < max(abs(x - goal.x), abs(y - goal.y)) <= goal_move]
+        x, y = rng.choice(near or free)
+        start_time = time.perf_counter()
+        planner.change_goal(x, y)
+        planner.show_and_remember_path()
+        goal_s += time.perf_counter() - start_time
+        goal_expansions += planner.plan_steps
+        fresh.reset_search()
+        fresh.set_start_coordinates(planner.startNode.x, planner.startNode.y)
+        fresh.set_goal_coordinates(x, y)
+        fresh.main_planning('Fast')
+        fresh_expansions += fresh.plan_steps
+    result['goal_changes'] = goal_changes
+    result['goal_change_s'] = goal_s
+    result['goal_change_expansions'] = goal_expansions
+    result['fresh_plan_expansions'] = fresh_expansions
+    result['goal_change_saved'] = 1 - goal_expansions / fresh_expansions if fresh_expansions else None
+    return result
+
+
+# Format a ratio as percentage, None as '-'
+def format_ratio(ratio):
+    return '-' if ratio is None else f'{100 * ratio:.0f}%'
+
+
+# Key of a case for the comparison with a baseline
+def case_key(r):
+    return r['generator'], r['size'], r['density'], r['neighbors'], r['optimized'], r['seed']
+
+
+# Return the commit of the working tree or None
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Print the change of time and expansions against the baseline results
+def compare(results, baseline_file):
+    with open(baseline_file) as f:
+        baseline = {case_key(r): r for r in json.load(f)['results']}
+    print(f'\nComparison with {baseline_file} (ratio new / baseline)')
+    print(f'{"case":>36} {"plan s":>8} {"expans.":>8} {"replan s":>9} {"peak MB":>8}')
+    for r in results:
+        b = baseline.get(case_key(r))
+        if b is None:
+            continue
+
+        def ratio(name):
+            return r[name] / b[name] if b[name] else float('nan')
+        density = r['density'] if r['density'] is not None else '-'
+        name = f'{r["generator"]} {r["size"]} {density} n{r["neighbors"]}'
+        print(f'{name:>36} {ratio("plan_s"):>8.2f} {ratio("plan_expansions"):>8.2f} '
+              f'{ratio("replan_s"):>9.2f} {ratio("peak_mb"):>8.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite for DStarLitePlanner')
+    parser.add_argument('--generators', nargs='+', default=GENERATORS, choices=GENERATORS)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[32, 64, 128])
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.1, 0.25],
+                        help='obstacle densities of the random grids')
+    parser.add_argument('--neighbors', type=int, nargs='+', default=[4, 8], choices=[4, 8])
+    parser.add_argument('--injections', type=int, default=5, help='obstacles put on the path for re-planning')
+    parser.add_argument('--goal-changes', type=int, default=3, help='goal changes compared with fresh plans')
+    parser.add_argument('--goal-move', type=int, default=3, help='max. distance of a goal change in cells')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--optimized', action='store_true', help='use the optimized D* Lite variant')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare with the JSON file of an earlier run')
+    args = parser.parse_args()
+
+    results = []
+    print(f'{"generator":>9} {"size":>5} {"dens.":>5} {"n":>2} {"plan s":>8} {"expans.":>8} {"q ops":>8} '
+          f'{"replan s":>9} {"r exp.":>7} {"peak MB":>8} {"goal saved":>10}')
+    for generator in args.generators:
+        densities = args.densities if generator == 'random' else [None]
+        for size in args.sizes:
+            for density in densities:
+                for neighbors in args.neighbors:
+                    # Keep the console output of the planner out of the table
+                    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                        r = run_case(generator, size, density, neighbors == 4, args.seed,
+                                     args.injections, args.optimized, args.goal_changes, args.goal_move)
+                    results.append(r)
+                    print(f'{generator:>9} {size:>5} {density if density is not None else "-":>5} '
+                          f'{r["neighbors"]:>2} {r["plan_s"]:>8.3f} {r["plan_expansions"]:>8} '
+                          f'{r["plan_queue_ops"]:>8} {r["replan_s"]:>9.3f} {r["replan_expansions"]:>7} '
+                          f'{r["peak_mb"]:>8.1f} {format_ratio(r["goal_change_saved"]):>10}')
+    if args.output:
+        report = {'commit': git_commit(), 'python': platform.python_version(),
+                  'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+        print('Results written to', args.output)
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
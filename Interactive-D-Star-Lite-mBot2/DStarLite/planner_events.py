@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+############################################################
+# Planner event sinks
+# The planner reports its progress (changed g- and rsh-values,
+# vertex colors, finished steps and trace messages) to an
+# event sink instead of calling the view directly.
+#
+# Class PlannerEventSink: base class, all events are ignored
+# Class NullEventSink: headless sink, the planner skips all
+#   event calls because active is False
+# Class ViewEventSink: adapter forwarding events to DStarLiteView
+# PlanStep: record yielded by the planner after each planning step
+#
+# File: planner_events.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+import enum
+from collections import namedtuple
+
+
+# What the planner did with the vertex taken from the priority queue
+class StepAction(enum.Enum):
+    Requeued = 0  # Key was outdated, vertex queued again with the new key
+    Overconsistent = 1  # g lowered to rsh
+    Underconsistent = 2  # g raised to infinite
+
+
+# Step number and vertex x, y of a planning step
+PlanStep = namedtuple('PlanStep', ['step', 'x', 'y', 'action'])
+
+
+class PlannerEventSink(object):
+    # The planner only calls the sink if active is True
+    active = True
+
+    # The rsh-value of a vertex has changed
+    def rsh_changed(self, vertex):
+        pass
+
+    # The g-value of a vertex has changed
+    def g_changed(self, vertex):
+        pass
+
+    # A vertex has to be shown in a new color
+    def color_changed(self, vertex, color):
+        pass
+
+    # Show the changes of the last planning step
+    def refresh(self):
+        pass
+
+    # Wait until the user confirms the next planning step
+    def confirm_step(self, message):
+        pass
+
+    # Trace message of the algorithm
+    def trace(self, *args):
+        pass
+
+
+class NullEventSink(PlannerEventSink):
+    # Zero overhead: the planner does not call an inactive sink
+    active = False
+
+
+class ViewEventSink(PlannerEventSink):
+
+    # Forward the events to a DStarLiteView. Trace messages are
+    # printed on the console if verbose is True.
+    def __init__(self, view, verbose=True):
+        self.view = view
+        self.verbose = verbose
+
+    def rsh_changed(self, vertex):
+        self.view.update_rsh(vertex.x, vertex.y)
+
+    def g_changed(self, vertex):
+        self.view.update_g(vertex.x, vertex.y)
+
+    def color_changed(self, vertex, color):
+        self.view.update_color(vertex, color)
+
+    def refresh(self):
+        self.view.update()
+
+    def confirm_step(self, message):
+        self.view.show('Hint', message)
+
+    def trace(self, *args):
+        if self.verbose:
+            print(*args)
@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+############################################################
+# Class Metrics
+# Low-overhead counters and timers of the planner, the priority
+# queue and the executors. Measuring is switched on and off at
+# runtime with enable(). The hot paths check metrics.enabled
+# before they call count() or observe(), so disabled metrics
+# cost one attribute lookup.
+# The values are exported as a snapshot dict or in the
+# Prometheus text format. The values are counted by the
+# planner and the MQTT network thread and read by the refresh
+# timer of the view. Every thread counts into values of its own
+# without a lock, they are summed up when they are read.
+#
+# metrics: shared instance used by all modules
+#
+# File: planner_metrics.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+import contextlib
+import itertools
+import threading
+import time
+
+
+class Metrics(object):
+
+    # prefix: prefix of the metric names in the Prometheus export
+    def __init__(self, enabled=False, prefix='dstarlite'):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.local = threading.local()  # counters and timers of the calling thread
+        self.threads = []  # (counters, timers) of all threads which have measured
+        self.lock = threading.Lock()  # Guards the list of threads only
+
+    # Switch measuring on or off
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    # Return the counters, (name, labels) -> value, and the timers,
+    # (name, labels) -> (count, sum, max) of seconds, of the calling thread
+    def thread_values(self):
+        local = self.local
+        try:
+            return local.counters, local.timers
+        except AttributeError:
+            local.counters = {}
+            local.timers = {}
+            with self.lock:
+                self.threads.append((local.counters, local.timers))
+            return local.counters, local.timers
+
+    # Clear all values. A value measured meanwhile by another thread may be kept.
+    def reset(self):
+        with self.lock:
+            for counters, timers in self.threads:
+                counters.clear()
+                timers.clear()
+
+    # Add value to a counter. labels is a tuple of (name, value) pairs.
+    def count(self, name, value=1, labels=()):
+        try:
+            counters = self.local.counters
+        except AttributeError:
+            counters = self.thread_values()[0]
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    # Add a measured duration in seconds to a timer. The timer is replaced
+    # by a new tuple, so a reading thread never sees it half updated.
+    def observe(self, name, seconds, labels=()):
+        try:
+            timers = self.local.timers
+        except AttributeError:
+            timers = self.thread_values()[1]
+        key = (name, labels)
+        timer = timers.get(key)
+        if timer is None:
+            timers[key] = (1, seconds, seconds)
+        else:
+            timers[key] = (timer[0] + 1, timer[1] + seconds, seconds if seconds > timer[2] else timer[2])
+
+    # Return the counters and timers summed up over all threads
+    def values(self):
+        with self.lock:
+            threads = list(self.threads)
+        counters = {}
+        timers = {}
+        for thread_counters, thread_timers in threads:
+            for key, value in thread_counters.copy().items():
+                counters[key] = counters.get(key, 0) + value
+            for key, (count, total, maximum) in thread_timers.copy().items():
+                timer = timers.get(key)
+                timers[key] = (count, total, maximum) if timer is None else \
+                    (timer[0] + count, timer[1] + total, max(timer[2], maximum))
+        return counters, timers
+
+    # Context manager measuring the duration of its block (if enabled)
+    @contextlib.contextmanager
+    def timer(self, name, labels=()):
+        if not self.enabled:
+            yield
+            return
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start_time, labels)
+
+    # Return the metric name with its labels, e.g. name{command="Drive"}
+    @staticmethod
+    def full_name(name, labels):
+        if not labels:
+            return name
+        return name + '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+    # Return all values as dict: counters by name and timers with
+    # count, sum and max of their durations in seconds
+    def snapshot(self):
+        all_counters, all_timers = self.values()
+        counters = {self.full_name(name, labels): value
+                    for (name, labels), value in sorted(all_counters.items())}
+        timers = {self.full_name(name, labels): {'count': t[0], 'sum': t[1], 'max': t[2]}
+                  for (name, labels), t in sorted(all_timers.items())}
+        return {'enabled': self.enabled, 'counters': counters, 'timers': timers}
+
+    # Return all values in the Prometheus text format. Timers are
+    # exported as summaries (_count, _sum) with an extra _max gauge.
+    def prometheus(self):
+        all_counters, all_timers = self.values()
+        lines = []
+        typed = set()
+        for (name, labels), value in sorted(all_counters.items()):
+            metric = f'{self.prefix}_{name}_total'
+            if metric not in typed:
+                lines.append(f'# TYPE {metric} counter')
+                typed.add(metric)
+            lines.append(f'{self.full_name(metric, labels)} {value}')
+        for name, timers in itertools.groupby(sorted(all_timers.items()), key=lambda item: item[0][0]):
+            timers = list(timers)
+            metric = f'{self.prefix}_{name}_seconds'
+            lines.append(f'# TYPE {metric} summary')
+            for (_, labels), (count, total, _) in timers:
+                lines.append(f'{self.full_name(metric + "_count", labels)} {count}')
+                lines.append(f'{self.full_name(metric + "_sum", labels)} {total}')
+            lines.append(f'# TYPE {metric}_max gauge')
+            for (_, labels), (_, _, maximum) in timers:
+                lines.append(f'{self.full_name(metric + "_max", labels)} {maximum}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+if __name__ == "__main__":
+    metrics.enable()
+    metrics.count('queue_pushes', 3)
+    with metrics.timer('command_round_trip', (('command', 'Drive'),)):
+        time.sleep(0.01)
+    print(metrics.snapshot())
+    print(metrics.prometheus())
@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+############################################################
+# Planner state snapshots
+# save_state writes the complete search state of a
+# DStarLitePlanner (g- and rsh-values, costs, obstacles, km,
+# the open list with its keys, successor pointers, start and
+# goal) into a compressed NumPy .npz file. load_state creates
+# a planner from such a file which continues with incremental
+# re-planning at once instead of planning from scratch.
+#
+# The arrays of an array-backed grid are written and read with
+# NumPy at once, the vertices of other grids one by one.
+#
+# A custom heuristic function is not stored. Pass the same
+# heuristic to load_state again. Planners over more states per
+# cell (heading_lattice.py) are not supported.
+#
+# File: planner_state.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+import json
+
+from d_star_lite_planner import DStarLitePlanner
+from heuristics import DIAGONAL_COST
+from vertex_grid import ArrayVertexGrid, obstacle_vertices
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+STATE_VERSION = 1
+
+
+# Return the cell id of a vertex (same order as vertex_grid.py)
+def _cell_id(planner, vertex):
+    return vertex.x * planner.height + vertex.y
+
+
+def _vertex(planner, cell_id):
+    return planner.vertexGrid[int(cell_id) // planner.height][int(cell_id) % planner.height]
+
+
+# Write the planner state to path (a file name or file object)
+# Raise a ValueError for a planner with more states per cell.
+def save_state(planner, path):
+    if np is None:
+        raise ImportError('Planner snapshots need numpy (pip install numpy)')
+    if type(planner).state_vertices is not DStarLitePlanner.state_vertices:
+        raise ValueError('Planner snapshots support one vertex per cell only')
+    size = planner.width * planner.height
+    grid = planner.vertexGrid
+    if isinstance(grid, ArrayVertexGrid):
+        g = grid.g
+        rsh = grid.rsh
+        obstacle = np.zeros(size, dtype=bool)
+        obstacle[grid.obstacle_ids()] = True
+        cost = np.maximum(grid.cost, 1).astype(float)  # Obstacles of a map grid cost 1
+        successor = planner.successors.successor_ids()
+    else:
+        vertices = [vertex for column in grid for vertex in column]
+        g = np.array([vertex.g for vertex in vertices])
+        rsh = np.array([vertex.rsh for vertex in vertices])
+        cost = np.array([vertex.cost for vertex in vertices])
+        obstacle = np.array([vertex.isObstacle for vertex in vertices], dtype=bool)
+        successor = np.full(size, -1, dtype=np.int64)
+        for vertex, s in planner.successors.items():
+            if s is not None:
+                successor[_cell_id(planner, vertex)] = _cell_id(planner, s)
+    open_ids = np.array([_cell_id(planner, vertex) for vertex in planner.priorityQueue], dtype=np.int64)
+    open_keys = np.array([planner.priorityQueue.key_of(_vertex(planner, i)) for i in open_ids],
+                         dtype=float).reshape(-1, 2)
+    closed = np.array([_cell_id(planner, vertex) for vertex in planner.closed], dtype=np.int64)
+    incons = np.array([_cell_id(planner, vertex) for vertex in planner.incons], dtype=np.int64)
+    meta = {
+        'version': STATE_VERSION,
+        'width': planner.width,
+        'height': planner.height,
+        'direct_neighbors': planner.directNeighbors,
+        'diagonal_cost': planner.diagonalCost,
+        'corner_cutting': planner.cornerCutting,
+        'h_is_zero': planner.hIsZero,
+        'optimized': planner.optimized,
+        'inflation': planner.inflation,
+        'inflation_step': planner.inflationStep,
+        'epsilon': planner.epsilon,
+        'k': planner.k,
+        'start': list(planner.startCoordinates),
+        'goal': list(planner.goalCoordinates),
+        'goal_set': [[x, y, offset] for (x, y), offset in planner.goalSet.items()],
+        'goals': [[vertex.x, vertex.y, offset] for vertex, offset in planner.goals.items()],
+        'goal_node': None if planner.goalNode is None else [planner.goalNode.x, planner.goalNode.y],
+        'start_node': None if planner.startNode is None else [planner.startNode.x, planner.startNode.y],
+        'last': None if planner.lastNode is None else [planner.lastNode.x, planner.lastNode.y],
+        'plan_ready': planner.planReady,
+    }
+    np.savez_compressed(path, meta=np.array(json.dumps(meta)), g=g, rsh=rsh, cost=cost,
+                        obstacle=obstacle, successor=successor, open_ids=open_ids,
+                        open_keys=open_keys, closed=closed, incons=incons)
+
+
+# Create a planner from a state written by save_state. The other
+# arguments are passed to DStarLitePlanner.
+# Raise a ValueError if the file has an unknown version.
+def load_state(path, my_view=None, grid_backend='objects', event_sink=None, heuristic=None):
+    if np is None:
+        raise ImportError('Planner snapshots need numpy (pip install numpy)')
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data['meta']))
+        if meta['version'] != STATE_VERSION:
+            raise ValueError(f'Unknown planner state version: {meta["version"]}')
+        planner = DStarLitePlanner(my_view, grid_width=meta['width'], grid_height=meta['height'],
+                                   h_is_zero=meta['h_is_zero'], direct_neighbors=meta['direct_neighbors'],
+                                   grid_backend=grid_backend, event_sink=event_sink,
+                                   optimized=meta['optimized'], heuristic=heuristic,
+                                   inflation=meta['inflation'], inflation_step=meta['inflation_step'],
+                                   diagonal_cost=meta.get('diagonal_cost', DIAGONAL_COST),
+                                   corner_cutting=meta.get('corner_cutting', True))
+        g = data['g']
+        rsh = data['rsh']
+        cost = data['cost']
+        obstacle = data['obstacle']
+        grid = planner.vertexGrid
+        arrays = isinstance(grid, ArrayVertexGrid)
+        if arrays:
+            grid.cost[:] = cost
+            grid.obstacle[:] = obstacle
+            planner.obstacles = obstacle_vertices(grid)
+        else:
+            for column in grid:
+                for vertex in column:
+                    i = _cell_id(planner, vertex)
+                    vertex.cost = float(cost[i])
+                    if obstacle[i]:
+                        vertex.isObstacle = True
+                        planner.obstacles.add(vertex)
+        if meta['start'][0] is not None and meta['start'][0] != float('inf'):
+            planner.set_start_coordinates(*meta['start'])
+        if meta['goal'][0] is not None and meta['goal'][0] != float('inf'):
+            planner.set_goal_coordinates(*meta['goal'])
+            planner.goalNode = planner.vertexGrid[meta['goal'][0]][meta['goal'][1]]
+        if meta.get('goal_set'):
+            planner.set_goals(meta['goal_set'])
+        # Set g and rsh after the goal, set_goal_coordinates changes rsh
+        if arrays:
+            grid.g[:] = g
+            grid.rsh[:] = rsh
+            planner.successors.set_successor_ids(data['successor'])
+        else:
+            for column in grid:
+                for vertex in column:
+                    i = _cell_id(planner, vertex)
+                    vertex.g = float(g[i])
+                    vertex.rsh = float(rsh[i])
+            for i, s in enumerate(data['successor']):
+                if s >= 0:
+                    planner.successors[_vertex(planner, i)] = _vertex(planner, s)
+        for i, key in zip(data['open_ids'], data['open_keys']):
+            planner.priorityQueue.insert(_vertex(planner, i), (float(key[0]), float(key[1])))
+        planner.closed = {_vertex(planner, i) for i in data['closed']}
+        planner.incons = {_vertex(planner, i) for i in data['incons']}
+    planner.k = meta['k']
+    planner.epsilon = meta['epsilon']
+    planner.heuristic = planner.select_heuristic()
+    if meta.get('goals') is not None:
+        planner.goals = {planner.vertexGrid[x][y]: offset for x, y, offset in meta['goals']}
+    elif planner.goalNode is not None:
+        planner.goals = {planner.goalNode: 0.0}  # State written before goal sets
+    if meta.get('goal_node') is not None:
+        planner.goalNode = planner.vertexGrid[meta['goal_node'][0]][meta['goal_node'][1]]
+    if meta['start_node'] is not None:
+        # The executor moves the start node along the path
+        planner.startNode = planner.vertexGrid[meta['start_node'][0]][meta['start_node'][1]]
+    if meta['last'] is not None:
+        planner.lastNode = planner.vertexGrid[meta['last'][0]][meta['last'][1]]
+    planner.planReady = meta['plan_ready']
+    if planner.planReady:
+        planner.show_and_remember_path()
+    return planner
@@ -6,13 +6,21 @@
 # empty then the first element (index=0) has the
 # smallest key-value of all elements.
 #
+# Class IndexedPriorityQueue
+# Binary heap with a position map per item. Membership,
+# top_key are O(1), insert, pop, remove and update
+# (decrease-/increase-key) are O(log n). It is the default
+# queue of the planner. The position map can be given, e.g.
+# an ArrayIndexMap for the cells of an array grid.
+#
 # File: priority_queue.py
 # Author: Detlef Heinze 
-# Version: 1.0    Date: 22.07.2020       
+# Version: 1.1    Date: 22.07.2020       
 ###########################################################
 import heapq
 
 import vertex as vertex
+from planner_metrics import metrics
 
 
 class PriorityQueue:
@@ -60,6 +68,145 @@ class PriorityQueue:
             yield node
 
 
+class IndexedPriorityQueue:
+
+    # Initialize a new instance. positions is an empty dict-like map (default: dict)
+    def __init__(self, positions=None):
+        self.elements = []  # Heap of [key, item] entries
+        self.positions = {} if positions is None else positions  # item -> index of its entry in elements
+
+    # Return True, if the queue is empty
+    def empty(self):
+        return len(self.elements) == 0
+
+    # Return the number of elements
+    def count(self):
+        return len(self.elements)
+
+    # Insert a new item with the calculated key into the queue.
+    # If the item is already queued its key is updated instead.
+    def insert(self, item, calculated_key):
+        if item in self.positions:
+            self.update(item, calculated_key)
+            return
+        if metrics.enabled:
+            metrics.count('queue_pushes')
+        self.elements.append([calculated_key, item])
+        self.positions[item] = len(self.elements) - 1
+        self._sift_up(len(self.elements) - 1)
+
+    # Pop and return the smallest item in the queue
+    def pop(self):
+        if metrics.enabled:
+            metrics.count('queue_pops')
+        last = self.elements.pop()
+        if not self.elements:
+            del self.positions[last[1]]
+            return last[1]
+        first = self.elements[0]
+        self.elements[0] = last
+        self.positions[last[1]] = 0
+        del self.positions[first[1]]
+        self._sift_down(0)
+        return first[1]
+
+    # Return the key of the first element in the queue
+    # If the priority queue is empty return key with inf-values.
+    def top_key(self):
+        if not self.elements:
+            return float('inf'), float('inf')
+        return self.elements[0][0]
+
+    # Remove all elements
+    def clear(self):
+        self.elements = []
+        self.positions.clear()
+
+    # Return the key of a queued item
+    def key_of(self, item):
+        return self.elements[self.positions[item]][0]
+
+    # Change the key of a queued item (decrease- or increase-key)
+    def update(self, item, calculated_key):
+        if metrics.enabled:
+            metrics.count('queue_updates')
+        index = self.positions[item]
+        old_key = self.elements[index][0]
+        self.elements[index][0] = calculated_key
+        if calculated_key < old_key:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+
+    # Remove an element from the queue. Unknown elements are ignored.
+    def remove(self, node):
+        index = self.positions.pop(node, None)
+        if index is None:
+            return
+        if metrics.enabled:
+            metrics.count('queue_removes')
+        last = self.elements.pop()
+        if index < len(self.elements):
+            self.elements[index] = last
+            self.positions[last[1]] = index
+            if index > 0 and last[0] < self.elements[(index - 1) >> 1][0]:
+                self._sift_up(index)
+            else:
+                self._sift_down(index)
+
+    # Recalculate the keys of all items with key_function(item)
+    # and restore the heap order in O(n)
+    def rebuild(self, key_function):
+        for entry in self.elements:
+            entry[0] = key_function(entry[1])
+        for index in reversed(range(len(self.elements) // 2)):
+            self._sift_down(index)
+
+    # Membership test in O(1)
+    def __contains__(self, item):
+        return item in self.positions
+
+    # Iterator
+    def __iter__(self):
+        for key, node in self.elements:
+            yield node
+
+    # Move the entry at index towards the root until the heap order holds
+    def _sift_up(self, index):
+        elements = self.elements
+        positions = self.positions
+        entry = elements[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if not entry[0] < elements[parent][0]:
+                break
+            elements[index] = elements[parent]
+            positions[elements[index][1]] = index
+            index = parent
+        elements[index] = entry
+        positions[entry[1]] = index
+
+    # Move the entry at index towards the leaves until the heap order holds
+    def _sift_down(self, index):
+        elements = self.elements
+        positions = self.positions
+        size = len(elements)
+        entry = elements[index]
+        child = 2 * index + 1
+        while child < size:
+            right = child + 1
+            if right < size and elements[right][0] < elements[child][0]:
+                child = right
+            if not elements[child][0] < entry[0]:
+                break
+            elements[index] = elements[child]
+            positions[elements[index][1]] = index
+            index = child
+            child = 2 * index + 1
+        elements[index] = entry
+        positions[entry[1]] = index
+
+
 if __name__ == "__main__":
     pq = PriorityQueue()
     a = vertex.Vertex()
@@ -75,3 +222,12 @@ if __name__ == "__main__":
     bPop = pq.pop()
     print(bPop.rsh)
     print(pq.empty())
+
+    ipq = IndexedPriorityQueue()
+    ipq.insert(a, (2, 2))
+    ipq.insert(b, (1, 1))
+    print('Contains a:', a in ipq, 'TopKey:', ipq.top_key())
+    ipq.update(a, (0, 0))
+    print('TopKey after decrease-key:', ipq.top_key())
+    ipq.remove(a)
+    print('Contains a:', a in ipq, 'Elements:', ipq.count())
@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+############################################################
+# Class RayOccupancy
+# Turns the distance readings of the ultrasonic sensor of the
+# robot into obstacle changes of the planner grid. A reading
+# is a ray from the robot cell in driving direction: the
+# cells before the measured distance are seen free, the cell
+# at the distance is seen occupied. Every cell keeps the
+# log-odds of being occupied, clamped to a range. A cell
+# becomes an obstacle when its log-odds rise above
+# occupied_threshold and free again when they fall below
+# free_threshold (hysteresis), so single wrong readings do
+# not make the planner re-plan back and forth.
+# The changes are queued in the map change buffer of the
+# planner and re-planned in batches by the executor.
+#
+# File: ray_occupancy.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+from map_changes import ChangeType, MapChange
+
+# Move directions of the headings (y grows to the south)
+DIRECTIONS = {'North': (0, -1), 'East': (1, 0), 'South': (0, 1), 'West': (-1, 0)}
+
+
+class RayOccupancy(object):
+
+    # cell_size: edge of a cell in the unit of the readings (cm)
+    # max_range: readings from this distance on see no obstacle
+    # log_hit, log_miss: log-odds added for a cell seen occupied or free
+    def __init__(self, planner, cell_size=20, max_range=150, log_hit=0.85, log_miss=-0.4,
+                 occupied_threshold=1.2, free_threshold=-0.8, log_min=-2.0, log_max=3.5):
+        self.planner = planner
+        self.cellSize = cell_size
+        self.maxRange = max_range
+        self.logHit = log_hit
+        self.logMiss = log_miss
+        self.occupiedThreshold = occupied_threshold
+        self.freeThreshold = free_threshold
+        self.logMin = log_min
+        self.logMax = log_max
+        self.logOdds = {}  # (x, y) -> log-odds of the cells seen so far
+        self.occupied = {}  # (x, y) -> obstacle state of the cells seen so far
+
+    # Return the cells (x, y) of the ray from the robot cell in direction
+    # orientation, and if the reading hits an obstacle in the grid, its cell
+    def ray_cells(self, x, y, orientation, distance):
+        dx, dy = DIRECTIONS[orientation]
+        if distance < self.maxRange:
+            free_count = int(distance // self.cellSize)  # Cells before the obstacle
+            hit = (x + dx * (free_count + 1), y + dy * (free_count + 1))
+        else:
+            free_count = int(self.maxRange // self.cellSize)
+            hit = None
+        cells = []
+        for i in range(1, free_count + 1):
+            cell = (x + dx * i, y + dy * i)
+            if not (0 <= cell[0] < self.planner.width and 0 <= cell[1] < self.planner.height):
+                return cells, None
+            cells.append(cell)
+        if hit is not None and not (0 <= hit[0] < self.planner.width and 0 <= hit[1] < self.planner.height):
+            hit = None
+        return cells, hit
+
+    # Add log_odds to a cell. Return the map change if the cell changes its state.
+    def update_cell(self, cell, log_odds):
+        if cell not in self.logOdds:
+            # The map of the planner is the prior
+            obstacle = self.planner.vertexGrid[cell[0]][cell[1]].isObstacle
+            self.occupied[cell] = obstacle
+            self.logOdds[cell] = self.occupiedThreshold if obstacle else 0.0
+        value = min(self.logMax, max(self.logMin, self.logOdds[cell] + log_odds))
+        self.logOdds[cell] = value
+        if not self.occupied[cell] and value >= self.occupiedThreshold:
+            self.occupied[cell] = True
+            return MapChange(cell[0], cell[1], ChangeType.ObstacleAdded)
+        if self.occupied[cell] and value <= self.freeThreshold:
+            self.occupied[cell] = False
+            return MapChange(cell[0], cell[1], ChangeType.ObstacleRemoved)
+        return None
+
+    # Update the cells seen by a reading of the robot at cell (x, y) looking
+    # in direction orientation. The changes are queued for re-planning.
+    # Return the list of changes.
+    def update(self, x, y, orientation, distance):
+        cells, hit = self.ray_cells(x, y, orientation, distance)
+        changes = [self.update_cell(cell, self.logMiss) for cell in cells]
+        if hit is not None:
+            changes.append(self.update_cell(hit, self.logHit))
+        changes = [change for change in changes if change is not None]
+        for change in changes:
+            self.planner.queue_map_change(change)
+        return changes
+
+
+if __name__ == '__main__':
+    from d_star_lite_planner import DStarLitePlanner
+    planner = DStarLitePlanner(None, grid_width=8, grid_height=3, direct_neighbors=True)
+    rays = RayOccupancy(planner)
+    for reading in (95, 98, 120, 93):
+        print(reading, rays.update(0, 1, 'East', reading))
+    print('Due:', len(planner.mapChanges), 'changes')
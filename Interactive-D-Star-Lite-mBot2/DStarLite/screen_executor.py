@@ -47,6 +47,7 @@ class ScreenExecutor(object):
             print('Starting plan execution')
             result, reply = self.put_robot_at_init_pos()
             abort = False
+            improved = False  # Anytime D*: improve the plan once per step
             # Now execute the plan including orientation of the robot
             while self.planner.startNode != self.planner.goalNode \
                     and not abort and result:
@@ -54,6 +55,32 @@ class ScreenExecutor(object):
                 replanned = False
                 while step < len(self.planner.actualPath) \
                         and not replanned and result:
+                    if self.planner.map_changes_due():
+                        # Map changes have been reported meanwhile.
+                        # Re-plan once for all of them.
+                        print('\nReplanning with', len(self.planner.mapChanges), 'map changes')
+                        abort = not self.planner.replan_pending_changes()
+                        self.planner.show_and_remember_path()
+                        self.view.update_color(self.planner.startNode, 'blue100')
+                        replanned = True
+                        print('Replanning done\n')
+                        continue
+                    if self.planner.pendingGoal is not None:
+                        # The goal has been moved: re-plan reusing the search
+                        print('\nNew goal', self.planner.pendingGoal)
+                        abort = not self.planner.change_pending_goal()
+                        self.planner.show_and_remember_path()
+                        self.view.update_color(self.planner.startNode, 'blue100')
+                        replanned = True
+                        continue
+                    if self.planner.can_improve_plan() and not improved:
+                        # Anytime D*: improve the plan while the robot drives
+                        abort = not self.planner.improve_plan()
+                        self.planner.show_and_remember_path()
+                        self.view.update_color(self.planner.startNode, 'blue100')
+                        improved = True
+                        replanned = True
+                        continue
                     next_vertex = self.planner.actualPath[step]
                     result, reply = self.orient_robot_to(next_vertex)
                     self.delay()
@@ -67,7 +94,6 @@ class ScreenExecutor(object):
                             self.planner.obstacles.add(next_vertex)
                             self.view.update_color(next_vertex, 'red')
                         print('Replanning!')
-                        self.planner.clear_old_path(step)
                         abort = not self.planner.replanning(next_vertex)
                         self.planner.show_and_remember_path()
                         self.view.update_color(self.planner.startNode, 'blue100')
@@ -78,6 +104,7 @@ class ScreenExecutor(object):
                             result, reply = self.move_robot(next_vertex, self.actualOrientation)
                         self.delay()
                         step += 1
+                        improved = False
             if not abort and result:
                 result, reply = self.action_at_end()
                 if result:
@@ -184,7 +211,7 @@ class ScreenExecutor(object):
         if command_robot:
             # To be overwritten in subclasses for real robots
             result, reply = self.command_robot(orientation)
-        self.planner.startNode = to_vertex
+        self.planner.startNode = self.planner.robot_vertex(to_vertex, orientation)
         self.actualOrientation = orientation
         return result, reply
 
@@ -0,0 +1,196 @@
+#!/usr/bin/python3
+############################################################
+# Class SegmentExecutor
+# The class SegmentExecutor executes a path-plan with a robot
+# connected by mqtt like CloudExecutor, but without a round
+# trip per cell: the path is compiled into motion segments
+# (turn, drive n cells) which are uploaded in one message.
+# The robot runs them from a local queue and reports every
+# move, so the robot on screen follows the real one. If the
+# plan has to be changed (map changes, new goal, Anytime D*)
+# the queue is cancelled and the new path is uploaded.
+# The distance readings of the robot are ray-cast at the
+# position of the progress report they follow.
+#
+# This class inherits from CloudExecutor.
+#
+# File: segment_executor.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+import time
+from queue import Empty
+
+from cloud_executor import CloudExecutor
+from mqtt_service import command_codes
+
+progress_timeout = 10  # seconds without progress report until the robot counts as lost
+
+
+# Encode segments for the 'Plan' command, e.g. b'L,D3,T,D2'
+def encode_segments(segments):
+    return b','.join(command_codes[command] + (str(cells).encode() if command == 'Drive' else b'')
+                     for command, cells, _ in segments)
+
+
+class SegmentExecutor(CloudExecutor):
+
+    def __init__(self, my_view, my_planner):
+        print('\nCreating Segment Executor')
+        CloudExecutor.__init__(self, my_view, my_planner)
+
+    # Compile a path into motion segments [command, cells, orientation after the
+    # segment]: turns and drives over several cells in the same direction.
+    def compile_segments(self, path, orientation):
+        segments = []
+        for vertex, next_vertex in zip(path, path[1:]):
+            new_orientation = self.calc_orientation(vertex, next_vertex)
+            command = self.direction_dict[orientation][new_orientation]
+            if command != 'Drive':
+                segments.append([command, 0, new_orientation])
+                orientation = new_orientation
+            if segments and segments[-1][0] == 'Drive':
+                segments[-1][1] += 1
+            else:
+                segments.append(['Drive', 1, orientation])
+        return segments
+
+    # Overwritten method of superclass.
+    # Upload the path from the robot position, follow the progress of the
+    # robot and upload a new path after every re-planning.
+    # Return True if execution was successfully, False otherwise.
+    # Return also a string describing the result
+    def execute_plan(self):
+        if not self.execution_allowed():
+            return False, "Plan incompatible with executor. Check direct neighbors setting (Tab: Planning)"
+        result = self.connect_real_robot()
+        if not result[0]:  # no connection possible
+            return result[0], result[1]
+        print('Starting plan execution with segments')
+        result, reply = self.put_robot_at_init_pos()
+        abort = False
+        while self.planner.startNode != self.planner.goalNode and not abort and result:
+            path = self.planner.actualPath[self.robot_position(self.planner.actualPath):]
+            segments = self.compile_segments(path, self.actualOrientation)
+            seq, reply = self.robot.send_plan(encode_segments(segments))
+            print('Plan', seq, 'uploaded:', [segment[:2] for segment in segments], reply)
+            if reply != b'queued':
+                result = False
+                break
+            event, blocked, cancelled = self.follow_plan(seq, path, segments)
+            if event == 'timeout':
+                result = False
+                break
+            if event == 'done' and not cancelled:
+                break
+            # A cancelled plan may also be done: re-plan for the change anyway
+            abort = not self.replan(blocked)
+        if not abort and result:
+            result, reply = self.action_at_end()
+            if result:
+                print('Goal reached.')
+                return True, 'Goal reached.'
+            else:
+                return False, 'Robot error at goal'
+        elif abort:
+            print('No path to goal exists')
+            self.action_at_end()
+            return False, 'No path to goal exists'
+        else:
+            print('Abort with robot connection error')
+            return result, 'Abort with robot connection error'
+
+    # Follow the progress reports of plan seq and move the robot on screen.
+    # Update the map with the distance readings taken at the reported positions.
+    # Anytime D*: improve the plan once per move while the robot drives on.
+    # Cancel the plan when it has to be changed and wait for its final report,
+    # so the robot on screen is at the position of the real one.
+    # Return the final event ('done', 'obstacle', 'stopped' or 'timeout'),
+    # the vertex found blocked (or None) and if the plan has been cancelled.
+    def follow_plan(self, seq, path, segments):
+        start_orientation = self.actualOrientation
+        cancelled = False
+        blocked = None
+        last_report = time.monotonic()
+        self.robot.take_distances()  # Readings of earlier positions
+        readings = []
+        while True:
+            improved = False
+            try:
+                report_seq, event, index, cells, number = self.robot.progress.get(timeout=0.1)
+            except Empty:
+                report_seq = None
+            if report_seq == seq:
+                last_report = time.monotonic()
+                if event in ('cell', 'turn'):
+                    orientation = segments[index][2]
+                elif index > 0:
+                    orientation = segments[index - 1][2]  # Segment index has not been started
+                else:
+                    orientation = start_orientation
+                if self.planner.robot_vertex(path[cells], orientation) != self.planner.startNode or \
+                        orientation != self.actualOrientation:
+                    self.move_robot(path[cells], orientation, command_robot=False)
+                # The robot sends the readings of a position before its report
+                readings += self.robot.take_distances()
+                for reading_number, distance in readings:
+                    if reading_number < number:
+                        self.rays.update(self.planner.startNode.x, self.planner.startNode.y,
+                                         self.actualOrientation, distance)
+                readings = [reading for reading in readings if reading[0] >= number]
+                if not cancelled and event in ('cell', 'turn') and self.planner.can_improve_plan():
+                    self.planner.improve_plan()
+                    self.planner.show_and_remember_path()
+                    self.view.update_color(self.planner.startNode, 'blue100')
+                    improved = True
+                if event == 'obstacle':
+                    blocked = path[cells + 1]
+                if event in ('done', 'obstacle', 'stopped'):
+                    return event, blocked, cancelled
+            elif time.monotonic() - last_report > progress_timeout:
+                return 'timeout', None, cancelled
+            if cancelled:
+                continue
+            position = self.robot_position(path)
+            blocked = next((vertex for vertex in path[position + 1:] if vertex.isObstacle), None)
+            if blocked is not None or self.planner.map_changes_due() or \
+                    self.planner.pendingGoal is not None or \
+                    (improved and self.planner.actualPath[1:] != path[position + 1:]):
+                # The plan will change: stop the robot after its running move.
+                # The robot sends the final report also if the plan has just
+                # been finished ('idle').
+                print('Cancelling plan', seq, self.robot.send('Cancel'))
+                cancelled = True
+
+    # Return the index of the robot cell in path. The robot may have another
+    # heading than the path vertex of its cell (see heading_lattice.py).
+    def robot_position(self, path):
+        start = self.planner.startNode
+        return next(i for i, vertex in enumerate(path) if vertex.x == start.x and vertex.y == start.y)
+
+    # Re-plan after the robot has stopped. blocked is a vertex of the path
+    # which has become an obstacle or None. Return if a plan exists.
+    def replan(self, blocked):
+        if blocked is not None:
+            print('\nNew obstacle at', blocked.x, blocked.y)
+            if not blocked.isObstacle:
+                # Reported by the robot
+                blocked.isObstacle = True
+                self.planner.obstacles.add(blocked)
+                self.view.update_color(blocked, 'red')
+            result = self.planner.replanning(blocked)
+        elif self.planner.map_changes_due():
+            print('\nReplanning with', len(self.planner.mapChanges), 'map changes')
+            result = self.planner.replan_pending_changes()
+        elif self.planner.pendingGoal is not None:
+            print('\nNew goal', self.planner.pendingGoal)
+            result = self.planner.change_pending_goal()
+        else:
+            # The plan has been improved: the robot may have left the path
+            # with its running move, search from the robot position
+            result = self.planner.replan_changed_vertices([])
+        self.planner.show_and_remember_path()
+        self.view.update_color(self.planner.startNode, 'blue100')
+        print('Replanning done\n')
+        return result
@@ -0,0 +1,6 @@
+# The modules of DStarLite are imported without package, like the
+# scripts in this directory import each other
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
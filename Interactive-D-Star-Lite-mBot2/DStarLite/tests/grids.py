@@ -0,0 +1,101 @@
+############################################################
+# Helpers of the tests: random grids and a Dijkstra search
+# as reference for the path costs of the planners.
+#
+# File: grids.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+import heapq
+import itertools
+import random
+
+import pytest
+
+from d_star_lite_planner import DStarLitePlanner
+
+INF = float('inf')
+
+# Planner variants of the planner tests
+VARIANTS = [
+    pytest.param(dict(optimized=optimized, direct_neighbors=direct, grid_backend=backend),
+                 id=f'{"optimized" if optimized else "basic"}-{4 if direct else 8}-{backend}')
+    for optimized in (False, True) for direct in (False, True) for backend in ('objects', 'arrays')
+]
+
+
+# Add the cell (x, y) to the obstacles of the planner
+def add_obstacle(planner, x, y):
+    vertex = planner.vertexGrid[x][y]
+    vertex.isObstacle = True
+    planner.obstacles.add(vertex)
+
+
+# Make the cell (x, y) free
+def remove_obstacle(planner, x, y):
+    vertex = planner.vertexGrid[x][y]
+    vertex.isObstacle = False
+    planner.obstacles.discard(vertex)
+
+
+# Create a headless planner with random obstacles and cost factors,
+# start top left and goal bottom right
+def random_planner(seed, width=12, height=9, density=0.25, costs=False, planner_class=DStarLitePlanner,
+                   **kwargs):
+    planner = planner_class(None, grid_width=width, grid_height=height, **kwargs)
+    rng = random.Random(seed)
+    for x in range(width):
+        for y in range(height):
+            if (x, y) in ((0, 0), (width - 1, height - 1)):
+                continue
+            if rng.random() < density:
+                add_obstacle(planner, x, y)
+            elif costs and rng.random() < 0.3:
+                planner.vertexGrid[x][y].cost = rng.choice([1.5, 2.0, 3.0])
+    planner.set_start_coordinates(0, 0)
+    planner.set_goal_coordinates(width - 1, height - 1)
+    return planner
+
+
+# Return the cost of the cheapest path from every reached vertex to one of
+# the sources (dict vertex -> offset cost), searched backwards over the
+# predecessors and move costs of the planner
+def path_costs(planner, sources):
+    costs = {}
+    counter = itertools.count()  # Ties are not decided by the vertices
+    queue = [(offset, next(counter), vertex) for vertex, offset in sources.items() if not vertex.isObstacle]
+    heapq.heapify(queue)
+    while queue:
+        cost, _, vertex = heapq.heappop(queue)
+        if vertex in costs:
+            continue
+        costs[vertex] = cost
+        for pred in planner.predecessors(vertex):
+            move = planner.neighbor_cost(pred, vertex)
+            if move != INF and pred not in costs:
+                heapq.heappush(queue, (cost + move, next(counter), pred))
+    return costs
+
+
+# Return the cost of the cheapest path from the start vertex of the planner
+# to its goals
+def start_cost(planner):
+    return path_costs(planner, planner.goals).get(planner.startNode, INF)
+
+
+# Return the cost of a path of vertices with the move costs of the planner
+def cost_of(planner, path):
+    return sum(planner.neighbor_cost(a, b) for a, b in zip(path, path[1:]))
+
+
+# The planned path has the cost of the cheapest path (g of the start)
+# and leads from the start to a goal over neighbors
+def check_plan(planner):
+    expected = start_cost(planner)
+    assert planner.planReady == (expected != INF)
+    if planner.planReady:
+        assert planner.startNode.g == pytest.approx(expected)
+        path = planner.actualPath
+        assert path[0] == planner.startNode and path[-1] in planner.goals
+        assert cost_of(planner, path) + planner.goals[path[-1]] == pytest.approx(expected)
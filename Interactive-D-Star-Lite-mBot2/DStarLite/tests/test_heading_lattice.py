@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from grids import INF, path_costs, random_planner, start_cost
+from heading_lattice import DIRECTIONS, HEADINGS, HeadingLatticePlanner
+from map_changes import ChangeType, MapChange
+
+
+def lattice(seed, **kwargs):
+    planner = random_planner(seed, width=10, height=8, density=0.2, costs=True, planner_class=HeadingLatticePlanner,
+                             start_heading=HEADINGS[seed % 4], turn_time=0.4 + seed % 3 * 0.3, **kwargs)
+    planner.main_planning('Fast')
+    return planner
+
+
+# g of the start state is the time of the fastest drive to the goal cell
+# and the path drives from cell to cell in the heading of its states
+def check_plan(planner):
+    expected = start_cost(planner)
+    assert planner.planReady == (expected != INF)
+    if planner.planReady:
+        assert planner.startNode.g == pytest.approx(expected)
+        path = planner.actualPath
+        assert path[0] is planner.startNode
+        assert [path[-1].x, path[-1].y] == planner.goalCoordinates
+        for a, b in zip(path, path[1:]):
+            assert (b.x - a.x, b.y - a.y) == DIRECTIONS[b.heading]
+
+
+@pytest.mark.parametrize('optimized', (False, True))
+@pytest.mark.parametrize('seed', range(6))
+def test_plan_matches_dijkstra(optimized, seed):
+    check_plan(lattice(seed, optimized=optimized))
+
+
+@pytest.mark.parametrize('optimized', (False, True))
+@pytest.mark.parametrize('seed', range(4))
+def test_replan_and_goal_change_match_dijkstra(optimized, seed):
+    planner = lattice(seed, optimized=optimized)
+    rng = random.Random(seed)
+    for _ in range(3):
+        if not planner.planReady or len(planner.actualPath) < 4:
+            break
+        # The robot drives to the next cell with the heading of the path
+        planner.startNode = planner.actualPath[1]
+        blocked = rng.choice(planner.actualPath[2:-1])
+        planner.replan_map_changes([MapChange(blocked.x, blocked.y, ChangeType.ObstacleAdded)])
+        planner.show_and_remember_path()
+        check_plan(planner)
+    if planner.planReady:
+        free = [(cell.x, cell.y) for column in planner.vertexGrid for cell in column if not cell.isObstacle]
+        planner.change_goal(*rng.choice(free))
+        planner.show_and_remember_path()
+        check_plan(planner)
+
+
+def test_turns_cost_time():
+    planner = HeadingLatticePlanner(None, grid_width=3, grid_height=3, start_heading='North',
+                                    drive_time=1.0, turn_time=0.5, turn180_time=0.8)
+    planner.set_start_coordinates(0, 0)
+    planner.set_goal_coordinates(0, 2)
+    planner.main_planning('Fast')
+    assert planner.startNode.g == pytest.approx(0.8 + 2.0)  # Turn back, drive two cells
+    assert planner.cell_values(0, 1)[0] == pytest.approx(1.0)
+    east = planner.robot_vertex(planner.vertexGrid[0][1], 'East')
+    assert east.heading == HEADINGS.index('East') and east.g == pytest.approx(1.5)
+    with pytest.raises(ValueError):
+        HeadingLatticePlanner(None, turn_time=0)
+
+
+def test_lattice_on_the_grid_of_a_planner():
+    planner = random_planner(2, width=10, height=8, density=0.2, direct_neighbors=True)
+    planner.main_planning('Fast')
+    states = HeadingLatticePlanner.from_planner(planner, start_heading='East', turn_time=1e-6, turn180_time=2e-6)
+    states.main_planning('Fast')
+    # With turns almost for free the driving time is the path cost on the grid
+    assert states.startNode.g == pytest.approx(planner.startNode.g, abs=1e-4)
+    assert path_costs(states, states.goals)[states.startNode] == pytest.approx(states.startNode.g)
@@ -0,0 +1,47 @@
+import math
+
+import pytest
+
+from grids import INF, path_costs, random_planner
+from heuristics import DIAGONAL_COST, LandmarkHeuristic, default_heuristic, manhattan, octile, octile_for, zero
+from vertex import Vertex
+
+
+def test_heuristic_values():
+    a, b = Vertex(1, 2), Vertex(4, 8)
+    assert zero(a, b) == 0
+    assert manhattan(a, b) == 9
+    assert octile(a, b) == pytest.approx(6 + (DIAGONAL_COST - 1) * 3)
+    assert octile_for(DIAGONAL_COST) is octile
+    assert octile_for(math.sqrt(2))(a, b) == pytest.approx(3 + 3 * math.sqrt(2))
+    assert default_heuristic(True, False) is zero
+    assert default_heuristic(False, True) is manhattan
+    assert default_heuristic(False, False) is octile
+
+
+# The heuristic of every vertex to the start is at most its path cost
+# (admissible) and changes by at most the cost of a move (consistent)
+def check_heuristic(planner, heuristic):
+    start = planner.vertexGrid[0][0]
+    costs = path_costs(planner, {start: 0.0})
+    for vertex, cost in costs.items():
+        assert heuristic(vertex, start) <= cost + 1e-9
+        for n in planner.neighbors(vertex):
+            move = planner.neighbor_cost(vertex, n)
+            if move != INF:
+                assert heuristic(vertex, start) <= move + heuristic(n, start) + 1e-9
+
+
+@pytest.mark.parametrize('direct_neighbors', (False, True))
+@pytest.mark.parametrize('diagonal_cost', (DIAGONAL_COST, math.sqrt(2)))
+def test_default_heuristic_admissible_and_consistent(direct_neighbors, diagonal_cost):
+    planner = random_planner(7, costs=True, direct_neighbors=direct_neighbors, diagonal_cost=diagonal_cost)
+    check_heuristic(planner, default_heuristic(False, direct_neighbors, diagonal_cost))
+
+
+def test_landmark_heuristic():
+    planner = random_planner(8, density=0.1, costs=True, direct_neighbors=True)
+    heuristic = LandmarkHeuristic(planner, [(11, 8), (0, 8), (11, 0)])
+    check_heuristic(planner, heuristic)
+    start, goal = planner.vertexGrid[0][0], planner.vertexGrid[11][8]
+    assert heuristic(goal, start) == pytest.approx(path_costs(planner, {start: 0.0})[goal])
@@ -0,0 +1,75 @@
+import pytest
+
+from grids import check_plan, random_planner
+from map_changes import ChangeType, MapChange, MapChangeBuffer
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_changes_of_a_cell_are_coalesced():
+    buffer = MapChangeBuffer(clock=Clock())
+    buffer.add(MapChange(1, 2, ChangeType.ObstacleAdded))
+    buffer.extend([MapChange(3, 1, ChangeType.CostChanged, 2.5), MapChange(1, 2, ChangeType.ObstacleRemoved)])
+    assert len(buffer) == 2
+    assert buffer.take() == [MapChange(3, 1, ChangeType.CostChanged, 2.5),
+                             MapChange(1, 2, ChangeType.ObstacleRemoved)]
+    assert len(buffer) == 0 and buffer.take() == []
+
+
+def test_due_after_debounce():
+    clock = Clock()
+    buffer = MapChangeBuffer(debounce=0.2, max_delay=1.0, clock=clock)
+    assert not buffer.due()
+    buffer.add(MapChange(0, 0, ChangeType.ObstacleAdded))
+    clock.now = 0.1
+    assert not buffer.due()
+    clock.now = 0.2
+    assert buffer.due()
+
+
+def test_due_after_max_delay_with_changes_coming_in():
+    clock = Clock()
+    buffer = MapChangeBuffer(debounce=0.2, max_delay=1.0, clock=clock)
+    for step in range(12):
+        clock.now = step * 0.1
+        buffer.add(MapChange(step, 0, ChangeType.ObstacleAdded))
+        assert buffer.due() == (clock.now >= 1.0)
+    buffer.take()
+    assert not buffer.due()
+
+
+@pytest.mark.parametrize('change', [MapChange(3, 3, ChangeType.CostChanged, 0.5),
+                                    MapChange(-1, 2, ChangeType.ObstacleAdded),
+                                    MapChange(2, 9, ChangeType.ObstacleRemoved)])
+def test_invalid_batch_changes_nothing(change):
+    planner = random_planner(0, density=0)
+    planner.main_planning('Fast')
+    g = [[vertex.g for vertex in column] for column in planner.vertexGrid]
+    with pytest.raises(ValueError):
+        planner.replan_map_changes([MapChange(2, 2, ChangeType.ObstacleAdded), change])
+    assert not planner.vertexGrid[2][2].isObstacle and not planner.obstacles
+    assert all(vertex.cost == 1 for column in planner.vertexGrid for vertex in column)
+    assert g == [[vertex.g for vertex in column] for column in planner.vertexGrid]
+
+
+def test_pending_map_changes_are_replanned_once_due():
+    planner = random_planner(0, density=0, direct_neighbors=True)
+    planner.main_planning('Fast')
+    now = [0.0]
+    planner.mapChanges.clock = lambda: now[0]
+    for vertex in planner.actualPath[2:4]:
+        planner.queue_map_change(MapChange(vertex.x, vertex.y, ChangeType.ObstacleAdded))
+    assert not planner.map_changes_due()
+    now[0] = 1.0
+    assert planner.map_changes_due()
+    assert planner.replan_pending_changes()
+    planner.show_and_remember_path()
+    assert len(planner.mapChanges) == 0
+    check_plan(planner)
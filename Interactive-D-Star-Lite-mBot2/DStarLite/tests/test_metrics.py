@@ -0,0 +1,48 @@
+import threading
+
+from planner_metrics import Metrics
+
+
+def test_values_of_all_threads_are_summed_up():
+    metrics = Metrics(enabled=True)
+
+    def measure():
+        for _ in range(10000):
+            metrics.count('queue_pushes')
+        metrics.observe('replan', 0.5)
+
+    threads = [threading.Thread(target=measure) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.observe('replan', 2.0)
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {'queue_pushes': 40000}
+    assert snapshot['timers'] == {'replan': {'count': 5, 'sum': 4.0, 'max': 2.0}}
+    metrics.reset()
+    assert metrics.snapshot()['counters'] == {} and metrics.snapshot()['timers'] == {}
+
+
+# After its first value a thread counts without the lock
+def test_count_does_not_wait_for_the_lock():
+    metrics = Metrics(enabled=True)
+    metrics.count('expansions')
+    with metrics.lock:
+        metrics.count('expansions', 2)
+        metrics.observe('replan', 0.1)
+    assert metrics.values()[0] == {('expansions', ()): 3}
+
+
+def test_prometheus_export():
+    metrics = Metrics(enabled=True)
+    metrics.count('commands', labels=(('command', 'Drive'),))
+    metrics.observe('command_round_trip', 0.25, labels=(('command', 'Drive'),))
+    assert metrics.prometheus() == (
+        '# TYPE dstarlite_commands_total counter\n'
+        'dstarlite_commands_total{command="Drive"} 1\n'
+        '# TYPE dstarlite_command_round_trip_seconds summary\n'
+        'dstarlite_command_round_trip_seconds_count{command="Drive"} 1\n'
+        'dstarlite_command_round_trip_seconds_sum{command="Drive"} 0.25\n'
+        '# TYPE dstarlite_command_round_trip_seconds_max gauge\n'
+        'dstarlite_command_round_trip_seconds_max{command="Drive"} 0.25\n')
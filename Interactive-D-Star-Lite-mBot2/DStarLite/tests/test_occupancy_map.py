@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from d_star_lite_planner import DStarLitePlanner
+from grids import path_costs
+from map_changes import ChangeType, MapChange
+from occupancy_map import OBSTACLE, create_grid, load_grid, save_map
+
+
+# Obstacles of a loaded map are obstacles of the planner and have a cost
+# factor of a free cell when they are removed
+def test_loaded_grid_obstacles():
+    cells = np.ones(5 * 4, dtype=np.uint8)
+    cells[[6, 7, 9]] = OBSTACLE
+    cells[10] = 3
+    grid = create_grid(5, 4, cells)
+    planner = DStarLitePlanner(None, vertex_grid=grid)
+    assert {(vertex.x, vertex.y) for vertex in planner.obstacles} == {(1, 2), (1, 3), (2, 1)}
+    assert grid.vertex(2, 2).cost == 3
+    planner.set_start_coordinates(0, 0)
+    planner.set_goal_coordinates(4, 3)
+    planner.main_planning('Fast')
+    assert planner.startNode.g == pytest.approx(path_costs(planner, planner.goals)[planner.startNode])
+    vertex = grid.vertex(1, 2)
+    vertex.isObstacle = False
+    assert vertex.cost == 1
+
+
+# The grid reads and writes the memory-mapped cells of the file, the file
+# itself is not changed (copy-on-write)
+def test_map_file_is_mapped_into_the_grid(tmp_path):
+    cells = np.arange(6 * 4, dtype=np.uint8) % 4
+    save_map(tmp_path / 'floor.dslmap', cells, 6, 4)
+    grid = load_grid(tmp_path / 'floor.dslmap')
+    assert isinstance(grid.cost, np.memmap) and grid.obstacle is None
+    assert list(grid.obstacle_ids()) == [0, 4, 8, 12, 16, 20]
+    assert grid.vertex(0, 3).cost == 3 and grid.vertex(1, 0).isObstacle
+    grid.vertex(0, 3).isObstacle = True
+    assert grid.cost[3] == OBSTACLE
+    assert load_grid(tmp_path / 'floor.dslmap').cost[3] == 3
+
+
+def test_map_costs_are_whole_numbers():
+    planner = DStarLitePlanner(None, vertex_grid=create_grid(5, 4, np.ones(5 * 4, dtype=np.uint8)))
+    planner.set_cell_cost(1, 1, 255)
+    for cost in (2.5, 256, 1000):
+        with pytest.raises(ValueError):
+            planner.set_cell_cost(1, 1, cost)
+        with pytest.raises(ValueError):
+            planner.replan_map_changes([MapChange(2, 2, ChangeType.CostChanged, cost)])
+    assert planner.vertexGrid[1][1].cost == 255 and planner.vertexGrid[2][2].cost == 1
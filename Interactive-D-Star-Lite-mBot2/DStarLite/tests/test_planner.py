@@ -0,0 +1,188 @@
+import math
+import random
+
+import pytest
+
+from grids import INF, VARIANTS, add_obstacle, check_plan, path_costs, random_planner, remove_obstacle
+from map_changes import ChangeType, MapChange
+
+
+@pytest.mark.parametrize('variant', VARIANTS)
+@pytest.mark.parametrize('seed', range(6))
+def test_plan_matches_dijkstra(variant, seed):
+    planner = random_planner(seed, costs=seed % 2 == 1, h_is_zero=seed % 3 == 0, **variant)
+    planner.main_planning('Fast')
+    check_plan(planner)
+
+
+@pytest.mark.parametrize('variant', VARIANTS)
+@pytest.mark.parametrize('seed', range(4))
+def test_replan_matches_dijkstra(variant, seed):
+    planner = random_planner(seed, density=0.15, **variant)
+    planner.main_planning('Fast')
+    rng = random.Random(seed)
+    for _ in range(5):
+        if not planner.planReady or len(planner.actualPath) < 3:
+            break
+        planner.startNode = planner.actualPath[1]  # The robot moves one cell
+        blocked = rng.choice(planner.actualPath[2:-1] or planner.actualPath[-1:])
+        free = rng.choice(list(planner.obstacles)) if planner.obstacles else blocked
+        changes = [MapChange(free.x, free.y, ChangeType.ObstacleRemoved),
+                   MapChange(blocked.x, blocked.y, ChangeType.ObstacleAdded),
+                   MapChange(rng.randrange(planner.width), rng.randrange(planner.height),
+                             ChangeType.CostChanged, 2.5)]
+        planner.replan_map_changes(changes)
+        planner.show_and_remember_path()
+        check_plan(planner)
+
+
+# rsh-values shifted by a goal change carry rounding errors. The raise of
+# the best successor is found over the successor pointer all the same.
+def test_raised_successor_recalculates_rounded_rsh():
+    planner = random_planner(0, density=0, optimized=True)
+    planner.main_planning('Fast')
+    vertex, successor = planner.actualPath[2:4]
+    assert planner.successors[vertex] == successor
+    vertex.rsh -= 1e-12
+    successor.g = INF
+    planner.raise_rsh(vertex, successor)
+    assert planner.successors[vertex] != successor
+    assert vertex.rsh == min(planner.neighbor_cost(vertex, n) + n.g for n in planner.neighbors(vertex))
+
+
+def test_neighbor_costs():
+    planner = random_planner(0, density=0)
+    grid = planner.vertexGrid
+    grid[1][1].cost = 3.0
+    assert planner.neighbor_cost(grid[0][1], grid[1][1]) == 2.0
+    assert planner.neighbor_cost(grid[0][0], grid[1][1]) == pytest.approx(1.4 * 2.0)
+    add_obstacle(planner, 2, 2)
+    assert planner.neighbor_cost(grid[1][1], grid[2][2]) == INF
+    assert len(planner.neighbors(grid[0][0])) == 3
+    assert len(planner.neighbors(grid[5][5])) == 8
+
+
+@pytest.mark.parametrize('optimized', (False, True))
+def test_anytime_improves_to_optimal_plan(optimized):
+    planner = random_planner(2, width=20, height=15, density=0.2, optimized=optimized,
+                             inflation=3.0, inflation_step=1.0)
+    planner.main_planning('Fast')
+    assert planner.planReady and planner.epsilon == 3.0
+    while planner.can_improve_plan():
+        planner.improve_plan()
+    planner.show_and_remember_path()
+    assert planner.epsilon == 1.0
+    check_plan(planner)
+
+
+def test_time_budget_continues_planning():
+    planner = random_planner(4, width=20, height=15, density=0.2)
+    planner.main_planning('Fast', max_expansions=5)
+    assert not planner.converged and not planner.planReady
+    while not planner.continue_planning(max_expansions=5):
+        pass
+    check_plan(planner)
+
+
+@pytest.mark.parametrize('optimized', (False, True))
+def test_moving_ai_move_rules(optimized):
+    planner = random_planner(3, direct_neighbors=False, optimized=optimized,
+                             diagonal_cost=math.sqrt(2), corner_cutting=False)
+    add_obstacle(planner, 1, 0)
+    remove_obstacle(planner, 0, 1)
+    # No diagonal move past the corner of an obstacle
+    assert planner.neighbor_cost(planner.vertexGrid[0][0], planner.vertexGrid[1][1]) == INF
+    assert planner.neighbor_cost(planner.vertexGrid[0][0], planner.vertexGrid[0][1]) == 1
+    planner.main_planning('Fast')
+    check_plan(planner)
+    for a, b in zip(planner.actualPath, planner.actualPath[1:]):
+        if a.x != b.x and a.y != b.y:
+            assert not planner.vertexGrid[a.x][b.y].isObstacle
+            assert not planner.vertexGrid[b.x][a.y].isObstacle
+
+
+def test_reset_search_plans_again():
+    planner = random_planner(1, density=0.2)
+    planner.main_planning('Fast')
+    planner.reset_search()
+    planner.set_start_coordinates(11, 0)
+    planner.set_goal_coordinates(0, 8)
+    for x, y in ((11, 0), (0, 8)):
+        remove_obstacle(planner, x, y)
+    planner.main_planning('Fast')
+    check_plan(planner)
+
+
+@pytest.mark.parametrize('variant', VARIANTS)
+@pytest.mark.parametrize('seed', range(4))
+def test_change_goal_matches_dijkstra(variant, seed):
+    planner = random_planner(seed, density=0.2, **variant)
+    planner.main_planning('Fast')
+    rng = random.Random(seed)
+    for _ in range(3):
+        free = [vertex for column in planner.vertexGrid for vertex in column if not vertex.isObstacle]
+        goal = rng.choice(free)
+        planner.change_goal(goal.x, goal.y)
+        planner.show_and_remember_path()
+        assert planner.goalCoordinates == [goal.x, goal.y]
+        check_plan(planner)
+
+
+# change_goal shifts g and rsh of the kept subtree, the re-planning after it
+# works with these values. Their rounding errors show up in few grids only.
+@pytest.mark.parametrize('optimized', (False, True))
+@pytest.mark.parametrize('seed', range(40))
+def test_replan_after_goal_change_matches_dijkstra(optimized, seed):
+    planner = random_planner(seed, density=0.2, costs=True, optimized=optimized, diagonal_cost=math.sqrt(2))
+    planner.main_planning('Fast')
+    rng = random.Random(seed)
+    for _ in range(3):
+        free = [vertex for column in planner.vertexGrid for vertex in column if not vertex.isObstacle]
+        goal = rng.choice(free)
+        planner.change_goal(goal.x, goal.y)
+        for _ in range(2):
+            blocked, cell = rng.sample([vertex for vertex in free if vertex != goal], 2)
+            planner.replan_map_changes([MapChange(blocked.x, blocked.y, ChangeType.ObstacleAdded),
+                                        MapChange(cell.x, cell.y, ChangeType.CostChanged, 2.5)])
+            planner.show_and_remember_path()
+            check_plan(planner)
+            free.remove(blocked)
+
+
+def test_goal_on_obstacle_is_rejected():
+    planner = random_planner(0, density=0)
+    add_obstacle(planner, 3, 3)
+    planner.main_planning('Fast')
+    for x, y in ((3, 3), (12, 0)):
+        with pytest.raises(ValueError):
+            planner.change_goal(x, y)
+        with pytest.raises(ValueError):
+            planner.request_goal_change(x, y)
+    assert planner.goalCoordinates == [11, 8] and planner.pendingGoal is None
+    # The goal has become an obstacle after the request
+    planner.request_goal_change(5, 5)
+    add_obstacle(planner, 5, 5)
+    assert not planner.change_pending_goal()
+    assert planner.goalCoordinates == [11, 8] and planner.pendingGoal is None
+
+
+@pytest.mark.parametrize('optimized', (False, True))
+def test_goal_set_with_offsets(optimized):
+    planner = random_planner(5, density=0.2, optimized=optimized)
+    planner.set_goals([(11, 0, 4.0), (0, 8), (6, 4, 1.5)])
+    for x, y in ((11, 0), (0, 8), (6, 4)):
+        remove_obstacle(planner, x, y)
+    planner.main_planning('Fast')
+    assert set((vertex.x, vertex.y) for vertex in planner.goals) == {(11, 0), (0, 8), (6, 4)}
+    check_plan(planner)
+    assert planner.goalNode == planner.actualPath[-1]
+    with pytest.raises(ValueError):
+        planner.set_goals([(1, 1, -1.0)])
+
+
+def test_path_costs_reference():
+    planner = random_planner(0, width=4, height=3, density=0, direct_neighbors=True)
+    planner.main_planning('Fast')
+    costs = path_costs(planner, planner.goals)
+    assert costs[planner.vertexGrid[0][0]] == 5
+    assert planner.startNode.g == 5
@@ -0,0 +1,117 @@
+import io
+import json
+import math
+
+import numpy as np
+import pytest
+
+from d_star_lite_planner import DStarLitePlanner
+from grids import random_planner, remove_obstacle, start_cost
+from heading_lattice import HeadingLatticePlanner
+from map_changes import ChangeType, MapChange
+from occupancy_map import OBSTACLE, create_grid
+from planner_state import load_state, save_state
+from vertex_grid import ArrayVertexGrid
+
+
+def values(planner):
+    return [(vertex.g, vertex.rsh, vertex.cost, vertex.isObstacle) for column in planner.vertexGrid
+            for vertex in column]
+
+
+def cells(vertices):
+    return sorted((vertex.x, vertex.y) for vertex in vertices)
+
+
+def round_trip(planner, grid_backend='objects'):
+    file = io.BytesIO()
+    save_state(planner, file)
+    file.seek(0)
+    return load_state(file, grid_backend=grid_backend)
+
+
+@pytest.mark.parametrize('grid_backend', ('objects', 'arrays'))
+@pytest.mark.parametrize('optimized', (False, True))
+def test_round_trip_keeps_the_search(grid_backend, optimized):
+    planner = random_planner(3, costs=True, grid_backend=grid_backend, optimized=optimized,
+                             diagonal_cost=math.sqrt(2), corner_cutting=False)
+    planner.main_planning('Fast')
+    planner.startNode = planner.actualPath[2]  # The robot has moved
+    loaded = round_trip(planner, grid_backend)
+    assert values(loaded) == values(planner)
+    assert {(v.x, v.y): (s.x, s.y) for v, s in loaded.successors.items() if s is not None} == \
+        {(v.x, v.y): (s.x, s.y) for v, s in planner.successors.items() if s is not None}
+    assert sorted((v.x, v.y, loaded.priorityQueue.key_of(v)) for v in loaded.priorityQueue) == \
+        sorted((v.x, v.y, planner.priorityQueue.key_of(v)) for v in planner.priorityQueue)
+    assert cells(loaded.obstacles) == cells(planner.obstacles)
+    assert (loaded.startNode.x, loaded.startNode.y) == (planner.startNode.x, planner.startNode.y)
+    assert (loaded.diagonalCost, loaded.cornerCutting) == (math.sqrt(2), False)
+    assert loaded.k == planner.k and loaded.planReady
+    assert cells(loaded.actualPath) == cells(planner.actualPath)
+    # The loaded planner continues with incremental re-planning. Queued
+    # vertices with equal keys may be expanded in another order, so only
+    # the path costs are compared.
+    blocked = planner.actualPath[4]
+    for p in (planner, loaded):
+        p.replan_map_changes([MapChange(blocked.x, blocked.y, ChangeType.ObstacleAdded)])
+        p.show_and_remember_path()
+    assert loaded.startNode.g == pytest.approx(planner.startNode.g)
+    assert loaded.startNode.g == pytest.approx(start_cost(loaded))
+
+
+# The arrays of an array grid are written and read at once, not vertex by vertex
+def test_array_grid_is_saved_without_vertex_loop(monkeypatch):
+    map_cells = np.ones(12 * 9, dtype=np.uint8)
+    map_cells[[14, 15, 40]] = OBSTACLE
+    map_cells[50] = 3
+    planner = DStarLitePlanner(None, vertex_grid=create_grid(12, 9, map_cells))
+    planner.set_start_coordinates(0, 0)
+    planner.set_goal_coordinates(11, 8)
+    planner.main_planning('Fast')
+
+    def no_loop(grid):
+        raise AssertionError('vertex loop over an array grid')
+
+    monkeypatch.setattr(ArrayVertexGrid, '__iter__', no_loop)
+    loaded = round_trip(planner, 'arrays')
+    grid = loaded.vertexGrid
+    assert np.array_equal(grid.g, planner.vertexGrid.g) and np.array_equal(grid.rsh, planner.vertexGrid.rsh)
+    assert list(grid.obstacle_ids()) == [14, 15, 40] and grid.cost[50] == 3 and grid.cost[14] == 1
+    assert cells(loaded.obstacles) == cells(planner.obstacles)
+    assert np.array_equal(loaded.successors.successor_ids(), planner.successors.successor_ids())
+    assert cells(loaded.actualPath) == cells(planner.actualPath)
+
+
+def test_round_trip_of_anytime_goal_set():
+    planner = random_planner(6, density=0.15, inflation=2.5, inflation_step=0.5)
+    planner.set_goals([(11, 8), (11, 0, 2.0)])
+    remove_obstacle(planner, 11, 0)
+    planner.main_planning('Fast')
+    loaded = round_trip(planner)
+    assert loaded.epsilon == planner.epsilon == 2.5
+    assert cells(loaded.closed) == cells(planner.closed) and cells(loaded.incons) == cells(planner.incons)
+    assert {(v.x, v.y): o for v, o in loaded.goals.items()} == {(v.x, v.y): o for v, o in planner.goals.items()}
+    for p in (planner, loaded):
+        while p.can_improve_plan():
+            p.improve_plan()
+    assert loaded.startNode.g == pytest.approx(start_cost(planner))
+
+
+def test_unknown_version_and_lattice_are_rejected():
+    planner = random_planner(0, density=0)
+    planner.main_planning('Fast')
+    file = io.BytesIO()
+    save_state(planner, file)
+    file.seek(0)
+    with np.load(file) as data:
+        arrays = dict(data)
+    meta = json.loads(str(arrays['meta']))
+    meta['version'] = 99
+    arrays['meta'] = np.array(json.dumps(meta))
+    file = io.BytesIO()
+    np.savez(file, **arrays)
+    file.seek(0)
+    with pytest.raises(ValueError):
+        load_state(file)
+    with pytest.raises(ValueError):
+        save_state(HeadingLatticePlanner(None, grid_width=4, grid_height=3), io.BytesIO())
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from priority_queue import IndexedPriorityQueue, PriorityQueue
+from vertex import Vertex
+from vertex_grid import ArrayIndexMap, ArrayVertexGrid
+
+GRID = ArrayVertexGrid(6, 5)
+
+
+def queue_and_items(kind):
+    if kind == 'dict':
+        return IndexedPriorityQueue(), [Vertex(x, y) for x in range(6) for y in range(5)]
+    return IndexedPriorityQueue(ArrayIndexMap(GRID)), [GRID.vertex(x, y) for x in range(6) for y in range(5)]
+
+
+# The positions map the items to their entries and the heap order holds
+def check_heap(queue):
+    assert len(queue.positions) == queue.count()
+    for index, (key, item) in enumerate(queue.elements):
+        assert queue.positions[item] == index
+        if index > 0:
+            assert not key < queue.elements[(index - 1) >> 1][0]
+
+
+@pytest.mark.parametrize('kind', ('dict', 'arrays'))
+@pytest.mark.parametrize('seed', range(5))
+def test_random_operations_match_reference(kind, seed):
+    queue, items = queue_and_items(kind)
+    reference = {}  # item -> key
+    rng = random.Random(seed)
+    for _ in range(400):
+        item = rng.choice(items)
+        operation = rng.random()
+        if operation < 0.5:
+            key = (rng.randint(0, 20), rng.randint(0, 5))
+            queue.insert(item, key)  # Also updates the key of a queued item
+            reference[item] = key
+        elif operation < 0.7:
+            queue.remove(item)  # Unknown items are ignored
+            reference.pop(item, None)
+        elif reference:
+            smallest = min(reference.values())
+            assert queue.top_key() == smallest
+            popped = queue.pop()
+            assert reference.pop(popped) == smallest
+        assert (item in queue) == (item in reference)
+        check_heap(queue)
+    assert sorted(reference.values()) == sorted(queue.key_of(item) for item in queue)
+
+
+@pytest.mark.parametrize('kind', ('dict', 'arrays'))
+def test_update_rebuild_and_clear(kind):
+    queue, items = queue_and_items(kind)
+    for i, item in enumerate(items[:10]):
+        queue.insert(item, (i, 0))
+    queue.update(items[9], (-1, 0))
+    assert queue.pop() == items[9]
+    queue.rebuild(lambda item: (-items.index(item), 0))
+    check_heap(queue)
+    assert queue.pop() == items[8]
+    queue.clear()
+    assert queue.empty() and items[0] not in queue
+    assert queue.top_key() == (float('inf'), float('inf'))
+
+
+def test_priority_queue():
+    queue = PriorityQueue()
+    a, b = Vertex(0, 0), Vertex(1, 0)
+    queue.insert(b, (1, 1))
+    queue.insert(a, (0, 0))
+    assert queue.top_key() == (0, 0)
+    queue.remove(a)
+    assert queue.count() == 1 and queue.pop() is b and queue.empty()
@@ -0,0 +1,89 @@
+from collections import namedtuple
+
+import pytest
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.reasoncodes import ReasonCode
+
+from mqtt_service import MQTTService, decode_progress, decode_reply, encode_command, timeout_reply
+
+Message = namedtuple('Message', ['payload'])
+
+
+def test_encode_command():
+    assert encode_command(b'a1b2c3', 7, 'Drive') == b'a1b2c3:7:D'
+    assert encode_command(b'a1b2c3', 12, 'Plan', b'L,D3') == b'a1b2c3:12:PL,D3'
+
+
+def test_decode_reply():
+    assert decode_reply(b'a1b2c3:7:ok') == (b'a1b2c3', 7, b'ok')
+    assert decode_reply(b'a1b2c3:7:obstacle:!') == (b'a1b2c3', 7, b'obstacle:!')
+    assert decode_reply(b'ok') is None  # Robot of an older version
+    assert decode_reply(b'a1b2c3:x:ok') is None
+
+
+def test_decode_progress():
+    assert decode_progress(b'a1b2c3:9:cell:2:4') == (b'a1b2c3', 9, 'cell', 2, 4)
+    assert decode_progress(b'a1b2c3:9:done:3:0') == (b'a1b2c3', 9, 'done', 3, 0)
+    assert decode_progress(b'a1b2c3:9:cell:2') is None
+    assert decode_progress(b'a1b2c3:9:cell:-1:4') is None
+
+
+@pytest.fixture
+def service():
+    # Nothing listens on the port: the service keeps trying to connect
+    service = MQTTService('127.0.0.1', 1)
+    yield service
+    service.close()
+
+
+def reply(service, seq, result, session=None):
+    payload = (session or service.session) + b':' + str(seq).encode() + b':' + result
+    service.on_message_result(None, None, Message(payload))
+
+
+def test_reply_resolves_its_command_once(service):
+    seq, future = service.publish_command('Drive')
+    second_seq, second = service.publish_command('TurnL90')
+    assert second_seq == seq + 1
+    reply(service, second_seq, b'ok')
+    assert second.result(timeout=1) == b'ok' and not future.done()
+    reply(service, second_seq, b'obstacle!')  # QoS 1 duplicate
+    reply(service, seq, b'ok', session=b'000000')  # Other session
+    assert not future.done()
+    reply(service, seq, b'ok')
+    assert future.result(timeout=1) == b'ok' and second.result() == b'ok'
+    assert service.pending == {}
+
+
+def test_late_reply_after_timeout_is_dropped(service):
+    seq, future = service.publish_command('Drive', timeout=0.05)
+    assert future.result(timeout=1) == timeout_reply
+    reply(service, seq, b'ok')
+    assert future.result() == timeout_reply and service.pending == {}
+
+
+def test_progress_and_readings(service):
+    service.on_message_obstacle(None, None, Message(b'45.0'))
+    service.on_message_progress(None, None, Message(service.session + b':3:cell:0:1'))
+    service.on_message_progress(None, None, Message(b'000000:3:cell:0:2'))  # Other session
+    service.on_message_obstacle(None, None, Message(b'12.5'))
+    assert service.progress.get_nowait() == (3, 'cell', 0, 1, 1)
+    assert service.progress.empty()
+    assert service.take_distances() == [(0, 45.0), (1, 12.5)]
+    assert service.detectRealObstacle
+    service.on_message_obstacle(None, None, Message(b'80'))
+    service.on_message_progress(None, None, Message(service.session + b':3:done:1:0'))
+    service.reset_run()
+    assert not service.detectRealObstacle
+    assert service.take_distances() == [] and service.progress.empty()
+
+
+# The callbacks of the paho network thread take the arguments of the callback API version 2
+def test_connect_callbacks(service):
+    refused = ReasonCode(PacketTypes.CONNACK, 'Not authorized')
+    service.on_connect(service.client, None, None, refused, None)
+    assert not service.connected.is_set()
+    service.on_connect(service.client, None, None, ReasonCode(PacketTypes.CONNACK, 'Success'), None)
+    assert service.connected.is_set()
+    service.on_disconnect(service.client, None, None, ReasonCode(PacketTypes.DISCONNECT, 'Unspecified error'), None)
+    assert not service.connected.is_set()
@@ -0,0 +1,61 @@
+from d_star_lite_planner import DStarLitePlanner
+from grids import add_obstacle
+from map_changes import ChangeType, MapChange
+from ray_occupancy import RayOccupancy
+
+
+def create_rays():
+    planner = DStarLitePlanner(None, grid_width=8, grid_height=3, direct_neighbors=True)
+    return planner, RayOccupancy(planner, cell_size=20, max_range=150)
+
+
+def test_ray_cells():
+    _, rays = create_rays()
+    assert rays.ray_cells(0, 1, 'East', 95) == ([(1, 1), (2, 1), (3, 1), (4, 1)], (5, 1))
+    assert rays.ray_cells(3, 2, 'North', 25) == ([(3, 1)], (3, 0))
+    # Beyond the maximum range no cell is hit
+    assert rays.ray_cells(0, 0, 'East', 200) == ([(x, 0) for x in range(1, 8)], None)
+    # The ray ends at the border of the grid
+    assert rays.ray_cells(0, 1, 'East', 140) == ([(x, 1) for x in range(1, 8)], None)
+    assert rays.ray_cells(0, 1, 'West', 50) == ([], None)
+
+
+def test_new_obstacle_after_two_readings():
+    planner, rays = create_rays()
+    assert rays.update(0, 1, 'East', 95) == []
+    assert rays.update(0, 1, 'East', 98) == [MapChange(5, 1, ChangeType.ObstacleAdded)]
+    assert rays.update(0, 1, 'East', 92) == []  # Already occupied
+    assert list(planner.mapChanges.changes.values()) == [MapChange(5, 1, ChangeType.ObstacleAdded)]
+
+
+def test_single_wrong_reading_changes_nothing():
+    planner, rays = create_rays()
+    add_obstacle(planner, 3, 1)
+    assert rays.update(0, 1, 'East', 150) == []  # One reading sees the obstacle free
+    assert rays.update(0, 1, 'East', 55) == []  # And the next one occupied again
+    assert len(planner.mapChanges) == 0
+
+
+def test_obstacle_removed_after_repeated_free_readings():
+    planner, rays = create_rays()
+    add_obstacle(planner, 3, 1)
+    changes = []
+    for _ in range(4):
+        changes += rays.update(0, 1, 'East', 150)
+    assert changes == []
+    for _ in range(2):
+        changes += rays.update(0, 1, 'East', 150)
+    assert changes == [MapChange(3, 1, ChangeType.ObstacleRemoved)]
+
+
+def test_log_odds_are_clamped():
+    _, rays = create_rays()
+    for _ in range(20):
+        rays.update(0, 1, 'East', 95)
+    assert rays.logOdds[(5, 1)] == rays.logMax
+    # From the clamped value the cell is free again after a bounded number of readings
+    readings = 0
+    while rays.occupied[(5, 1)]:
+        rays.update(0, 1, 'East', 150)
+        readings += 1
+    assert readings == 11
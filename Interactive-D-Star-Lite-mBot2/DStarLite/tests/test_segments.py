@@ -0,0 +1,57 @@
+import pytest
+
+import cloud_executor
+from d_star_lite_planner import DStarLitePlanner
+from segment_executor import SegmentExecutor, encode_segments
+
+
+class Robot(object):
+
+    # Shared MQTT service of the executors, without connection
+    def __init__(self):
+        self.resets = 0
+
+    def reset_run(self):
+        self.resets += 1
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    robot = Robot()
+    monkeypatch.setattr(cloud_executor, 'get_service', lambda: robot)
+    planner = DStarLitePlanner(None, grid_width=6, grid_height=5, direct_neighbors=True)
+    return SegmentExecutor(None, planner)
+
+
+def path_of(executor, cells):
+    return [executor.planner.vertexGrid[x][y] for x, y in cells]
+
+
+def test_executor_resets_the_shared_service(executor):
+    assert executor.robot.resets == 1
+
+
+def test_drives_in_one_direction_are_joined(executor):
+    path = path_of(executor, [(0, 0), (0, 1), (0, 2), (0, 3)])
+    assert executor.compile_segments(path, 'South') == [['Drive', 3, 'South']]
+
+
+def test_turns_and_drives(executor):
+    path = path_of(executor, [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2), (1, 2)])
+    segments = executor.compile_segments(path, 'North')
+    assert segments == [['TurnR90', 0, 'East'], ['Drive', 2, 'East'],
+                        ['TurnR90', 0, 'South'], ['Drive', 2, 'South'],
+                        ['TurnR90', 0, 'West'], ['Drive', 1, 'West']]
+    assert encode_segments(segments) == b'T,D2,T,D2,T,D1'
+
+
+def test_turn_back(executor):
+    path = path_of(executor, [(3, 3), (3, 2), (3, 1)])
+    segments = executor.compile_segments(path, 'South')
+    assert segments == [['Turn180', 0, 'North'], ['Drive', 2, 'North']]
+    assert encode_segments(segments) == b'B,D2'
+
+
+def test_path_at_its_end(executor):
+    assert executor.compile_segments(path_of(executor, [(3, 3)]), 'East') == []
+    assert encode_segments([]) == b''
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from ui_batcher import UpdateBatcher
+
+
+def test_requests_are_sent_in_frames():
+    sent = []
+    batcher = UpdateBatcher(lambda: sent.append(time.monotonic()), max_rate=20)
+    for _ in range(500):
+        batcher.request()
+    time.sleep(0.2)
+    assert batcher.requests == 500
+    # The first request is sent at once, the others in the trailing frame
+    assert len(sent) == batcher.flushes == 2
+    assert sent[1] - sent[0] >= 0.05 - 1e-3
+    batcher.flush()
+    assert batcher.flushes == 2  # Nothing pending
+    batcher.flush(force=True)
+    assert batcher.flushes == 3
+
+
+def test_flush_runs_under_the_lock():
+    lock = threading.RLock()
+    dirty = set()
+    sent = []
+    owned = []  # The flushes of the timer thread cannot fail the test
+
+    def flush():
+        owned.append(lock._is_owned())
+        sent.extend(dirty)
+        dirty.clear()
+
+    batcher = UpdateBatcher(flush, max_rate=1000, lock=lock)
+
+    def produce(start):
+        for i in range(start, start + 20000):
+            with lock:
+                dirty.add(i)
+            batcher.request()
+
+    threads = [threading.Thread(target=produce, args=(i * 20000,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.flush(force=True)
+    assert sorted(sent) == list(range(40000))
+    assert owned and all(owned)
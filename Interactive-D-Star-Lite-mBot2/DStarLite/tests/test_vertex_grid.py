@@ -0,0 +1,66 @@
+import pytest
+
+from d_star_lite_planner import DStarLitePlanner
+from vertex_grid import ArraySuccessorMap, ArrayVertexGrid, create_vertex_grid, create_vertex_map
+
+
+def test_array_vertex_views():
+    grid = ArrayVertexGrid(4, 3)
+    vertex = grid[2][1]
+    assert (vertex.x, vertex.y, vertex.id) == (2, 1, grid.cell_id(2, 1))
+    vertex.g = 5.0
+    vertex.isObstacle = True
+    assert grid.vertex(2, 1) == vertex and hash(grid.vertex(2, 1)) == hash(vertex)
+    assert grid.vertex(2, 1).g == 5.0 and grid.obstacle[grid.cell_id(2, 1)]
+    assert grid.vertex(1, 2) != vertex
+    with pytest.raises(IndexError):
+        grid[4]
+    with pytest.raises(IndexError):
+        grid[0][3]
+
+
+# A view has no __dict__ and the grid keeps 8 + 8 + 8 + 1 + 1 bytes per cell
+# (g, rsh, cost, goal and obstacle flag), the keys are kept by the queue
+def test_array_grid_memory():
+    grid = ArrayVertexGrid(40, 25)
+    assert not hasattr(grid.vertex(1, 1), '__dict__')
+    with pytest.raises(AttributeError):
+        grid.vertex(1, 1).key = (0, 0)
+    assert grid.nbytes() == 40 * 25 * 26
+
+
+def test_successor_map_like_dict():
+    grid = ArrayVertexGrid(4, 3)
+    successors = ArraySuccessorMap(grid)
+    a, b, c = grid.vertex(0, 0), grid.vertex(1, 0), grid.vertex(3, 2)
+    successors[a] = b
+    successors[c] = None
+    successors[a] = c  # Replaced, not counted twice
+    assert len(successors) == 2 and a in successors and b not in successors
+    assert successors[a] == c and successors.get(c) is None and successors.get(b, 'x') == 'x'
+    assert set(successors) == {a, c}
+    assert dict(successors.items()) == {a: c, c: None}
+    assert successors.pop(a) == c and successors.pop(a, 'x') == 'x'
+    with pytest.raises(KeyError):
+        successors[a]
+    successors.clear()
+    assert len(successors) == 0 and list(successors) == []
+
+
+def test_vertex_maps_of_backends():
+    assert create_vertex_map(create_vertex_grid(3, 2), 'successors') == {}
+    assert isinstance(create_vertex_map(create_vertex_grid(3, 2, 'arrays'), 'successors'), ArraySuccessorMap)
+    with pytest.raises(ValueError):
+        create_vertex_map(create_vertex_grid(3, 2), 'keys')
+    with pytest.raises(ValueError):
+        create_vertex_grid(3, 2, 'lists')
+
+
+def test_array_planner_keeps_no_views():
+    planner = DStarLitePlanner(None, grid_width=10, grid_height=8, grid_backend='arrays')
+    planner.set_start_coordinates(0, 0)
+    planner.set_goal_coordinates(9, 7)
+    planner.main_planning('Fast')
+    assert isinstance(planner.successors, ArraySuccessorMap)
+    assert planner.startNode.g == pytest.approx(7 * 1.4 + 2)
+    assert len(planner.actualPath) == 10
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+############################################################
+# Class UpdateBatcher
+# Coalesces many small UI updates into frames. The view marks
+# changes with request() and the batcher calls the flush
+# function at most max_rate times per second. Changes after
+# the last frame are flushed by a timer, so the screen always
+# shows the final state. flush(force=True) sends at once,
+# e.g. at the end of a plan. The flush function runs under a
+# lock, also when it is called by the timer thread.
+#
+# File: ui_batcher.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+import threading
+import time
+
+
+class UpdateBatcher(object):
+
+    # flush: function sending all pending changes to the client
+    # max_rate: maximum number of flushes per second
+    # lock: held while the flush function runs, e.g. the lock of the data it
+    # sends (default: a lock of the batcher, so flushes do not overlap)
+    def __init__(self, flush, max_rate=30, clock=time.monotonic, lock=None):
+        self.flushFunction = flush
+        self.flushLock = threading.RLock() if lock is None else lock
+        self.interval = 1 / max_rate
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.pending = False  # True if changes wait for the next frame
+        self.lastFlush = float('-inf')
+        self.timer = None  # Timer for the trailing flush
+        self.requests = 0  # Number of requested updates
+        self.flushes = 0  # Number of updates sent
+
+    # Changes are waiting. Flush now if the last frame is old enough,
+    # otherwise start a timer for the next frame.
+    def request(self):
+        with self.lock:
+            self.requests += 1
+            self.pending = True
+            wait = self.lastFlush + self.interval - self.clock()
+            if wait > 0:
+                if self.timer is None:
+                    self.timer = threading.Timer(wait, self.flush)
+                    self.timer.daemon = True
+                    self.timer.start()
+                return
+        self.flush()
+
+    # Send the pending changes. With force the flush function is
+    # called even if no changes have been requested.
+    def flush(self, force=False):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.pending and not force:
+                return
+            self.pending = False
+            self.lastFlush = self.clock()
+            self.flushes += 1
+        with self.flushLock:
+            self.flushFunction()
+
+
+if __name__ == "__main__":
+    batcher = UpdateBatcher(lambda: print('flush'), max_rate=30)
+    for _ in range(1000):
+        batcher.request()
+    time.sleep(0.1)
+    print('Requests:', batcher.requests, 'Flushes:', batcher.flushes)
@@ -10,7 +10,7 @@
 # Version: 1.0    Date: 22.07.2020       
 ###########################################################
 
-import math
+from heuristics import default_heuristic
 
 
 class Vertex(object):
@@ -23,6 +23,7 @@ class Vertex(object):
         # if g !=rsh then vertex is inconsistent
         self.isGoal = False
         self.isObstacle = False
+        self.cost = 1.0  # Traversal cost factor of the field, >= 1 (1 = free)
         self.key = 0
 
         # If vertex is a goal then set rsh value to 0 otherwise to infinite
@@ -43,25 +44,24 @@ class Vertex(object):
             # CalculateKey function of the D*Lite algorithm
 
     # Return the calculated key for sorting.
-    def calculate_key(self, start_node, k, is_zero, direct_neighbors):
+    # A heuristic function h(vertex, start_node) (see heuristics.py) can be
+    # given instead of is_zero and direct_neighbors.
+    def calculate_key(self, start_node, k, is_zero=True, direct_neighbors=False, heuristic=None):
         if self.g < self.rsh:
             min1 = self.g
         else:
             min1 = self.rsh
-        self.key = (min1 + self.h(start_node, is_zero, direct_neighbors) + k, min1)
+        if heuristic is None:
+            heuristic = default_heuristic(is_zero, direct_neighbors)
+        # Round the key: sums of 1.4-steps are not exact in floating point and
+        # equal keys have to compare equal or the search may stop too early.
+        self.key = (round(min1 + heuristic(self, start_node) + k, 9), round(min1, 9))
         return self.key
 
-    # Calculate the heuristic-value of the vertex
+    # Calculate the heuristic-value of the vertex: 0, manhattan distance
+    # (4 neighbors) or octile distance (8 neighbors)
     def h(self, start_node, is_zero=True, direct_neighbors=False):
-        if is_zero:
-            # Do not use a heuristic. Then more planning steps are needed
-            return 0
-        elif direct_neighbors:
-            # max. 4 neighbors, use exact distance without considering obstacles
-            return abs(self.x - start_node.x) + abs(self.y - start_node.y)
-        else:
-            # max. eight neighbors: use euclidean distance
-            return math.sqrt(math.pow(self.x - start_node.x, 2) + math.pow(self.y - start_node.y, 2))
+        return default_heuristic(is_zero, direct_neighbors)(self, start_node)
 
     # Define a "<"  operator for comparison of two vertices
     def __lt__(self, another_vertex):
@@ -70,7 +70,7 @@ class Vertex(object):
     def print(self):
         print('x:', self.x, 'y:', self.y, 'g:', self.g,
               'rsh:', self.rsh, 'IsGoal:', self.isGoal,
-              'IsObstacle:', self.isObstacle)
+              'IsObstacle:', self.isObstacle, 'Cost:', self.cost)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,318 @@
+#!/usr/bin/python3
+############################################################
+# Class ArrayVertexGrid
+# Array-backed (struct-of-arrays) vertex grid for large maps.
+# g, rsh, cost, goal and obstacle flags are kept in flat NumPy
+# arrays indexed by cell id (id = x * height + y). Vertices are
+# created on demand as thin ArrayVertex views, so the planner
+# and the UI can keep using vertexGrid[x][y]. The keys of the
+# search are kept by the priority queue only.
+#
+# Classes ArrayIndexMap, ArraySuccessorMap
+# Maps of the search keyed by the cells of an ArrayVertexGrid
+# (heap positions of the priority queue, successor pointers).
+# They are used like dicts, but their values are kept in an
+# array by cell id, so no vertex view is kept alive for them.
+#
+# Function create_vertex_grid
+# Create the vertex grid of the planner for a backend name
+# ('objects' or 'arrays').
+#
+# Function create_vertex_map
+# Create an empty map of the search for a vertex grid.
+#
+# File: vertex_grid.py
+# Author: Wei Yang
+# Version: 1.0    Date: 17.10.2026
+###########################################################
+
+from array import array
+
+from vertex import Vertex
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class ArrayVertex(object):
+    # No Vertex base class: a view has no __dict__, only these slots
+    __slots__ = ('grid', 'id', 'x', 'y')
+
+    # A view on the cell with the given id. Nothing is copied.
+    def __init__(self, grid, cell_id):
+        self.grid = grid
+        self.id = cell_id
+        self.x, self.y = divmod(cell_id, grid.height)
+
+    @property
+    def g(self):
+        return float(self.grid.g[self.id])
+
+    @g.setter
+    def g(self, value):
+        self.grid.g[self.id] = value
+
+    @property
+    def rsh(self):
+        return float(self.grid.rsh[self.id])
+
+    @rsh.setter
+    def rsh(self, value):
+        self.grid.rsh[self.id] = value
+
+    @property
+    def isGoal(self):
+        return bool(self.grid.goal[self.id])
+
+    @isGoal.setter
+    def isGoal(self, value):
+        self.grid.goal[self.id] = value
+
+    @property
+    def isObstacle(self):
+        return bool(self.grid.obstacle[self.id])
+
+    @isObstacle.setter
+    def isObstacle(self, value):
+        self.grid.obstacle[self.id] = value
+
+    @property
+    def cost(self):
+        return float(self.grid.cost[self.id])
+
+    @cost.setter
+    def cost(self, value):
+        self.grid.cost[self.id] = value
+
+    def set_is_goal(self, is_goal):
+        self.isGoal = is_goal
+        self.rsh = 0 if is_goal else float('inf')
+
+    def set_is_obstacle(self, is_obstacle):
+        self.isObstacle = is_obstacle
+        if is_obstacle:
+            self.rsh = float('inf')
+
+    def print(self):
+        print('x:', self.x, 'y:', self.y, 'g:', self.g,
+              'rsh:', self.rsh, 'IsGoal:', self.isGoal,
+              'IsObstacle:', self.isObstacle, 'Cost:', self.cost)
+
+    # Two views are equal if they show the same cell of the same grid
+    def __eq__(self, other):
+        return isinstance(other, ArrayVertex) and self.id == other.id and self.grid is other.grid
+
+    def __hash__(self):
+        return self.id
+
+
+class ArrayVertexGrid(object):
+    view = ArrayVertex  # Class of the vertex views
+
+    # Create the arrays for a grid of width x height cells. All cells
+    # start with g = rsh = inf, no goal and no obstacle like Vertex().
+    # cost and obstacle may be given as arrays in cell id order. They are
+    # used without a copy. See occupancy_map.py for a grid over a map file.
+    def __init__(self, width, height, cost=None, obstacle=None):
+        if np is None:
+            raise ImportError('The array grid backend needs numpy (pip install numpy)')
+        self.width = width
+        self.height = height
+        size = width * height
+        self.g = np.full(size, np.inf)
+        self.rsh = np.full(size, np.inf)
+        self.cost = np.ones(size) if cost is None else cost
+        self.goal = np.zeros(size, dtype=bool)
+        self.obstacle = np.zeros(size, dtype=bool) if obstacle is None else obstacle
+        if len(self.cost) != size or len(self.obstacle) != size:
+            raise ValueError(f'cost and obstacle arrays must have {size} cells')
+
+    # Return the id of the cell at x, y
+    def cell_id(self, x, y):
+        return x * self.height + y
+
+    # Return a vertex view of the cell at x, y
+    def vertex(self, x, y):
+        return self.view(self, x * self.height + y)
+
+    # vertexGrid[x] returns a column, vertexGrid[x][y] a vertex view
+    def __getitem__(self, x):
+        if not 0 <= x < self.width:
+            raise IndexError('x out of grid')
+        return _ArrayColumn(self, x)
+
+    def __len__(self):
+        return self.width
+
+    def __iter__(self):
+        for x in range(self.width):
+            yield _ArrayColumn(self, x)
+
+    # Return the ids of the obstacle cells
+    def obstacle_ids(self):
+        return np.flatnonzero(self.obstacle)
+
+    # Raise a ValueError if the cost array cannot store the cost factor
+    # exactly, e.g. 2.5 or 300 in an array of uint8
+    def check_cost(self, cost):
+        if np.issubdtype(self.cost.dtype, np.integer):
+            limit = np.iinfo(self.cost.dtype).max
+            if not 1 <= cost <= limit or cost != int(cost):
+                raise ValueError(f'Cost factor of this grid must be a whole number 1..{limit}: {cost}')
+
+    # Return the number of bytes used by the arrays
+    def nbytes(self):
+        return self.g.nbytes + self.rsh.nbytes + self.cost.nbytes + self.goal.nbytes + self.obstacle.nbytes
+
+
+class _ArrayColumn(object):
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.grid.height:
+            raise IndexError('y out of grid')
+        grid = self.grid
+        return grid.view(grid, self.x * grid.height + y)
+
+    def __len__(self):
+        return self.grid.height
+
+    def __iter__(self):
+        for y in range(self.grid.height):
+            yield self[y]
+
+
+MISSING = -2  # Cell without entry in an ArrayIndexMap
+NO_VERTEX = -1  # Successor None in an ArraySuccessorMap
+
+
+class ArrayIndexMap(object):
+    __slots__ = ('grid', 'values', 'size')
+
+    # An empty map from the vertex views of grid to integers >= 0
+    def __init__(self, grid):
+        self.grid = grid
+        # A Python array reads and writes single values faster than NumPy
+        self.values = array('q', [MISSING]) * (grid.width * grid.height)
+        self.size = 0  # Number of entries
+
+    def __contains__(self, vertex):
+        return self.values[vertex.id] != MISSING
+
+    def __getitem__(self, vertex):
+        value = self.values[vertex.id]
+        if value == MISSING:
+            raise KeyError(vertex)
+        return int(value)
+
+    def __setitem__(self, vertex, value):
+        if self.values[vertex.id] == MISSING:
+            self.size += 1
+        self.values[vertex.id] = value
+
+    def __delitem__(self, vertex):
+        if self.values[vertex.id] == MISSING:
+            raise KeyError(vertex)
+        self.values[vertex.id] = MISSING
+        self.size -= 1
+
+    def get(self, vertex, default=None):
+        return self[vertex] if vertex in self else default
+
+    # Remove the entry of vertex and return its value, default if there is none
+    def pop(self, vertex, default=None):
+        if vertex not in self:
+            return default
+        value = self[vertex]
+        del self[vertex]
+        return value
+
+    # Remove all entries
+    def clear(self):
+        np.frombuffer(self.values, dtype=np.int64).fill(MISSING)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    # The vertices with an entry, in cell id order
+    def __iter__(self):
+        for cell_id in np.flatnonzero(np.frombuffer(self.values, dtype=np.int64) != MISSING):
+            yield self.grid.view(self.grid, int(cell_id))
+
+    def items(self):
+        for vertex in self:
+            yield vertex, self[vertex]
+
+
+class ArraySuccessorMap(ArrayIndexMap):
+    __slots__ = ()
+
+    # An empty map from the vertex views of grid to their successor (a view or None)
+
+    def __getitem__(self, vertex):
+        value = self.values[vertex.id]
+        if value == MISSING:
+            raise KeyError(vertex)
+        return None if value == NO_VERTEX else self.grid.view(self.grid, int(value))
+
+    def __setitem__(self, vertex, successor):
+        if self.values[vertex.id] == MISSING:
+            self.size += 1
+        self.values[vertex.id] = NO_VERTEX if successor is None else successor.id
+
+    # Return the successor ids by cell id, < 0 for a cell without successor
+    def successor_ids(self):
+        ids = np.frombuffer(self.values, dtype=np.int64).copy()
+        ids[ids < 0] = NO_VERTEX
+        return ids
+
+    # Replace all entries by the successor ids by cell id (< 0: no entry)
+    def set_successor_ids(self, ids):
+        values = np.frombuffer(self.values, dtype=np.int64)
+        values[:] = np.where(ids >= 0, ids, MISSING)
+        self.size = int(np.count_nonzero(ids >= 0))
+
+
+# Return the set of obstacle vertices of a vertex grid
+def obstacle_vertices(vertex_grid):
+    if isinstance(vertex_grid, ArrayVertexGrid):
+        return {vertex_grid.view(vertex_grid, int(cell_id)) for cell_id in vertex_grid.obstacle_ids()}
+    return {vertex for column in vertex_grid for vertex in column if vertex.isObstacle}
+
+
+# Create the vertex grid of the planner.
+# 'objects': nested lists of Vertex objects (default, fastest for small grids)
+# 'arrays': ArrayVertexGrid, needs numpy, small memory footprint for large grids
+def create_vertex_grid(width, height, backend='objects'):
+    if backend == 'objects':
+        return [[Vertex(x, y) for y in range(height)] for x in range(width)]
+    elif backend == 'arrays':
+        return ArrayVertexGrid(width, height)
+    else:
+        raise ValueError(f'Unknown grid backend: {backend}')
+
+
+# Create an empty map of the search for vertex_grid: 'successors' maps a
+# vertex to its successor, 'positions' to its index in the priority queue.
+# The vertices of an ArrayVertexGrid are mapped by cell id, all others by a dict.
+def create_vertex_map(vertex_grid, values):
+    if values not in ('successors', 'positions'):
+        raise ValueError(f'Unknown vertex map: {values}')
+    if not isinstance(vertex_grid, ArrayVertexGrid):
+        return {}
+    return ArraySuccessorMap(vertex_grid) if values == 'successors' else ArrayIndexMap(vertex_grid)
+
+
+if __name__ == "__main__":
+    grid = ArrayVertexGrid(3, 2)
+    v = grid[2][1]
+    v.set_is_goal(True)
+    v.print()
+    print(v == grid.vertex(2, 1), grid.cell_id(2, 1), grid.nbytes(), 'bytes')
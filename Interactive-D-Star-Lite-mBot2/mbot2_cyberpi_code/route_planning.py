@@ -35,14 +35,38 @@ topic_command = "rwth-ssrdp/route-planning/command"
 topic_heartbeat = "rwth-ssrdp/route-planning/heartbeat"
 topic_obstacle = "rwth-ssrdp/route-planning/obstacle"
 topic_result = "rwth-ssrdp/route-planning/result"
+topic_progress = "rwth-ssrdp/route-planning/progress"
 
 mqtt_client = MQTTClient(client_id, mqtt_host, port=mqtt_port, keepalive=600, ssl=False)
 
 one_step_distance = 20
 
+# Command protocol (see DStarLite/mqtt_service.py)
+# Commands arrive as b'<session>:<seq>:<code>', results are reported as
+# b'<session>:<seq>:<result>'. A command repeated by QoS 1 (seq not newer
+# than the last one) is not executed again, its result is reported again.
+# Plain commands like b'Drive' of older hosts are still accepted.
+commands = {b'C': b'CheckDistance', b'D': b'Drive', b'R': b'Reverse', b'S': b'Stop',
+            b'B': b'Turn180', b'L': b'TurnL90', b'T': b'TurnR90'}
+recent_count = 8  # Number of results kept for repeated commands
+
+# Plan queue
+# b'P<segments>' uploads a plan, e.g. b'PL,D3,T,D2': turn left, drive 3
+# cells, turn right, drive 2 cells. It is answered with 'queued' and run
+# by run_plan_queue. A new plan replaces a running one, b'X' cancels it
+# ('stopping' or 'idle'). The plan reports on the progress topic
+# b'<session>:<seq>:<event>:<segment>:<cells>' with the index of the
+# segment and the cells driven so far. Events: turn and cell after every
+# move, then done, obstacle (next cell blocked) or stopped.
+turn_angles = {b'L': -90, b'T': 90, b'B': 180}
+plan = None  # (prefix, segments) of the plan to run, None: no plan
+
 network_available = False
 battery = 0
 heartbeat_count = 0
+last_session = None
+last_seq = 0
+recent_results = {}  # seq -> result of the last commands of last_session
 
 
 # Connect to the MQTT server
@@ -67,11 +91,48 @@ def report_obstacle(distance):
     mqtt_client.publish(topic_obstacle, str(distance), retain=False, qos=1)
 
 
+def report_progress(prefix, event, segment, cells):
+    mqtt_client.publish(topic_progress, prefix + event + b':' + str(segment).encode() + b':' + str(cells).encode(),
+                        retain=False, qos=1)
+
+
 # message processing function
 def on_command_come(_, msg):
+    global last_session
+    global last_seq
+    global recent_results
     # print(topic + " :" + str(msg))
     display(msg)
-    process_command(msg)
+    fields = msg.split(b':', 2)
+    if len(fields) != 3:
+        result = process_command(msg)  # Command of an older host
+        if result is not None:
+            report(result)
+        return
+    session, seq, code = fields
+    seq = int(seq)
+    prefix = session + b':' + str(seq).encode() + b':'
+    if session != last_session:
+        last_session = session
+        recent_results = {}
+    elif seq <= last_seq:
+        # Repeated command: report the result again but do not move again
+        if seq in recent_results:
+            report(prefix + recent_results[seq])
+        return
+    last_seq = seq
+    if code[:1] == b'P':
+        result = queue_plan(prefix, code[1:])
+    elif code == b'X':
+        result = cancel_plan()
+    else:
+        result = process_command(commands.get(code, code))
+    if result is None:
+        result = 'unknown!'
+    result = result.encode()
+    recent_results[seq] = result
+    recent_results.pop(seq - recent_count, None)
+    report(prefix + result)
 
 
 # subscribe message
@@ -80,52 +141,119 @@ def subscribe_topic_command():
     mqtt_client.subscribe(topic_command, qos=1)
 
 
-def check_distance():
+# Measure the distance ahead. Return if the next cell is free.
+# report: publish the reading. The host assigns a reading to the position
+# of the robot at the next result or progress report, so the check before
+# a move reports only if the move is not done.
+def check_distance(report=True):
     distance = mbuild.ultrasonic2.get(1)
-    report_obstacle(distance)
-    return distance >= one_step_distance
+    free = distance >= one_step_distance
+    if report or not free:
+        report_obstacle(distance)
+    return free
 
 
+# Execute a command. Return the result to report or None for an unknown command.
 def process_command(command):
     if command is None or len(command) == 0:
-        return
+        return None
 
     if command == b'CheckDistance':
         if check_distance():
-            report('ok')
+            return 'ok'
         else:
-            report('fail!')
+            return 'fail!'
     elif command == b'Drive':
-        if check_distance():
+        if check_distance(report=False):
             mbot2.straight(one_step_distance)
             time.sleep(0.8)
             check_distance()
-            report('ok')
+            return 'ok'
         else:
-            report('fail!')
+            return 'fail!'
     elif command == b'Reverse':
         mbot2.straight(-one_step_distance)
         time.sleep(0.8)
         check_distance()
-        report('ok')
+        return 'ok'
     elif command == b'Stop':
+        cancel_plan()
         mbot2.EM_stop("ALL")
-        report('ok')
+        return 'ok'
     elif command == b'Turn180':
         mbot2.turn(180)
         time.sleep(0.5)
         check_distance()
-        report('ok')
+        return 'ok'
     elif command == b'TurnL90':
         mbot2.turn(-90)
         time.sleep(0.3)
         check_distance()
-        report('ok')
+        return 'ok'
     elif command == b'TurnR90':
         mbot2.turn(90)
         time.sleep(0.3)
         check_distance()
-        report('ok')
+        return 'ok'
+    return None
+
+
+# Replace the plan to run. Return the result to report.
+def queue_plan(prefix, segments):
+    global plan
+    plan = (prefix, segments.split(b','))
+    return 'queued'
+
+
+# Cancel the plan. The running move is finished first.
+def cancel_plan():
+    global plan
+    running = plan is not None
+    plan = None
+    if running:
+        return 'stopping'
+    return 'idle'
+
+
+# Run the segments of a plan until it is done, blocked or replaced.
+# Return the final event, the segment index and the cells driven.
+def run_plan(running):
+    prefix, segments = running
+    cells = 0
+    for index, segment in enumerate(segments):
+        if segment[:1] == b'D':
+            for _ in range(int(segment[1:])):
+                if plan is not running:
+                    return b'stopped', index, cells
+                if not check_distance(report=False):
+                    return b'obstacle', index, cells
+                mbot2.straight(one_step_distance)
+                cells += 1
+                check_distance()
+                report_progress(prefix, b'cell', index, cells)
+        else:
+            if plan is not running:
+                return b'stopped', index, cells
+            mbot2.turn(turn_angles[segment])
+            check_distance()
+            report_progress(prefix, b'turn', index, cells)
+    return b'done', len(segments), cells
+
+
+# Run uploaded plans one after another. The moves need no extra pauses,
+# straight() and turn() return when the move is finished.
+@event.start
+def run_plan_queue():
+    global plan
+    while True:
+        running = plan
+        if running is None:
+            time.sleep(0.05)
+            continue
+        result, index, cells = run_plan(running)
+        report_progress(running[0], result, index, cells)
+        if plan is running:
+            plan = None
 
 
 def display(label):